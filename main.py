@@ -1,5 +1,5 @@
 # Load config first to initialize logger
-from src.config.config import load_config, get_database_url, get_caminho_rede, get_caminho_de_para, get_url_hml, get_user_SeSuite, get_password_SeSuite, generate_default_foldes, get_contra_senha
+from src.config.config import load_config, get_database_url, get_caminho_rede, get_caminho_de_para, get_fonte_de_para, get_url_hml, get_user_SeSuite, get_password_SeSuite, generate_default_foldes, get_contra_senha
 load_config()
 
 # Now import other dependencies
@@ -13,15 +13,17 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 import smtplib
-from src.utils.read_files_utils import capture_type_from_headers, capture_code_from_docx, capture_code_from_headers, convert_doc_to_docx, convert_docx_to_doc, read_excel_file, captura_tabela_embalagem, captura_codigo_nucleo, captura_tabela_fabricacao
-from src.utils.edit_files_utiles import edit_file_ficha, edit_file_eme, edit_file_mame, edit_file_embalagem_fabricacao, adicionar_nova_linha_com_codigo_embalagem, substituir_codigo_nucleo,adicionar_nova_linha_fabricacao, editar_celula_codigo_embalagem
-from src.utils.edit_files_utils_excel import edit_excel_codigo, adicionar_revisao, update_excel_footer
-from src.utils.verify_excel_type import verify_excel_type
+from src.utils.read_files_utils import triagem_docx, convert_doc_to_docx, convert_docx_to_doc
+from src.utils.edit_files_utiles import SUBSTITUICAO_CELULA, SUBSTITUICAO_TEXTO
+from src.utils.document_session import DocumentSession
+from src.utils.excel_session import ExcelSession
+from src.utils.extraction_cache import get_extraction_cache, hash_arquivo
+from src.utils.de_para_utils import carregar_de_para, comparar_de_para, CODIGO_NAO_ENCONTRADO
 from src.navigantion.base_page import BasePage
 from src.navigantion.login_page import LoginPage
 from src.navigantion.upload_seSuite import NavegationSeSuite
 from src.navigantion.homologacao_seSuite import HomologacaoSeSuite
-from src.services.db_service import insert_log_data, query_to_dataframe, update_log_data
+from src.services.db_service import insert_log_data, query_to_dataframe, update_log_data, sincronizar_de_para, sha256_de_para_sincronizado, carregar_de_para_do_banco, registrar_codigos_arquivo, buscar_arquivos_por_codigos
 from src.utils.logger import ProcessType, LogStatus, get_logger
 from sqlalchemy import create_engine
 from sqlalchemy.sql import text
@@ -133,50 +135,65 @@ def gerar_relatorio_e_enviar_email(df):
         logger.error(f"Erro ao enviar e-mail: {e}", ProcessType.NETWORK)
 
 # Função para editar o arquivo conforme o tipo
-def editar_arquivo(arquivo, codigo_word, novo_codigo, tipoDocumento, df_para):
+def editar_arquivo(arquivo, codigo_word, novo_codigo, tipoDocumento, de_para, codigos_encontrados=None, sessao=None, sha256=None):
+    # Códigos DE lidos das tabelas do documento, registrados depois no índice reverso
+    if codigos_encontrados is None:
+        codigos_encontrados = {}
     try:
+        # O documento é lido uma única vez e gravado apenas no commit da sessão
+        if sessao is None:
+            sessao = DocumentSession(arquivo, cache=get_extraction_cache(), sha256=sha256)
+
         logger.info(f"Identificando tipo do arquivo: {os.path.basename(arquivo)}", ProcessType.FILE)
-        type_file = capture_type_from_headers(arquivo)
+        type_file = sessao.capturar_tipo_cabecalhos()
         logger.info(f"Tipo identificado: {type_file}", ProcessType.FILE)
         logger.info(f"Substituindo código: {codigo_word} → {novo_codigo}", ProcessType.BUSINESS)
         
         if type_file == "FICHA DE ANÁLISE":
             logger.info("Processando FICHA DE ANÁLISE...", ProcessType.BUSINESS)
-            edit_file_ficha(arquivo, codigo_word, f"{codigo_word} ({novo_codigo})", arquivo)
+            sessao.editar_ficha(codigo_word, f"{codigo_word} ({novo_codigo})")
+            sessao.commit()
             logger.success("FICHA DE ANÁLISE processada com sucesso", ProcessType.BUSINESS)
             return "Processado"
         elif type_file == "EME" or type_file == "EMP" or type_file == "EPA" or type_file == "EPE" or type_file == "EPI":
             logger.info(f"Processando {type_file}...", ProcessType.BUSINESS)
-            edit_file_eme(arquivo, codigo_word, f"{codigo_word} ({novo_codigo})", arquivo)
+            sessao.editar_eme(codigo_word, f"{codigo_word} ({novo_codigo})")
+            sessao.commit()
             logger.success(f"{type_file} processado com sucesso", ProcessType.BUSINESS)
             return "Processado"
         elif type_file == "MAME" or type_file == "MAMP" or type_file == "MAPA" or type_file == "MAPE" or type_file == "MAPI":
             logger.info(f"Processando {type_file}...", ProcessType.BUSINESS)
-            edit_file_mame(arquivo, codigo_word, f"{codigo_word} ({novo_codigo})", arquivo)
+            sessao.editar_mame(codigo_word, f"{codigo_word} ({novo_codigo})")
+            sessao.commit()
             logger.success(f"{type_file} processado com sucesso", ProcessType.BUSINESS)
             return "Processado"
         elif tipoDocumento=="INSTRUÇÃO DE EMBALAGEM":
             logger.info("Processando INSTRUÇÃO DE EMBALAGEM...", ProcessType.BUSINESS)
-            df_embalagem = captura_tabela_embalagem(arquivo, "Componentes – Material de Embalagem")
+            df_embalagem = sessao.tabela_embalagem("Componentes – Material de Embalagem")
             logger.info(f"Tabela de embalagem capturada: {len(df_embalagem)} linhas", ProcessType.BUSINESS)
+            codigos_encontrados["embalagem"] = [item['Código'] for item in df_embalagem]
 
-            novas_linhas = []
+            substituicoes = []
             for item in df_embalagem:
                 codigo_item = item['Código']
                 logger.info(f"Processando código de embalagem: {codigo_item}", ProcessType.BUSINESS)
-                codigo_para, descricao_item = buscar_codigo_para(codigo_item, df_para)
+                codigo_para, descricao_item = buscar_codigo_para(codigo_item, de_para)
 
                 if codigo_para != "Código não encontrado":
                     logger.info(f"Editando célula: {codigo_item} → {codigo_para}", ProcessType.BUSINESS)
-                    editar_celula_codigo_embalagem(arquivo, str(codigo_item), str(codigo_para), arquivo)
+                    substituicoes.append({"antigo": str(codigo_item), "novo": str(codigo_para), "modo": SUBSTITUICAO_CELULA})
+
+            # Todas as células são alteradas de uma vez; se alguma falhar, nenhuma é alterada
+            sessao.aplicar_substituicoes(substituicoes)
             
             if codigo_word.startswith(('3', '5', '9')):
                 logger.info(f"Editando cabeçalho com substituição direta: {codigo_word} → {novo_codigo}", ProcessType.BUSINESS)
-                edit_file_embalagem_fabricacao(arquivo, str(codigo_word), str(novo_codigo), arquivo)
+                sessao.editar_embalagem_fabricacao(str(codigo_word), str(novo_codigo))
             else:
                 logger.info(f"Editando cabeçalho com código duplo: {codigo_word} → {codigo_word} ({novo_codigo})", ProcessType.BUSINESS)
-                edit_file_embalagem_fabricacao(arquivo, str(codigo_word), f"{str(codigo_word)} ({str(novo_codigo)})", arquivo)
+                sessao.editar_embalagem_fabricacao(str(codigo_word), f"{str(codigo_word)} ({str(novo_codigo)})")
             
+            sessao.commit()
             logger.success("INSTRUÇÃO DE EMBALAGEM processada com sucesso", ProcessType.BUSINESS)
             return "Processado"
 
@@ -184,39 +201,45 @@ def editar_arquivo(arquivo, codigo_word, novo_codigo, tipoDocumento, df_para):
             logger.info("Processando INSTRUÇÃO DE FABRICAÇÃO...", ProcessType.BUSINESS)
             if codigo_word.startswith(('3', '5', '9')):
                 logger.info(f"Editando cabeçalho com substituição direta: {codigo_word} → {novo_codigo}", ProcessType.BUSINESS)
-                edit_file_embalagem_fabricacao(arquivo, str(codigo_word), str(novo_codigo), arquivo)
+                sessao.editar_embalagem_fabricacao(str(codigo_word), str(novo_codigo))
             else:
                 logger.info(f"Editando cabeçalho com código duplo: {codigo_word} → {codigo_word} ({novo_codigo})", ProcessType.BUSINESS)
-                edit_file_embalagem_fabricacao(arquivo, str(codigo_word), f"{str(codigo_word)} ({str(novo_codigo)})", arquivo)
+                sessao.editar_embalagem_fabricacao(str(codigo_word), f"{str(codigo_word)} ({str(novo_codigo)})")
 
-            codigos = captura_codigo_nucleo(arquivo, "Componentes – Núcleo")
+            codigos = sessao.codigos_nucleo("Componentes – Núcleo")
             logger.info(f"Códigos núcleo capturados: {len(codigos)} códigos", ProcessType.BUSINESS)
+            codigos_encontrados["nucleo"] = codigos
 
+            substituicoes = []
             for cod in codigos:
                 logger.info(f"Processando código núcleo: {cod}", ProcessType.BUSINESS)
-                codigo_para, descricao_item = buscar_codigo_para(cod, df_para)
+                codigo_para, descricao_item = buscar_codigo_para(cod, de_para)
 
                 if codigo_para != "Código não encontrado":
                     if codigo_word.startswith(('3')):
                         logger.info(f"Substituindo código núcleo diretamente: {cod} → {codigo_para}", ProcessType.BUSINESS)
-                    substituir_codigo_nucleo(arquivo, str(cod), str(codigo_para), arquivo)
+                    substituicoes.append({"antigo": str(cod), "novo": str(codigo_para), "modo": SUBSTITUICAO_TEXTO})
                 else:
                     logger.info(f"Substituindo código núcleo com código duplo: {cod} → {cod} ({codigo_para})", ProcessType.BUSINESS)
-                    substituir_codigo_nucleo(arquivo, cod, f"{str(cod)} ({str(codigo_para)})", arquivo)
+                    substituicoes.append({"antigo": str(cod), "novo": f"{str(cod)} ({str(codigo_para)})", "modo": SUBSTITUICAO_TEXTO})
+
+            sessao.aplicar_substituicoes(substituicoes)
 
-            df_fabricacao = captura_tabela_fabricacao(arquivo, "Componentes – Núcleo")
+            df_fabricacao = sessao.tabela_fabricacao("Componentes – Núcleo")
             logger.info(f"Tabela de fabricação capturada: {len(df_fabricacao)} linhas", ProcessType.BUSINESS)
+            codigos_encontrados["fabricacao"] = [item['Código'] for item in df_fabricacao]
             
             novas_linhas = []
             for item in df_fabricacao:
                 codigo_item = item['Código']
                 logger.info(f"Processando código de fabricação: {codigo_item}", ProcessType.BUSINESS)
-                codigo_para, descricao_item = buscar_codigo_para(codigo_item, df_para)
+                codigo_para, descricao_item = buscar_codigo_para(codigo_item, de_para)
 
                 if codigo_para != "Código não encontrado":
                     logger.info(f"Editando célula: {codigo_item} → {codigo_para}", ProcessType.BUSINESS)
-                    editar_celula_codigo_embalagem(arquivo, str(codigo_item), str(codigo_para), arquivo)
+                    sessao.editar_celula_codigo_embalagem(str(codigo_item), str(codigo_para))
 
+                    sessao.commit()
                     logger.success("INSTRUÇÃO DE FABRICAÇÃO processada com sucesso", ProcessType.BUSINESS)
                     return "Processado"
                 else:
@@ -227,27 +250,102 @@ def editar_arquivo(arquivo, codigo_word, novo_codigo, tipoDocumento, df_para):
         return "Erro ao Processar"
 
 # Função para buscar código na tabela
-def buscar_codigo_para(codigo_de, df):
+def buscar_codigo_para(codigo_de, de_para):
     logger.info(f"Buscando correspondência para código: {codigo_de}", ProcessType.DATABASE)
     try:
-        # Filtrar o DataFrame com base no 'Codigo - DE'
-        resultado = df.loc[df['Codigo - DE'].astype(str) == str(codigo_de)]
+        # Consulta O(1) no índice DE-PARA
+        resultado = de_para.buscar(codigo_de)
         
         # Verificar se a busca retornou resultados
-        if not resultado.empty:
-            codigo_para = resultado['Codigo -  PARA'].iloc[0]
-            descricao_item = resultado.iloc[0, -1]  # Acessa a última coluna da linha
+        if resultado:
+            codigo_para, descricao_item = resultado
             logger.success(f"Correspondência encontrada: {codigo_de} → {codigo_para}", ProcessType.DATABASE)
             return codigo_para, descricao_item
         else:
             logger.warning(f"Código {codigo_de} não encontrado na tabela DE-PARA", ProcessType.DATABASE)
-            return 'Código não encontrado', None
+            return CODIGO_NAO_ENCONTRADO, None
     except Exception as e:
         logger.error(f"Erro ao buscar código {codigo_de}: {e}", ProcessType.DATABASE)
         return f'Erro na busca de código {e}', None
 
+# Função para registrar no índice reverso os códigos DE encontrados no arquivo
+def registrar_indice_codigos(arquivo, caminho_input, codigos_por_origem):
+    try:
+        quantidade = registrar_codigos_arquivo(os.path.basename(arquivo), caminho_input, codigos_por_origem)
+        logger.info(f"Índice de códigos atualizado: {quantidade} código(s) DE em {os.path.basename(arquivo)}", ProcessType.DATABASE)
+    except Exception as e:
+        # O índice é auxiliar: uma falha aqui não invalida o processamento do arquivo
+        logger.warning(f"Não foi possível atualizar o índice de códigos de {os.path.basename(arquivo)}: {e}", ProcessType.DATABASE)
+
+# Função para devolver às pastas de entrada os arquivos afetados por uma alteração na DE-PARA
+def reprocessar_arquivos_afetados(codigos_alterados, pastas):
+    """
+    Consulta o índice reverso e move de PROCESSADOS para a pasta de origem apenas os
+    arquivos que contêm algum código DE alterado na tabela DE-PARA.
+
+    Args:
+        codigos_alterados (set): Códigos DE incluídos, removidos ou alterados.
+        pastas (list): Pastas de entrada válidas.
+
+    Returns:
+        int: Quantidade de arquivos devolvidos para reprocessamento.
+    """
+    if not codigos_alterados:
+        return 0
+
+    logger.info(f"Tabela DE-PARA alterada: {len(codigos_alterados)} código(s) DE modificados", ProcessType.DATABASE)
+    try:
+        afetados = buscar_arquivos_por_codigos(codigos_alterados)
+    except Exception as e:
+        logger.error(f"Erro ao consultar o índice de códigos: {e}", ProcessType.DATABASE)
+        return 0
+
+    pasta_processados = rf"{get_caminho_rede()}\PROCESSADOS"
+    reenfileirados = 0
+    for nomearquivo, pasta_origem in afetados:
+        origem = os.path.join(pasta_processados, nomearquivo)
+        destino = os.path.join(pasta_origem, nomearquivo)
+        if pasta_origem not in pastas or not os.path.exists(origem):
+            logger.warning(f"Arquivo {nomearquivo} não está disponível em PROCESSADOS para reprocessamento", ProcessType.FILE)
+            continue
+        if os.path.exists(destino):
+            logger.debug(f"Arquivo {nomearquivo} já está na fila de '{pasta_origem}'", ProcessType.FILE)
+            continue
+        shutil.move(origem, destino)
+        reenfileirados += 1
+        logger.info(f"Arquivo {nomearquivo} devolvido para '{pasta_origem}' para reprocessamento", ProcessType.FILE)
+
+    logger.success(f"{reenfileirados} de {len(afetados)} arquivo(s) afetado(s) devolvidos para reprocessamento", ProcessType.FILE)
+    return reenfileirados
+
+# Função para carregar a tabela DE-PARA e identificar os códigos alterados desde a última execução
+def carregar_tabela_de_para():
+    logger.info("Carregando tabela DE-PARA...", ProcessType.DATABASE)
+    caminho_arquivo_excel = get_caminho_de_para()
+    anterior = None
+    if get_fonte_de_para() == "banco":
+        # O SHA-256 é lido antes da tabela: se outro robô sincronizar entre as duas
+        # leituras, a tabela é recarregada em vez de usar uma versão desatualizada
+        sha256_anterior = sha256_de_para_sincronizado()
+        de_para = carregar_de_para_do_banco()
+
+        # A planilha só é importada no banco quando mudou desde a última sincronização
+        if os.path.exists(caminho_arquivo_excel):
+            sincronizada = sincronizar_de_para(caminho_arquivo_excel)
+            if sincronizada or sha256_de_para_sincronizado() != sha256_anterior:
+                # Banco novo (nunca sincronizado): não há versão anterior para comparar
+                anterior = de_para if sha256_anterior is not None else None
+                de_para = carregar_de_para_do_banco()
+    else:
+        # Tabela compacta mapeada em memória (ver DeParaCompacto), compartilhada pelos processos
+        de_para, anterior = carregar_de_para(caminho_arquivo_excel, compacto=True, com_anterior=True)
+    logger.success(f"Tabela DE-PARA carregada: {len(de_para)} códigos indexados", ProcessType.DATABASE)
+
+    codigos_alterados = comparar_de_para(anterior, de_para) if anterior is not None else set()
+    return de_para, codigos_alterados
+
 # Função para processar arquivos .doc ou .docx
-def processar_arquivo(arquivo, caminho_input, df):
+def processar_arquivo(arquivo, caminho_input, de_para):
     logger.info(f"Iniciando processamento do arquivo: {os.path.basename(arquivo)}", ProcessType.BUSINESS)
     print("\n" + "-"*50)
     print(f"PROCESSANDO: {os.path.basename(arquivo)}")
@@ -263,6 +361,15 @@ def processar_arquivo(arquivo, caminho_input, df):
         logger.error(f"Erro ao preparar o arquivo: {e}", ProcessType.FILE)
         print(f"❌ ERRO ao preparar o arquivo: {e}")
         resultado = "Erro ao Processar"
+
+    # Os fatos extraídos do arquivo ficam no cache pelo SHA-256 do conteúdo original,
+    # para que um arquivo devolvido à fila sem alterações não seja lido novamente
+    cache_extracoes = get_extraction_cache()
+    try:
+        sha256 = hash_arquivo(os.path.join(caminho_input, arquivo))
+    except OSError as e:
+        logger.warning(f"Não foi possível calcular o SHA-256 do arquivo, cache de extrações ignorado: {e}", ProcessType.FILE)
+        sha256 = None
     
     match extensao:
         case ".doc" | ".docx":
@@ -277,13 +384,22 @@ def processar_arquivo(arquivo, caminho_input, df):
                 converted = True
                 logger.success("Conversão concluída", ProcessType.FILE)
             
+            # A triagem lê só o XML do corpo e dos cabeçalhos; o python-docx só é usado
+            # na edição, para os arquivos que têm correspondência na DE-PARA
             logger.info("Capturando código do documento...", ProcessType.BUSINESS)
-            codigo_word = capture_code_from_docx(arquivo_novo)
-            tipoDocumento = ""
+            try:
+                triagem = cache_extracoes.obter_ou_extrair(sha256, "triagem", lambda: triagem_docx(arquivo_novo))
+            except Exception as e:
+                logger.error(f"Não foi possível ler o documento {arquivo_novo}: {e}", ProcessType.FILE)
+                shutil.move(os.path.join(backup_path, arquivo), rf"{get_caminho_rede()}\ERRO")
+                insert_log_data(arquivo, "ERRO")
+                return
+
+            codigo_word = triagem["codigo"]
+            tipoDocumento = triagem["tipo_documento"]
             
-            if codigo_word == "Nenhum código encontrado.":
-                logger.info("Código não encontrado no conteúdo, tentando capturar dos cabeçalhos...", ProcessType.BUSINESS)
-                codigo_word, tipoDocumento = capture_code_from_headers(arquivo_novo)
+            if tipoDocumento:
+                logger.info("Código não encontrado no conteúdo, capturado dos cabeçalhos", ProcessType.BUSINESS)
                 logger.info(f"Tipo de documento identificado: {tipoDocumento}", ProcessType.BUSINESS)
 
                 if codigo_word == "Nenhum código encontrado.":
@@ -299,7 +415,7 @@ def processar_arquivo(arquivo, caminho_input, df):
             logger.info(f"Último código a ser processado: {ultimo_codigo}", ProcessType.BUSINESS)
             
             logger.info("Buscando correspondência na tabela DE-PARA...", ProcessType.DATABASE)
-            novo_codigo, descricao_item = buscar_codigo_para(ultimo_codigo, df)
+            novo_codigo, descricao_item = buscar_codigo_para(ultimo_codigo, de_para)
 
             if novo_codigo == "Código não encontrado":
                 logger.error(f"Correspondência não encontrada para: {ultimo_codigo}", ProcessType.DATABASE)
@@ -329,7 +445,8 @@ def processar_arquivo(arquivo, caminho_input, df):
                 return
 
             logger.info(f"Iniciando edição do arquivo: {arquivo_novo}", ProcessType.BUSINESS)
-            resultado = editar_arquivo(arquivo_novo, codigo_word, novo_codigo, tipoDocumento, df)
+            codigos_arquivo = {"documento": re.split(r'[\/,]', codigo_word)}
+            resultado = editar_arquivo(arquivo_novo, codigo_word, novo_codigo, tipoDocumento, de_para, codigos_arquivo, sha256=sha256)
             logger.info(f"Resultado da edição: {resultado}", ProcessType.BUSINESS)
             
             if resultado == "Processado":
@@ -355,6 +472,7 @@ def processar_arquivo(arquivo, caminho_input, df):
                 
                 shutil.move(os.path.join(caminho_input, arquivo), rf"{get_caminho_rede()}\ARQUIVOS_REVISADOS")
                 insert_log_data(arquivo, "OK")
+                registrar_indice_codigos(arquivo, caminho_input, codigos_arquivo)
                 logger.success("Arquivos movidos com sucesso e log atualizado com status OK", ProcessType.DATABASE)
             else:
                 logger.error("Movendo arquivo para pasta ERRO devido a falha no processamento...", ProcessType.FILE)
@@ -368,16 +486,20 @@ def processar_arquivo(arquivo, caminho_input, df):
             logger.info(f"Criando backup em: {backup_path}", ProcessType.FILE)
             shutil.copy(arquivo_novo, backup_path)
             
+            # Planilha carregada e gravada uma única vez para todas as etapas
+            sessao_excel = ExcelSession(arquivo_novo)
+
             logger.info("Verificando tipo do arquivo Excel...", ProcessType.EXCEL)
-            excel_type_verification = verify_excel_type(arquivo_novo)
+            excel_type_verification = cache_extracoes.obter_ou_extrair(sha256, "tipo_excel", sessao_excel.classificar)
             logger.info(f"Tipo de Excel identificado: {excel_type_verification}", ProcessType.EXCEL)
             
             if excel_type_verification == "TYPE_A":
                 logger.info("Processando Excel TYPE_A...", ProcessType.EXCEL)
                 logger.info("Editando códigos conforme tabela DE-PARA...", ProcessType.EXCEL)
-                edit_excel_codigo(arquivo_novo, get_caminho_de_para(), excel_type_verification)
+                codigos_excel = sessao_excel.traduzir_codigos(de_para, excel_type_verification)
                 logger.info("Adicionando informação de revisão...", ProcessType.EXCEL)
-                adicionar_revisao(arquivo_novo, "Revisão dos documentos mediante ao CM-TBS-00728")
+                sessao_excel.adicionar_revisao("Revisão dos documentos mediante ao CM-TBS-00728")
+                sessao_excel.commit()
                 resultado = "Processado"
                 logger.info("Movendo arquivos para as pastas correspondentes...", ProcessType.FILE)
                 # DEFINE FOLDER PROCESSADOS IN  C:\RPA\RPA001_Garantia_De_Qualidade\data\PROCESSADOS
@@ -391,11 +513,13 @@ def processar_arquivo(arquivo, caminho_input, df):
                     os.remove(arquivo_novo)
                 
                 insert_log_data(arquivo, "OK")
+                registrar_indice_codigos(arquivo, caminho_input, {"lista_fornecedores": codigos_excel})
                 logger.success("Excel TYPE_A processado com sucesso", ProcessType.EXCEL)
             elif excel_type_verification == "TYPE_B":
                 logger.info("Processando Excel TYPE_B...", ProcessType.EXCEL)
                 logger.info("Editando códigos conforme tabela DE-PARA...", ProcessType.EXCEL)
-                edit_excel_codigo(arquivo_novo, get_caminho_de_para(), excel_type_verification)
+                codigos_excel = sessao_excel.traduzir_codigos(de_para, excel_type_verification)
+                sessao_excel.commit()
                 resultado = "Processado"
                 logger.info("Movendo arquivos para as pastas correspondentes...", ProcessType.FILE)
                 shutil.copy(os.path.join(backup_path, arquivo), rf"{get_caminho_rede()}\PROCESSADOS")
@@ -406,11 +530,13 @@ def processar_arquivo(arquivo, caminho_input, df):
                     os.remove(arquivo_novo)
                 
                 insert_log_data(arquivo, "OK")
+                registrar_indice_codigos(arquivo, caminho_input, {"lista_fornecedores": codigos_excel})
                 logger.success("Excel TYPE_B processado com sucesso", ProcessType.EXCEL)
             elif excel_type_verification == "TYPE_C" or excel_type_verification == "TYPE_D" or excel_type_verification == "TYPE_REVISION":
                 logger.info(f"Processando Excel {excel_type_verification}...", ProcessType.EXCEL)
                 logger.info("Atualizando rodapé do Excel...", ProcessType.EXCEL)
-                update_excel_footer(arquivo_novo)
+                sessao_excel.atualizar_rodape()
+                sessao_excel.commit()
                 resultado = "Processado"
                 logger.info("Movendo arquivos para as pastas correspondentes...", ProcessType.FILE)
                 shutil.copy(os.path.join(backup_path, arquivo), rf"{get_caminho_rede()}\PROCESSADOS")
@@ -471,16 +597,16 @@ def main():
         logger.info(f"Pasta: {pasta}", ProcessType.FILE)
     print("")
     
+    # A tabela é carregada antes da listagem para que os arquivos afetados por
+    # alterações na DE-PARA voltem para a fila ainda nesta execução
+    de_para, codigos_alterados = carregar_tabela_de_para()
+    reprocessar_arquivos_afetados(codigos_alterados, pastas)
+
     # Listar os arquivos nas pastas especificadas
     arquivos = listar_arquivos(pastas)
     print("")
     
     if arquivos:
-        logger.info("Carregando tabela DE-PARA...", ProcessType.DATABASE)
-        caminho_arquivo_excel = get_caminho_de_para()
-        df = read_excel_file(caminho_arquivo_excel)
-        logger.success(f"Tabela DE-PARA carregada: {len(df)} registros", ProcessType.DATABASE)        
-        
         print("\n" + "-"*50)
         logger.info(f"Iniciando processamento de {len(arquivos)} arquivos", ProcessType.BUSINESS)
         print("-"*50)
@@ -498,7 +624,14 @@ def main():
                 logger.error(f"Caminho de entrada não encontrado para o arquivo {arquivo}", ProcessType.FILE)
                 continue
             
-            processar_arquivo(arquivo, caminho_input, df)
+            processar_arquivo(arquivo, caminho_input, de_para)
+        estatisticas = get_extraction_cache().estatisticas()
+        logger.info(
+            f"Cache de extrações: {estatisticas['acertos']} acerto(s), {estatisticas['falhas']} falha(s) "
+            f"({estatisticas['taxa_acerto']:.0%}), {estatisticas['entradas']} entrada(s) em "
+            f"{estatisticas['bytes'] / 1024:.0f} KB, {estatisticas['descartes']} descartada(s)",
+            ProcessType.FILE,
+        )
     else:
         logger.info("Nenhum arquivo encontrado nas pastas especificadas", ProcessType.FILE)
     print("\n" + "-"*50)
@@ -6,6 +6,8 @@ from src.utils.logger import ProcessType, initialize_logger, get_logger
 
 #declarar uma variavel looger global
 
+DIRETORIO_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 # Função para carregar variáveis de ambiente
 def load_config():
@@ -78,6 +80,14 @@ def get_caminho_rede():
 def get_caminho_de_para():
     return os.getenv("CAMINHO_DE_PARA")
 
+def get_caminho_cache():
+    """Obtém a pasta dos caches locais (CAMINHO_CACHE); padrão: pasta cache na raiz do projeto."""
+    return os.getenv("CAMINHO_CACHE") or os.path.join(DIRETORIO_PROJETO, "cache")
+
+def get_fonte_de_para():
+    """Obtém a origem da tabela DE-PARA: 'excel' (planilha em rede) ou 'banco' (tabela de_para)."""
+    return os.getenv("FONTE_DE_PARA", "excel")
+
 def get_url_hml():
     return os.getenv("URL_SESUITE_HML")
 
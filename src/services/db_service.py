@@ -1,7 +1,10 @@
 import pandas as pd
 import os
 import sys
-from sqlalchemy import create_engine, text
+import io
+import csv
+from datetime import datetime
+from sqlalchemy import create_engine, text, bindparam
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,10 +13,18 @@ sys.path.append(src_dir)
 
 from config.config import load_config, get_database_url, get_caminho_de_para
 from utils.read_files_utils import read_excel_file
+from src.utils.de_para_utils import DeParaIndex, calcular_impressao_digital, carregar_de_para, normalizar_codigo
 
 
 load_config()
 
+DE_PARA_TABLE_NAME = "de_para"
+DE_PARA_SYNC_TABLE_NAME = "de_para_sincronizacao"
+CODE_INDEX_TABLE_NAME = "rpa001_indice_codigos"
+
+# Chave do pg_advisory_xact_lock que serializa a sincronização entre os robôs
+DE_PARA_SYNC_LOCK_ID = 7280006
+
 def insert_dataframe_to_postgres(df, table_name, db_url):
     try:
         # Cria uma engine do SQLAlchemy para se conectar ao banco
@@ -134,4 +145,329 @@ def query_to_dataframe(query, params=None):
 
     except Exception as e:
         print(f"Erro ao realizar consulta: {e}")
-        return pd.DataFrame()  # Retorna um DataFrame vazio em caso de erro
\ No newline at end of file
+        return pd.DataFrame()  # Retorna um DataFrame vazio em caso de erro
+
+
+def criar_tabela_de_para(engine):
+    """
+    Cria as tabelas da DE-PARA e do controle de sincronização, se não existirem.
+    O código DE é a chave primária, o que garante o índice para as buscas.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine de conexão ao banco de dados.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {DE_PARA_TABLE_NAME} (
+                codigo_de VARCHAR(50) PRIMARY KEY,
+                codigo_para VARCHAR(50) NOT NULL,
+                descricao TEXT
+            )
+        """))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {DE_PARA_SYNC_TABLE_NAME} (
+                id INTEGER PRIMARY KEY,
+                caminho TEXT,
+                tamanho BIGINT,
+                mtime BIGINT,
+                sha256 VARCHAR(64),
+                registros INTEGER,
+                atualizado_em TIMESTAMP
+            )
+        """))
+
+
+def _copiar_de_para(connection, registros):
+    """
+    Importa os registros na tabela DE-PARA. No PostgreSQL usa COPY; em outros bancos
+    (ex.: SQLite em testes locais) usa um INSERT em lote.
+
+    No CSV do COPY um campo vazio sem aspas é lido como NULL; FORCE_NOT_NULL faz com que
+    códigos PARA e descrições vazios sejam gravados como "", como no INSERT.
+    """
+    if connection.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(registros)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {DE_PARA_TABLE_NAME} (codigo_de, codigo_para, descricao) FROM STDIN "
+                "WITH (FORMAT csv, FORCE_NOT_NULL (codigo_para, descricao))",
+                buffer,
+            )
+        finally:
+            cursor.close()
+    elif registros:
+        connection.execute(
+            text(f"INSERT INTO {DE_PARA_TABLE_NAME} (codigo_de, codigo_para, descricao) VALUES (:codigo_de, :codigo_para, :descricao)"),
+            [{"codigo_de": de, "codigo_para": para, "descricao": descricao} for de, para, descricao in registros],
+        )
+
+
+def _impressao_digital_sincronizada(connection):
+    """Impressão digital (tamanho, mtime, sha256) da planilha importada na última sincronização, ou None."""
+    registro = connection.execute(
+        text(f"SELECT tamanho, mtime, sha256 FROM {DE_PARA_SYNC_TABLE_NAME} WHERE id = 1")
+    ).mappings().first()
+    return dict(registro) if registro else None
+
+
+def _sha256_sincronizado(connection):
+    """SHA-256 da planilha importada na última sincronização, ou None."""
+    impressao_digital = _impressao_digital_sincronizada(connection)
+    return impressao_digital["sha256"] if impressao_digital else None
+
+
+def _bloquear_sincronizacao(connection):
+    """
+    Serializa a sincronização entre robôs até o fim da transação.
+
+    Sem o bloqueio, duas transações concorrentes executam DELETE e COPY e a segunda
+    falha com violação da chave primária. No SQLite, que serializa as escritas, uma
+    escrita sem efeito abre a transação de escrita antes da nova leitura do SHA-256.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": DE_PARA_SYNC_LOCK_ID})
+    else:
+        connection.execute(text(f"UPDATE {DE_PARA_SYNC_TABLE_NAME} SET id = id WHERE id = 1"))
+
+
+def sincronizar_de_para(caminho_arquivo, db_url=None):
+    """
+    Importa a planilha DE-PARA para o banco apenas se ela mudou desde a última sincronização.
+
+    A comparação usa o SHA-256 da planilha, calculado apenas se o tamanho ou a data
+    de modificação diferirem dos gravados na última sincronização. A tabela é recarregada por completo
+    dentro de uma única transação, de modo que os robôs nunca enxergam uma tabela parcial.
+    Robôs que sincronizam ao mesmo tempo são serializados por um bloqueio, e o SHA-256 é
+    conferido de novo dentro da transação: só o primeiro recarrega a tabela.
+
+    Args:
+        caminho_arquivo (str): Caminho da planilha DE-PARA.
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        bool: True se a tabela foi recarregada, False se já estava atualizada.
+    """
+    engine = create_engine(db_url or get_database_url())
+    criar_tabela_de_para(engine)
+
+    with engine.connect() as connection:
+        sincronizada = _impressao_digital_sincronizada(connection)
+
+    impressao_digital = calcular_impressao_digital(caminho_arquivo, sincronizada)
+    if sincronizada and sincronizada["sha256"] == impressao_digital["sha256"]:
+        if sincronizada != impressao_digital:
+            # Mesmo conteúdo com outra data de modificação: evita recalcular o SHA-256 nas próximas
+            with engine.begin() as connection:
+                connection.execute(
+                    text(f"UPDATE {DE_PARA_SYNC_TABLE_NAME} SET tamanho = :tamanho, mtime = :mtime WHERE id = 1"),
+                    impressao_digital,
+                )
+        print("Tabela DE-PARA do banco já está atualizada.")
+        return False
+
+    de_para = carregar_de_para(caminho_arquivo, impressao_digital=impressao_digital)
+    if de_para is None:
+        print("Não foi possível ler a planilha DE-PARA para sincronização.")
+        return False
+
+    registros = [(codigo, *de_para.buscar(codigo)) for codigo in de_para.codigos()]
+
+    with engine.begin() as connection:
+        _bloquear_sincronizacao(connection)
+        if _sha256_sincronizado(connection) == impressao_digital["sha256"]:
+            print("Tabela DE-PARA do banco já foi atualizada por outro robô.")
+            return False
+
+        connection.execute(text(f"DELETE FROM {DE_PARA_TABLE_NAME}"))
+        _copiar_de_para(connection, registros)
+        connection.execute(text(f"DELETE FROM {DE_PARA_SYNC_TABLE_NAME} WHERE id = 1"))
+        connection.execute(
+            text(f"""
+                INSERT INTO {DE_PARA_SYNC_TABLE_NAME} (id, caminho, tamanho, mtime, sha256, registros, atualizado_em)
+                VALUES (1, :caminho, :tamanho, :mtime, :sha256, :registros, :atualizado_em)
+            """),
+            {
+                "caminho": caminho_arquivo,
+                "registros": len(registros),
+                "atualizado_em": datetime.now(),
+                **impressao_digital,
+            },
+        )
+
+    print(f"Tabela DE-PARA sincronizada: {len(registros)} registros.")
+    return True
+
+
+def buscar_de_para(codigos, db_url=None):
+    """
+    Busca em lote os códigos DE na tabela DE-PARA do banco.
+
+    Args:
+        codigos (iterable): Códigos DE em qualquer formato.
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        dict: {código DE normalizado: (código PARA, descrição)} apenas para os códigos encontrados.
+    """
+    chaves = sorted({normalizar_codigo(codigo) for codigo in codigos} - {""})
+    if not chaves:
+        return {}
+
+    engine = create_engine(db_url or get_database_url())
+    query = text(
+        f"SELECT codigo_de, codigo_para, descricao FROM {DE_PARA_TABLE_NAME} WHERE codigo_de IN :codigos"
+    ).bindparams(bindparam("codigos", expanding=True))
+
+    with engine.connect() as connection:
+        result = connection.execute(query, {"codigos": chaves})
+        return {codigo_de: (codigo_para, descricao or "") for codigo_de, codigo_para, descricao in result}
+
+
+def buscar_codigo_de_para(codigo, db_url=None):
+    """
+    Busca um único código DE na tabela DE-PARA do banco.
+
+    Returns:
+        tuple: (código PARA, descrição) ou None se o código não existir.
+    """
+    return buscar_de_para([codigo], db_url).get(normalizar_codigo(codigo))
+
+
+def sha256_de_para_sincronizado(db_url=None):
+    """
+    SHA-256 da planilha importada na última sincronização da tabela DE-PARA.
+
+    Args:
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        str: SHA-256, ou None se a tabela nunca foi sincronizada.
+    """
+    engine = create_engine(db_url or get_database_url())
+    criar_tabela_de_para(engine)
+    with engine.connect() as connection:
+        return _sha256_sincronizado(connection)
+
+
+def carregar_de_para_do_banco(db_url=None):
+    """
+    Carrega toda a tabela DE-PARA do banco em um DeParaIndex.
+
+    As tabelas são criadas se ainda não existirem (banco novo, antes da primeira
+    sincronização); nesse caso o índice retornado é vazio.
+
+    Args:
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        DeParaIndex: Índice com todos os códigos da tabela.
+    """
+    engine = create_engine(db_url or get_database_url())
+    criar_tabela_de_para(engine)
+    with engine.connect() as connection:
+        result = connection.execute(text(f"SELECT codigo_de, codigo_para, descricao FROM {DE_PARA_TABLE_NAME}"))
+        return DeParaIndex({codigo_de: (codigo_para, descricao or "") for codigo_de, codigo_para, descricao in result})
+
+
+def criar_tabela_indice_codigos(engine):
+    """
+    Cria a tabela do índice reverso código DE -> arquivo, se não existir.
+
+    Cada linha registra um código DE encontrado em um arquivo processado, a pasta de
+    onde o arquivo veio e a origem do código (cabeçalho, tabela de embalagem etc.).
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine de conexão ao banco de dados.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {CODE_INDEX_TABLE_NAME} (
+                nomearquivo TEXT NOT NULL,
+                pasta_origem TEXT NOT NULL,
+                codigo_de VARCHAR(50) NOT NULL,
+                origem VARCHAR(50) NOT NULL,
+                registrado_em TIMESTAMP,
+                PRIMARY KEY (nomearquivo, codigo_de, origem)
+            )
+        """))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {CODE_INDEX_TABLE_NAME}_codigo_de_idx ON {CODE_INDEX_TABLE_NAME} (codigo_de)"
+        ))
+
+
+def registrar_codigos_arquivo(nomearquivo, pasta_origem, codigos_por_origem, db_url=None):
+    """
+    Registra no índice reverso os códigos DE encontrados em um arquivo processado.
+
+    Os registros anteriores do mesmo arquivo são substituídos, de modo que o índice
+    sempre reflete o último processamento.
+
+    Args:
+        nomearquivo (str): Nome do arquivo (sem o caminho).
+        pasta_origem (str): Pasta de entrada de onde o arquivo foi lido.
+        codigos_por_origem (dict): {origem: lista de códigos DE}, ex.: {"embalagem": ["123", ...]}.
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        int: Quantidade de códigos registrados.
+    """
+    registrado_em = datetime.now()
+    registros = {}
+    for origem, codigos in codigos_por_origem.items():
+        for codigo in codigos:
+            chave = normalizar_codigo(codigo)
+            if chave:
+                registros[(chave, origem)] = {
+                    "nomearquivo": nomearquivo,
+                    "pasta_origem": pasta_origem,
+                    "codigo_de": chave,
+                    "origem": origem,
+                    "registrado_em": registrado_em,
+                }
+
+    engine = create_engine(db_url or get_database_url())
+    criar_tabela_indice_codigos(engine)
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"DELETE FROM {CODE_INDEX_TABLE_NAME} WHERE nomearquivo = :nomearquivo"),
+            {"nomearquivo": nomearquivo},
+        )
+        if registros:
+            connection.execute(
+                text(f"""
+                    INSERT INTO {CODE_INDEX_TABLE_NAME} (nomearquivo, pasta_origem, codigo_de, origem, registrado_em)
+                    VALUES (:nomearquivo, :pasta_origem, :codigo_de, :origem, :registrado_em)
+                """),
+                list(registros.values()),
+            )
+
+    return len(registros)
+
+
+def buscar_arquivos_por_codigos(codigos, db_url=None):
+    """
+    Consulta o índice reverso e retorna os arquivos que contêm algum dos códigos DE.
+
+    Args:
+        codigos (iterable): Códigos DE em qualquer formato.
+        db_url (str, optional): URL de conexão. Se None, usa get_database_url().
+
+    Returns:
+        list: Tuplas (nomearquivo, pasta_origem), sem repetição.
+    """
+    chaves = sorted({normalizar_codigo(codigo) for codigo in codigos} - {""})
+    if not chaves:
+        return []
+
+    engine = create_engine(db_url or get_database_url())
+    criar_tabela_indice_codigos(engine)
+    query = text(
+        f"SELECT DISTINCT nomearquivo, pasta_origem FROM {CODE_INDEX_TABLE_NAME} WHERE codigo_de IN :codigos"
+    ).bindparams(bindparam("codigos", expanding=True))
+
+    with engine.connect() as connection:
+        return [tuple(linha) for linha in connection.execute(query, {"codigos": chaves})]
@@ -0,0 +1,133 @@
+"""
+Benchmark da captura de código no corpo de documentos Word (capture_code_from_docx).
+
+Compara a regra anterior (prefixos ordenados a cada chamada e busca para frente a
+cada prefixo sem código) com a regra atual (prefixos compilados e uma única passada)
+sobre documentos longos gerados em memória e, opcionalmente, sobre os .docx de uma
+pasta. Os dois resultados precisam ser idênticos.
+
+Uso:
+    python -m src.utils.benchmark_captura_codigo [pasta_com_docx]
+"""
+import os
+import random
+import sys
+import time
+
+from src.utils.read_files_utils import (
+    _buscar_codigo_documento,
+    abrir_documento,
+)
+
+PREFIXOS = ["Código:", "CÓDIGO DO MATERIAL", "CÓDIGO", "Código do Produto: ", "CÓDIGO INTERNO DO MATERIAL"]
+
+
+def _buscar_codigo_documento_anterior(paragrafos, tabelas, prefixos):
+    """Regra de captura anterior, mantida apenas como referência para o benchmark."""
+    prefixos = sorted(prefixos, key=len, reverse=True)
+
+    for i, paragrafo in enumerate(paragrafos):
+        texto = paragrafo.strip()
+        for prefixo in prefixos:
+            if texto.startswith(prefixo):
+                codigo = texto[len(prefixo):].strip()
+
+                if not codigo or codigo == ":":
+                    for j in range(i + 1, len(paragrafos)):
+                        prox_paragrafo = paragrafos[j].strip()
+                        if prox_paragrafo:
+                            codigo = prox_paragrafo
+                            break
+
+                if codigo and codigo != ":":
+                    return codigo.replace('.', '')
+
+    for tabela in tabelas:
+        for linha in tabela:
+            celulas = [celula.strip() for celula in linha]
+            for j, texto in enumerate(celulas):
+                for prefixo in prefixos:
+                    if texto.startswith(prefixo):
+                        codigo = texto[len(prefixo):].strip()
+
+                        if not codigo and j + 1 < len(celulas):
+                            codigo = celulas[j + 1].strip()
+
+                        if codigo and codigo != ":":
+                            return codigo.replace('.', '')
+
+    return "Nenhum código encontrado."
+
+
+def gerar_documento(sorteio, quantidade_blocos):
+    """
+    Gera o conteúdo de um documento longo sem código no corpo: blocos de texto comum
+    intercalados com prefixos sem código seguidos de muitos parágrafos vazios e ":"
+    (o pior caso da busca para frente). O código fica em uma tabela ou, às vezes, no
+    último parágrafo.
+
+    Returns:
+        tuple: (textos dos parágrafos, tabelas como listas de linhas de textos)
+    """
+    paragrafos = []
+    for _ in range(quantidade_blocos):
+        if sorteio.random() < 0.5:
+            paragrafos.append(sorteio.choice(["Procedimento de análise", "Resultado conforme", "Descrição"]))
+            continue
+        paragrafos.append(sorteio.choice(["CÓDIGO", "CÓDIGO DO MATERIAL", "Código:"]))
+        paragrafos.extend(sorteio.choice(["", " "]) for _ in range(sorteio.randint(50, 300)))
+        paragrafos.append(":")
+    if sorteio.random() < 0.2:
+        paragrafos.append(f"{sorteio.choice(PREFIXOS)} {sorteio.randint(1000, 99999)}.{sorteio.randint(0, 9)}")
+
+    tabelas = [
+        [
+            [sorteio.choice(["", "Descrição", "CÓDIGO", f"Código: {sorteio.randint(1, 9999)}", str(sorteio.randint(1, 9999))])
+             for _ in range(4)]
+            for _ in range(sorteio.randint(1, 30))
+        ]
+        for _ in range(sorteio.randint(0, 3))
+    ]
+    return paragrafos, tabelas
+
+
+def _conteudo_docx(caminho_arquivo):
+    documento = abrir_documento(caminho_arquivo)
+    paragrafos = [paragrafo.text for paragrafo in documento.paragraphs]
+    tabelas = [[[celula.text for celula in linha.cells] for linha in tabela.rows] for tabela in documento.tables]
+    return paragrafos, tabelas
+
+
+def _medir(funcao, documentos):
+    inicio = time.perf_counter()
+    resultados = [funcao(paragrafos, tabelas, PREFIXOS) for paragrafos, tabelas in documentos]
+    return resultados, (time.perf_counter() - inicio) * 1000
+
+
+def executar(documentos, descricao):
+    anteriores, tempo_anterior = _medir(_buscar_codigo_documento_anterior, documentos)
+    atuais, tempo_atual = _medir(_buscar_codigo_documento, documentos)
+    divergencias = sum(1 for anterior, atual in zip(anteriores, atuais) if anterior != atual)
+
+    print(f"{descricao}: {len(documentos)} documento(s)")
+    print(f"  regra anterior: {tempo_anterior:.1f} ms")
+    print(f"  regra atual:    {tempo_atual:.1f} ms ({tempo_anterior / max(tempo_atual, 1e-6):.1f}x)")
+    print(f"  divergências:   {divergencias}")
+    return divergencias
+
+
+def main():
+    sorteio = random.Random(0)
+    documentos = [gerar_documento(sorteio, sorteio.choice([20, 100, 300])) for _ in range(60)]
+    divergencias = executar(documentos, "Documentos gerados")
+
+    if len(sys.argv) > 1:
+        pasta = sys.argv[1]
+        arquivos = [os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.lower().endswith(".docx")]
+        divergencias += executar([_conteudo_docx(arquivo) for arquivo in arquivos], pasta)
+
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark do pool de conversores (ConverterPool) com o backend simulado.
+
+Compara o fluxo anterior (uma instância do Office iniciada e encerrada a cada
+arquivo) com o pool de conversores de longa duração, e verifica o timeout e a
+reciclagem dos trabalhadores. Roda em qualquer sistema operacional, sem Office.
+
+Uso:
+    python -m src.utils.benchmark_conversao [quantidade_arquivos] [trabalhadores]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from src.utils.document_converter import (
+    FORMATO_DOCX,
+    ConversaoTimeout,
+    ConverterPool,
+    FakeConverterBackend,
+)
+from src.utils.logger import initialize_logger
+
+TEMPO_ABERTURA = 0.2
+TEMPO_CONVERSAO = 0.01
+
+
+def _fabrica():
+    return FakeConverterBackend(tempo_abertura=TEMPO_ABERTURA, tempo_conversao=TEMPO_CONVERSAO)
+
+
+def _gerar_arquivos(pasta, quantidade):
+    arquivos = []
+    for i in range(quantidade):
+        caminho = os.path.join(pasta, f"documento_{i}.doc")
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(os.urandom(1024))
+        arquivos.append(caminho)
+    return arquivos
+
+
+def converter_um_por_arquivo(arquivos):
+    """Fluxo anterior: abre e fecha o backend a cada arquivo."""
+    for caminho in arquivos:
+        backend = _fabrica()
+        backend.abrir()
+        try:
+            backend.converter(caminho, f"{caminho}x", FORMATO_DOCX)
+        finally:
+            backend.fechar()
+
+
+def converter_com_pool(arquivos, trabalhadores):
+    with ConverterPool(_fabrica, trabalhadores=trabalhadores, timeout=30, reciclar_apos=25) as pool:
+        futuros = [pool.submeter(caminho, f"{caminho}x", FORMATO_DOCX) for caminho in arquivos]
+        for futuro in futuros:
+            futuro.result()
+        return pool.estatisticas()
+
+
+def verificar_timeout(pasta):
+    """
+    Uma conversão travada expira, o backend do trabalhador é encerrado e o trabalhador
+    é substituído sem bloquear a fila.
+    """
+    caminho_travado = os.path.join(pasta, "travar.doc")
+    caminho_normal = os.path.join(pasta, "normal.doc")
+    for caminho in (caminho_travado, caminho_normal):
+        open(caminho, "wb").close()
+
+    backends = []
+
+    def fabrica():
+        backends.append(FakeConverterBackend(tempo_abertura=0, tempo_conversao=0, tempo_travamento=2))
+        return backends[-1]
+
+    with ConverterPool(fabrica, trabalhadores=1, timeout=0.5, reciclar_apos=10) as pool:
+        travado = pool.submeter(caminho_travado, f"{caminho_travado}x", FORMATO_DOCX)
+        normal = pool.submeter(caminho_normal, f"{caminho_normal}x", FORMATO_DOCX)
+        try:
+            travado.result()
+            expirou = False
+        except ConversaoTimeout:
+            expirou = True
+        normal.result(timeout=5)
+        return expirou and pool.estatisticas()["expiradas"] == 1 and backends[0].encerrado.is_set()
+
+
+def main():
+    initialize_logger()
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    trabalhadores = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivos = _gerar_arquivos(pasta, quantidade)
+
+        inicio = time.perf_counter()
+        converter_um_por_arquivo(arquivos)
+        tempo_anterior = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        estatisticas = converter_com_pool(arquivos, trabalhadores)
+        tempo_pool = time.perf_counter() - inicio
+
+        timeout_ok = verificar_timeout(pasta)
+
+    print(f"Conversões simuladas: {quantidade} arquivo(s), abertura {TEMPO_ABERTURA * 1000:.0f} ms, conversão {TEMPO_CONVERSAO * 1000:.0f} ms")
+    print(f"  uma instância por arquivo: {tempo_anterior * 1000:.0f} ms")
+    print(f"  pool ({trabalhadores} trabalhador(es)): {tempo_pool * 1000:.0f} ms ({tempo_anterior / max(tempo_pool, 1e-6):.1f}x)")
+    print(f"  aberturas: {estatisticas['aberturas']}, reciclagens: {estatisticas['reciclagens']}")
+    print(f"  timeout: {'ok' if timeout_ok else 'FALHOU'}")
+    return 0 if timeout_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
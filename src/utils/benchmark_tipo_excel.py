@@ -0,0 +1,145 @@
+"""
+Benchmark da classificação de planilhas Excel (verify_excel_type).
+
+Compara a leitura anterior (pd.read_excel da aba inteira e até duas cargas completas
+com load_workbook para o rodapé e o cabeçalho) com classificar_excel (uma única
+carga em modo somente leitura) sobre planilhas geradas de todos os tipos e,
+opcionalmente, sobre os .xlsx de uma pasta. Os dois resultados precisam ser idênticos.
+
+Uso:
+    python -m src.utils.benchmark_tipo_excel [pasta_com_xlsx]
+"""
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from src.utils.verify_excel_type import classificar_excel
+
+
+def _verify_excel_type_anterior(file_path):
+    """Classificação anterior, mantida apenas como referência para o benchmark."""
+    try:
+        df = pd.read_excel(file_path, header=None)
+
+        cell_title_position_1 = df.at[1, 0]
+        if isinstance(cell_title_position_1, str):
+            if "LISTA DE" in cell_title_position_1:
+                return "TYPE_A"
+            elif "DADOS FORNECEDOR" in cell_title_position_1:
+                return "TYPE_B"
+
+        for value in df[0]:
+            if isinstance(value, str) and "revisão" in value.lower():
+                return "TYPE_REVISION"
+
+        wb = load_workbook(file_path)
+        sheet = wb.active
+        rodape_esquerdo = str(sheet.oddFooter.left.text) if sheet.oddFooter.left.text else ""
+        if re.search(r"(Revisão\s+)(\d+)", rodape_esquerdo):
+            return "TYPE_REVISION"
+
+        cell_title_position_2 = df.at[0, 1]
+        if isinstance(cell_title_position_2, str):
+            if "PLANILHA DE CÁLCULOS" in cell_title_position_2:
+                return "TYPE_C"
+
+        wb = load_workbook(file_path)
+        sheet = wb.active
+        cabecalhos = [str(c).strip() for c in [sheet.oddHeader, sheet.evenHeader, sheet.firstHeader] if c]
+        if any("FICHA DE CÁLCULOS" in c for c in cabecalhos):
+            return "TYPE_D"
+
+        return "INVALID_TYPE"
+    except Exception:
+        return None
+
+
+def _classificar_atual(file_path):
+    try:
+        return classificar_excel(file_path)
+    except Exception:
+        return None
+
+
+def gerar_planilha(sorteio, caminho, linhas):
+    """
+    Gera uma planilha com células, rodapé e cabeçalho sorteados entre os textos que
+    definem cada tipo, incluindo planilhas com uma única linha ou coluna.
+    """
+    wb = Workbook()
+    planilha = wb.active
+    largura = sorteio.choice([1, 2, 6])
+    quantidade = sorteio.choice([1, 2, linhas])
+
+    for linha in range(1, quantidade + 1):
+        for coluna in range(1, largura + 1):
+            if sorteio.random() < 0.7:
+                planilha.cell(linha, coluna, f"valor {linha}.{coluna}" if sorteio.random() < 0.8 else linha * coluna)
+
+    textos = ["", "LISTA DE FORNECEDORES", "DADOS FORNECEDOR", "Revisão 02", "Observação"]
+    if quantidade >= 2:
+        planilha.cell(2, 1, sorteio.choice(textos) or None)
+    if sorteio.random() < 0.3:
+        planilha.cell(sorteio.randint(1, quantidade), 1, "Histórico de REVISÃO")
+    if largura >= 2 and sorteio.random() < 0.4:
+        planilha.cell(1, 2, "PLANILHA DE CÁLCULOS - LOTE")
+    if sorteio.random() < 0.3:
+        planilha.oddFooter.left.text = f"Revisão {sorteio.randint(0, 20):02}"
+    if sorteio.random() < 0.3:
+        getattr(planilha, sorteio.choice(["oddHeader", "evenHeader", "firstHeader"])).center.text = "FICHA DE CÁLCULOS"
+    if sorteio.random() < 0.2:
+        wb.create_sheet("Segunda").cell(2, 1, "LISTA DE")
+        wb.active = sorteio.choice([0, 1])
+    wb.save(caminho)
+
+
+def _medir(funcao, arquivos):
+    inicio = time.perf_counter()
+    resultados = [funcao(arquivo) for arquivo in arquivos]
+    return resultados, (time.perf_counter() - inicio) * 1000
+
+
+def executar(arquivos, descricao):
+    anteriores, tempo_anterior = _medir(_verify_excel_type_anterior, arquivos)
+    atuais, tempo_atual = _medir(_classificar_atual, arquivos)
+    divergencias = [
+        (os.path.basename(arquivo), anterior, atual)
+        for arquivo, anterior, atual in zip(arquivos, anteriores, atuais)
+        if anterior != atual
+    ]
+
+    print(f"{descricao}: {len(arquivos)} planilha(s)")
+    print(f"  leitura anterior: {tempo_anterior:.0f} ms")
+    print(f"  leitura única:    {tempo_atual:.0f} ms ({tempo_anterior / max(tempo_atual, 1e-6):.1f}x)")
+    print(f"  divergências:     {len(divergencias)}")
+    for divergencia in divergencias[:10]:
+        print(f"    {divergencia}")
+    return len(divergencias)
+
+
+def main():
+    sorteio = random.Random(0)
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivos = []
+        for i in range(80):
+            caminho = os.path.join(pasta, f"planilha_{i}.xlsx")
+            gerar_planilha(sorteio, caminho, sorteio.choice([20, 500, 3000]))
+            arquivos.append(caminho)
+        divergencias = executar(arquivos, "Planilhas geradas")
+
+    if len(sys.argv) > 1:
+        pasta = sys.argv[1]
+        arquivos = [os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.lower().endswith(".xlsx")]
+        divergencias += executar(arquivos, pasta)
+
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+from collections import deque
+
+
+def _e_limite(texto, posicao):
+    """Verifica se a posição está fora do texto ou não é um caractere de palavra (equivalente a \\b)."""
+    if posicao < 0 or posicao >= len(texto):
+        return True
+    caractere = texto[posicao]
+    return not (caractere.isalnum() or caractere == "_")
+
+
+class CodeScanner:
+    """
+    Localizador de múltiplos códigos (Aho-Corasick) em texto.
+
+    O autômato é construído uma única vez a partir dos códigos procurados e encontra
+    todas as ocorrências em uma única passada linear sobre o texto, independentemente
+    da quantidade de códigos procurados.
+    """
+
+    def __init__(self, codigos, palavra_inteira=True):
+        """
+        Args:
+            codigos (iterable): Códigos a procurar.
+            palavra_inteira (bool, optional): Se False, aceita ocorrências em qualquer posição
+                do texto (busca por substring), sem tratar zeros à esquerda.
+        """
+        self._palavra_inteira = palavra_inteira
+        self._transicoes = [{}]
+        self._falha = [0]
+        self._saidas = [()]
+
+        # Monta a trie com todos os códigos
+        for codigo in codigos:
+            codigo = str(codigo)
+            if not codigo:
+                continue
+            estado = 0
+            for caractere in codigo:
+                proximo = self._transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self._transicoes)
+                    self._transicoes[estado][caractere] = proximo
+                    self._transicoes.append({})
+                    self._falha.append(0)
+                    self._saidas.append(())
+                estado = proximo
+            self._saidas[estado] = (codigo,)
+
+        # Calcula os links de falha em largura
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falha[proximo]]
+
+    def encontrar(self, texto):
+        """
+        Encontra todos os códigos conhecidos em um texto.
+
+        Com palavra_inteira (padrão), só são aceitas ocorrências delimitadas como
+        palavra inteira, para que um código não seja encontrado dentro de um número
+        maior. Zeros à esquerda de códigos numéricos são incluídos na ocorrência, já
+        que os códigos do índice DE-PARA são normalizados sem eles.
+
+        Args:
+            texto (str): Texto a ser varrido.
+
+        Returns:
+            list: Lista de tuplas (início, fim, código).
+        """
+        ocorrencias = []
+        estado = 0
+        transicoes = self._transicoes
+        for posicao, caractere in enumerate(texto):
+            while estado and caractere not in transicoes[estado]:
+                estado = self._falha[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            for codigo in self._saidas[estado]:
+                inicio = posicao - len(codigo) + 1
+                fim = posicao + 1
+                if not self._palavra_inteira:
+                    ocorrencias.append((inicio, fim, codigo))
+                    continue
+                if codigo.isdigit():
+                    while inicio > 0 and texto[inicio - 1] == "0":
+                        inicio -= 1
+                if _e_limite(texto, inicio - 1) and _e_limite(texto, fim):
+                    ocorrencias.append((inicio, fim, codigo))
+        return ocorrencias
@@ -0,0 +1,522 @@
+import os
+import math
+import time
+import pickle
+import hashlib
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+
+from src.config.config import get_caminho_cache
+from src.utils.logger import ProcessType, get_logger
+from src.utils.read_files_utils import read_excel_file
+
+# Versão do cache local da tabela DE-PARA já processada (ver get_caminho_cache)
+CACHE_VERSAO = 1
+
+# Colunas da planilha DE-PARA (header=2)
+COLUNA_DE = 'Codigo - DE'
+COLUNA_PARA = 'Codigo -  PARA'
+COLUNA_DESCRICAO = 'Descrição Item'
+
+CODIGO_NAO_ENCONTRADO = 'Código não encontrado'
+
+
+def normalizar_codigo(codigo):
+    """
+    Normaliza um código DE para uso como chave de busca.
+
+    Remove espaços, unifica inteiros lidos como float pelo pandas (12345.0 -> "12345")
+    e descarta zeros à esquerda de códigos numéricos ("0012345" -> "12345").
+
+    Args:
+        codigo: Código em qualquer formato (str, int, float).
+
+    Returns:
+        str: Código normalizado, ou "" se o valor for vazio.
+    """
+    if codigo is None:
+        return ""
+    if isinstance(codigo, float):
+        if math.isnan(codigo):
+            return ""
+        if codigo.is_integer():
+            codigo = int(codigo)
+
+    texto = str(codigo).strip()
+    if texto.endswith(".0") and texto[:-2].isdigit():
+        texto = texto[:-2]
+    if texto.isdigit():
+        texto = texto.lstrip("0") or "0"
+    return texto
+
+
+def _formatar_valor(valor):
+    """Converte um valor da planilha em texto, sem o sufixo '.0' de inteiros lidos como float."""
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        if math.isnan(valor):
+            return ""
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor).strip()
+
+
+def _normalizar_serie(codigos):
+    """Chaves de busca de uma Series de códigos DE, normalizando apenas os valores distintos."""
+    valores = codigos.astype(str)
+    unicos = valores.unique()
+    chaves = pd.Series(
+        [normalizar_codigo(valor.strip().split(" ")[0]) for valor in unicos],
+        index=unicos,
+        dtype=object,
+    )
+    return valores.map(chaves)
+
+
+class DeParaIndex:
+    """
+    Índice em memória da tabela DE-PARA.
+
+    Construído uma única vez a partir do DataFrame retornado por read_excel_file,
+    oferece busca O(1) de código DE -> (código PARA, descrição).
+    """
+
+    def __init__(self, mapa=None):
+        """
+        Args:
+            mapa (dict, optional): Dicionário {código DE normalizado: (código PARA, descrição)}.
+        """
+        self._mapa = dict(mapa or {})
+        self._tabela = None
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Constrói o índice a partir do DataFrame da planilha DE-PARA.
+
+        Em caso de códigos DE repetidos, prevalece a primeira ocorrência,
+        como na busca original com df.loc[...].iloc[0].
+
+        Args:
+            df (pd.DataFrame): DataFrame com as colunas 'Codigo - DE' e 'Codigo -  PARA'.
+
+        Returns:
+            DeParaIndex: Índice pronto para consultas.
+        """
+        if df is None or df.empty:
+            return cls()
+
+        coluna_descricao = COLUNA_DESCRICAO if COLUNA_DESCRICAO in df.columns else df.columns[-1]
+
+        mapa = {}
+        for codigo_de, codigo_para, descricao in zip(df[COLUNA_DE], df[COLUNA_PARA], df[coluna_descricao]):
+            chave = normalizar_codigo(codigo_de)
+            if chave and chave not in mapa:
+                mapa[chave] = (_formatar_valor(codigo_para), _formatar_valor(descricao))
+        return cls(mapa)
+
+    def buscar(self, codigo):
+        """
+        Busca um código DE no índice.
+
+        Args:
+            codigo: Código DE em qualquer formato.
+
+        Returns:
+            tuple: (código PARA, descrição) ou None se o código não existir.
+        """
+        return self._mapa.get(normalizar_codigo(codigo))
+
+    def codigo_para(self, codigo, padrao=CODIGO_NAO_ENCONTRADO):
+        """Retorna o código PARA correspondente ou `padrao` se não encontrado."""
+        resultado = self.buscar(codigo)
+        return resultado[0] if resultado else padrao
+
+    def descricao(self, codigo, padrao=""):
+        """Retorna a descrição do item correspondente ou `padrao` se não encontrado."""
+        resultado = self.buscar(codigo)
+        return resultado[1] if resultado else padrao
+
+    def traduzir_serie(self, codigos):
+        """
+        Traduz uma Series de códigos DE de forma vetorizada.
+
+        Cada valor é normalizado como em buscar() (considerando apenas o texto antes
+        do primeiro espaço) e cruzado com a tabela em uma única operação map. A
+        normalização é feita apenas sobre os valores distintos da Series.
+
+        Args:
+            codigos (pd.Series): Códigos DE a traduzir.
+
+        Returns:
+            tuple: (Series com o código PARA, Series com a descrição), alinhadas ao
+                índice de `codigos`. Códigos não encontrados resultam em NaN.
+        """
+        if self._tabela is None:
+            self._tabela = pd.DataFrame.from_dict(self._mapa, orient="index", columns=["para", "descricao"])
+
+        chaves = _normalizar_serie(codigos)
+        return chaves.map(self._tabela["para"]), chaves.map(self._tabela["descricao"])
+
+    def codigos(self):
+        """Retorna os códigos DE normalizados presentes no índice."""
+        return self._mapa.keys()
+
+    def __contains__(self, codigo):
+        return normalizar_codigo(codigo) in self._mapa
+
+    def __len__(self):
+        return len(self._mapa)
+
+
+# Formato do arquivo compacto: cabeçalho, códigos int64 ordenados, 4 offsets uint32 por
+# código (início/fim do código PARA e da descrição no buffer), buffer UTF-8 com os textos
+# internados e, por fim, um JSON com os códigos DE não numéricos.
+COMPACTO_MAGIC = b"DEPARA01"
+COMPACTO_CABECALHO = struct.Struct("<8s32sQqQQQ")
+_MAIOR_CODIGO_COMPACTO = 2 ** 63 - 1
+
+
+class DeParaCompacto(DeParaIndex):
+    """
+    Representação compacta e somente leitura da tabela DE-PARA, mapeada em memória.
+
+    Os códigos numéricos ficam em um vetor int64 ordenado (busca binária) e os textos em
+    um único buffer, sem objetos Python por registro. Como o arquivo é aberto com mmap,
+    vários processos de trabalho compartilham as mesmas páginas de memória.
+
+    Nenhuma operação materializa a tabela inteira: traduzir_serie busca os códigos
+    distintos da Series no vetor com numpy.
+    """
+
+    def __init__(self, caminho_arquivo):
+        """
+        Args:
+            caminho_arquivo (str): Caminho do arquivo gerado por exportar_compacto.
+        """
+        super().__init__()
+        with open(caminho_arquivo, "rb") as arquivo:
+            self._mm = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, sha256, tamanho, mtime, quantidade, tamanho_buffer, tamanho_extra) = \
+            COMPACTO_CABECALHO.unpack_from(self._mm, 0)
+        if magic != COMPACTO_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Arquivo DE-PARA compacto inválido: {caminho_arquivo}")
+
+        self.impressao_digital = {"tamanho": tamanho, "mtime": mtime, "sha256": sha256.hex()}
+
+        dados = memoryview(self._mm)
+        inicio = COMPACTO_CABECALHO.size
+        self._codigos = dados[inicio:inicio + 8 * quantidade].cast("q")
+        self._vetor_codigos = np.frombuffer(self._mm, dtype="<i8", count=quantidade, offset=inicio)
+        inicio += 8 * quantidade
+        self._offsets = dados[inicio:inicio + 16 * quantidade].cast("I")
+        inicio += 16 * quantidade
+        self._buffer = dados[inicio:inicio + tamanho_buffer]
+        inicio += tamanho_buffer
+        self._extras = json.loads(bytes(dados[inicio:inicio + tamanho_extra]).decode("utf-8"))
+
+    def _registro(self, posicao):
+        base = 4 * posicao
+        para_inicio, para_fim, descricao_inicio, descricao_fim = self._offsets[base:base + 4]
+        return (
+            str(self._buffer[para_inicio:para_fim], "utf-8"),
+            str(self._buffer[descricao_inicio:descricao_fim], "utf-8"),
+        )
+
+    def buscar(self, codigo):
+        chave = normalizar_codigo(codigo)
+        if chave.isdigit() and int(chave) <= _MAIOR_CODIGO_COMPACTO:
+            numero = int(chave)
+            posicao = bisect_left(self._codigos, numero)
+            if posicao < len(self._codigos) and self._codigos[posicao] == numero:
+                return self._registro(posicao)
+            return None
+        resultado = self._extras.get(chave)
+        return tuple(resultado) if resultado else None
+
+    def traduzir_serie(self, codigos):
+        chaves = _normalizar_serie(codigos)
+        unicas = pd.Series(chaves.unique(), dtype=object)
+
+        # Códigos numéricos: busca binária de todas as chaves distintas de uma vez
+        numericas = unicas[unicas.str.fullmatch(r"[0-9]{1,19}", na=False)]
+        numeros = numericas.astype("uint64")
+        numericas = numericas[numeros <= _MAIOR_CODIGO_COMPACTO]
+        numeros = numeros[numeros <= _MAIOR_CODIGO_COMPACTO].to_numpy(dtype="int64")
+        posicoes = np.searchsorted(self._vetor_codigos, numeros)
+        encontradas = posicoes < len(self._vetor_codigos)
+        encontradas[encontradas] = self._vetor_codigos[posicoes[encontradas]] == numeros[encontradas]
+
+        # Só os registros encontrados são decodificados do buffer
+        registros = {chave: self._registro(posicao) for chave, posicao in zip(numericas[encontradas], posicoes[encontradas])}
+        registros.update((chave, tuple(self._extras[chave])) for chave in unicas if chave in self._extras)
+
+        tabela = pd.DataFrame.from_dict(registros, orient="index", columns=["para", "descricao"])
+        return chaves.map(tabela["para"]), chaves.map(tabela["descricao"])
+
+    def codigos(self):
+        """Itera sobre os códigos DE normalizados, sem montar a lista completa."""
+        for codigo in self._codigos:
+            yield str(codigo)
+        yield from self._extras
+
+    def __contains__(self, codigo):
+        return self.buscar(codigo) is not None
+
+    def __len__(self):
+        return len(self._codigos) + len(self._extras)
+
+
+def exportar_compacto(indice, caminho_arquivo, impressao_digital):
+    """
+    Grava um DeParaIndex no formato compacto lido por DeParaCompacto.
+
+    Args:
+        indice (DeParaIndex): Índice a ser exportado.
+        caminho_arquivo (str): Caminho do arquivo de destino.
+        impressao_digital (dict): Impressão digital da planilha de origem.
+    """
+    numericos = []
+    extras = {}
+    for codigo in indice.codigos():
+        if codigo.isdigit() and int(codigo) <= _MAIOR_CODIGO_COMPACTO:
+            numericos.append((int(codigo), codigo))
+        else:
+            extras[codigo] = list(indice.buscar(codigo))
+    numericos.sort()
+
+    # Textos repetidos (códigos PARA, descrições) são gravados uma única vez no buffer
+    buffer = bytearray()
+    internados = {}
+    offsets = array("I")
+
+    def internar(texto):
+        if texto not in internados:
+            dados = texto.encode("utf-8")
+            internados[texto] = (len(buffer), len(buffer) + len(dados))
+            buffer.extend(dados)
+        return internados[texto]
+
+    for _, codigo in numericos:
+        codigo_para, descricao = indice.buscar(codigo)
+        offsets.extend(internar(codigo_para))
+        offsets.extend(internar(descricao))
+
+    extra = json.dumps(extras, ensure_ascii=False).encode("utf-8")
+    cabecalho = COMPACTO_CABECALHO.pack(
+        COMPACTO_MAGIC,
+        bytes.fromhex(impressao_digital["sha256"]),
+        impressao_digital["tamanho"],
+        impressao_digital["mtime"],
+        len(numericos),
+        len(buffer),
+        len(extra),
+    )
+
+    os.makedirs(os.path.dirname(caminho_arquivo) or ".", exist_ok=True)
+    caminho_temporario = f"{caminho_arquivo}.tmp"
+    with open(caminho_temporario, "wb") as arquivo:
+        arquivo.write(cabecalho)
+        arquivo.write(array("q", (numero for numero, _ in numericos)).tobytes())
+        arquivo.write(offsets.tobytes())
+        arquivo.write(buffer)
+        arquivo.write(extra)
+    os.replace(caminho_temporario, caminho_arquivo)
+
+
+def calcular_impressao_digital(caminho_arquivo, referencia=None):
+    """
+    Calcula a impressão digital de um arquivo (tamanho, data de modificação e SHA-256).
+
+    Se o tamanho e a data de modificação forem os da impressão digital de referência
+    (ex.: a gravada no cache ou na última sincronização), o arquivo não mudou e a
+    referência é retornada sem ler o arquivo para calcular o SHA-256.
+
+    Args:
+        caminho_arquivo (str): Caminho do arquivo.
+        referencia (dict, optional): Impressão digital calculada anteriormente.
+
+    Returns:
+        dict: {'tamanho': int, 'mtime': int, 'sha256': str}
+    """
+    estatisticas = os.stat(caminho_arquivo)
+    if referencia and referencia.get("sha256") and (referencia.get("tamanho"), referencia.get("mtime")) == (
+        estatisticas.st_size, estatisticas.st_mtime_ns
+    ):
+        return {"tamanho": estatisticas.st_size, "mtime": estatisticas.st_mtime_ns, "sha256": referencia["sha256"]}
+
+    sha256 = hashlib.sha256()
+    with open(caminho_arquivo, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha256.update(bloco)
+
+    return {
+        "tamanho": estatisticas.st_size,
+        "mtime": estatisticas.st_mtime_ns,
+        "sha256": sha256.hexdigest(),
+    }
+
+
+def _caminho_cache(caminho_arquivo, diretorio_cache, extensao="pkl"):
+    """Nome do arquivo de cache derivado do caminho absoluto da planilha de origem."""
+    chave = hashlib.sha1(os.path.abspath(caminho_arquivo).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(diretorio_cache, f"de_para_{chave}.{extensao}")
+
+
+def _abrir_compacto(caminho_compacto):
+    """Abre o arquivo compacto, ou retorna None se ele não existir ou for inválido."""
+    try:
+        return DeParaCompacto(caminho_compacto)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _ler_cache(caminho_cache):
+    try:
+        with open(caminho_cache, "rb") as arquivo:
+            conteudo = pickle.load(arquivo)
+        if conteudo.get("versao") != CACHE_VERSAO:
+            return None
+        return conteudo
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+
+
+def _gravar_cache(caminho_cache, impressao_digital, indice):
+    os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+    caminho_temporario = f"{caminho_cache}.tmp"
+    with open(caminho_temporario, "wb") as arquivo:
+        pickle.dump(
+            {"versao": CACHE_VERSAO, "impressao_digital": impressao_digital, "mapa": indice._mapa},
+            arquivo,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(caminho_temporario, caminho_cache)
+
+
+def carregar_de_para(caminho_arquivo, diretorio_cache=None, compacto=False, com_anterior=False, impressao_digital=None):
+    """
+    Carrega a tabela DE-PARA usando um cache binário local.
+
+    O cache é invalidado quando o tamanho, a data de modificação ou o SHA-256 da
+    planilha de origem mudam; o SHA-256 só é calculado se o tamanho ou a data de
+    modificação diferirem dos do cache. Em caso de falha na leitura do cache, a
+    planilha é lida normalmente com read_excel_file.
+
+    Args:
+        caminho_arquivo (str): Caminho da planilha DE-PARA.
+        diretorio_cache (str, optional): Diretório onde o cache é armazenado. Padrão: get_caminho_cache().
+        compacto (bool, optional): Se True, retorna um DeParaCompacto mapeado em memória,
+            compartilhável entre processos de trabalho.
+        com_anterior (bool, optional): Se True, retorna também a versão guardada no cache
+            quando a planilha mudou (ver ler_de_para_anterior), com uma única leitura do
+            cache e um único cálculo da impressão digital.
+        impressao_digital (dict, optional): Impressão digital da planilha já calculada pelo
+            chamador (ver calcular_impressao_digital), para não ler a planilha de novo.
+
+    Returns:
+        DeParaIndex: Índice da tabela DE-PARA, ou None se a planilha não puder ser lida.
+            Com com_anterior, a tupla (índice, tabela anterior ou None).
+    """
+    logger = get_logger()
+    inicio = time.perf_counter()
+
+    diretorio_cache = diretorio_cache or get_caminho_cache()
+    caminho_cache = _caminho_cache(caminho_arquivo, diretorio_cache)
+    caminho_compacto = _caminho_cache(caminho_arquivo, diretorio_cache, "bin")
+
+    def resultado(indice, anterior=None):
+        return (indice, anterior) if com_anterior else indice
+
+    if compacto:
+        indice = _abrir_compacto(caminho_compacto)
+        if indice is not None:
+            impressao_digital = impressao_digital or calcular_impressao_digital(caminho_arquivo, indice.impressao_digital)
+            if indice.impressao_digital == impressao_digital:
+                tempo_ms = (time.perf_counter() - inicio) * 1000
+                logger.info(f"Cache DE-PARA compacto: HIT ({len(indice)} códigos mapeados em {tempo_ms:.1f} ms)", ProcessType.DATABASE)
+                return resultado(indice)
+
+    conteudo = _ler_cache(caminho_cache)
+    impressao_digital = impressao_digital or calcular_impressao_digital(
+        caminho_arquivo, conteudo["impressao_digital"] if conteudo else None
+    )
+    anterior = None
+    if conteudo and conteudo["impressao_digital"] == impressao_digital:
+        indice = DeParaIndex(conteudo["mapa"])
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        logger.info(f"Cache DE-PARA: HIT ({len(indice)} códigos carregados em {tempo_ms:.1f} ms)", ProcessType.DATABASE)
+    else:
+        motivo = "arquivo alterado" if conteudo else "cache inexistente"
+        if conteudo and com_anterior:
+            anterior = DeParaIndex(conteudo["mapa"])
+        df = read_excel_file(caminho_arquivo)
+        if df is None:
+            return resultado(None)
+
+        indice = DeParaIndex.from_dataframe(df)
+        try:
+            _gravar_cache(caminho_cache, impressao_digital, indice)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o cache DE-PARA: {e}", ProcessType.FILE)
+
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        logger.info(f"Cache DE-PARA: MISS - {motivo} ({len(indice)} códigos carregados em {tempo_ms:.1f} ms)", ProcessType.DATABASE)
+
+    if compacto:
+        try:
+            exportar_compacto(indice, caminho_compacto, impressao_digital)
+            return resultado(DeParaCompacto(caminho_compacto), anterior)
+        except OSError as e:
+            # No Windows o arquivo não pode ser substituído enquanto outro processo o mapeia
+            logger.warning(f"Não foi possível gravar o cache DE-PARA compacto: {e}", ProcessType.FILE)
+
+    return resultado(indice, anterior)
+
+
+def ler_de_para_anterior(caminho_arquivo, diretorio_cache=None):
+    """
+    Retorna a versão da tabela DE-PARA guardada no cache local, se a planilha mudou desde então.
+
+    Deve ser chamada antes de carregar_de_para, que sobrescreve o cache com a versão atual.
+
+    Args:
+        caminho_arquivo (str): Caminho da planilha DE-PARA.
+        diretorio_cache (str, optional): Diretório onde o cache é armazenado. Padrão: get_caminho_cache().
+
+    Returns:
+        DeParaIndex: Tabela anterior, ou None se não houver cache ou se a planilha não mudou.
+    """
+    conteudo = _ler_cache(_caminho_cache(caminho_arquivo, diretorio_cache or get_caminho_cache()))
+    if not conteudo or conteudo["impressao_digital"] == calcular_impressao_digital(caminho_arquivo, conteudo["impressao_digital"]):
+        return None
+    return DeParaIndex(conteudo["mapa"])
+
+
+def comparar_de_para(antigo, novo):
+    """
+    Compara duas versões da tabela DE-PARA.
+
+    Args:
+        antigo (DeParaIndex): Versão anterior da tabela.
+        novo (DeParaIndex): Versão atual da tabela.
+
+    Returns:
+        set: Códigos DE normalizados incluídos, removidos ou com código PARA/descrição alterados.
+    """
+    codigos_antigos = set(antigo.codigos())
+    codigos_novos = set(novo.codigos())
+
+    alterados = codigos_antigos ^ codigos_novos
+    for codigo in codigos_antigos & codigos_novos:
+        if antigo.buscar(codigo) != novo.buscar(codigo):
+            alterados.add(codigo)
+    return alterados
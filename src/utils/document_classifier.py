@@ -0,0 +1,136 @@
+import os
+import re
+import unicodedata
+from functools import lru_cache
+import pandas as pd
+
+from src.utils.code_scanner import CodeScanner
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, '..')
+
+# Tabela CATEGORIA / TIPO DE ARQUIVO mantida pela Garantia da Qualidade
+CAMINHO_CATEGORIAS = os.path.join(src_dir, 'config', 'BLANVER_DE_PARA_CATEGORIA.xlsx')
+COLUNA_CATEGORIA = 'CATEGORIA'
+COLUNA_TIPO_ARQUIVO = 'TIPO DE ARQUIVO'
+
+# Precedência entre os títulos quando o cabeçalho contém mais de um, a mesma da
+# antiga cadeia de if/elif: ficha, instruções, especificações e, por último, métodos
+# (incluindo "METODOLOGIA")
+ORDEM_TITULOS = ("FICHA DE ANALISE", "INSTRUCAO", "ESPECIFICACAO", "METODO")
+FICHA_DE_ANALISE = "FICHA DE ANÁLISE"
+
+
+def normalizar_titulo(texto):
+    """
+    Normaliza um texto para comparação: sem acentos, em maiúsculas e com os espaços
+    (incluindo quebras de linha e tabulações) reduzidos a um único espaço.
+    """
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    sem_acentos = "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return re.sub(r"\s+", " ", sem_acentos).strip().upper()
+
+
+def _grupo_titulo(titulo_normalizado):
+    for posicao, inicio in enumerate(ORDEM_TITULOS):
+        if titulo_normalizado.startswith(inicio):
+            return posicao
+    return len(ORDEM_TITULOS)
+
+
+def _sigla(categoria, tipo_arquivo):
+    """
+    Sigla do tipo usada pelo processamento (ex.: "EME", "MAPA", "FICHA DE ANÁLISE").
+    Especificações usam a primeira parte da categoria e métodos a segunda
+    (EME-MAME -> EME / MAME), sem o prefixo "PeD_". Categorias sem edição automática
+    (anexos) não têm sigla.
+    """
+    titulo = normalizar_titulo(tipo_arquivo)
+    partes = categoria.replace("PeD_", "").split("-")
+    if titulo.startswith("FICHA DE ANALISE"):
+        return FICHA_DE_ANALISE
+    if titulo.startswith("INSTRUCAO"):
+        return tipo_arquivo
+    if titulo.startswith("ESPECIFICACAO") and len(partes) == 2:
+        return partes[0]
+    if titulo.startswith("METODO") and len(partes) == 2:
+        return partes[1]
+    return None
+
+
+class ClassificadorDocumento:
+    """
+    Classificador de documentos pelo título do cabeçalho.
+
+    Os títulos da tabela de categorias são compilados uma única vez em um autômato
+    (CodeScanner) e o texto do cabeçalho é classificado em uma única passada,
+    independentemente da quantidade de categorias cadastradas.
+    """
+
+    def __init__(self, categorias):
+        """
+        Args:
+            categorias (iterable): Pares (categoria, tipo de arquivo) na ordem da tabela.
+        """
+        self._titulos = {}
+        for ordem, (categoria, tipo_arquivo) in enumerate(categorias):
+            categoria = str(categoria).strip()
+            tipo_arquivo = str(tipo_arquivo).strip()
+            chave = normalizar_titulo(tipo_arquivo)
+            if not chave:
+                continue
+
+            # O mesmo título pode pertencer a várias categorias (ex.: FICHA DE ANÁLISE)
+            titulo = self._titulos.setdefault(chave, {
+                "tipo_arquivo": tipo_arquivo,
+                "categorias": [],
+                "sigla": _sigla(categoria, tipo_arquivo),
+                "prioridade": (_grupo_titulo(chave), ordem),
+            })
+            if categoria not in titulo["categorias"]:
+                titulo["categorias"].append(categoria)
+
+        self._scanner = CodeScanner(self._titulos, palavra_inteira=False)
+
+    @classmethod
+    def from_excel(cls, caminho_arquivo=CAMINHO_CATEGORIAS):
+        """Compila o classificador a partir da planilha CATEGORIA / TIPO DE ARQUIVO."""
+        df = pd.read_excel(caminho_arquivo).dropna(subset=[COLUNA_CATEGORIA, COLUNA_TIPO_ARQUIVO])
+        return cls(zip(df[COLUNA_CATEGORIA], df[COLUNA_TIPO_ARQUIVO]))
+
+    def classificar(self, texto):
+        """
+        Classifica um texto de cabeçalho.
+
+        Quando mais de um título é encontrado, prevalece o de maior precedência
+        (ORDEM_TITULOS e, em seguida, a ordem da tabela). Um título contido em outro
+        mais longo na mesma posição (ex.: FICHA DE ANÁLISE dentro de
+        FICHA DE ANÁLISE - ESTABILIDADE) é descartado.
+
+        Args:
+            texto (str): Texto do cabeçalho.
+
+        Returns:
+            dict: {'categoria', 'categorias', 'tipo_arquivo', 'sigla'} ou None se nenhum título for encontrado.
+        """
+        ocorrencias = self._scanner.encontrar(normalizar_titulo(texto))
+        candidatos = [
+            chave for inicio, fim, chave in ocorrencias
+            if not any(i <= inicio and fim <= f and (f - i) > (fim - inicio) for i, f, _ in ocorrencias)
+        ]
+        if not candidatos:
+            return None
+
+        titulo = self._titulos[min(candidatos, key=lambda chave: self._titulos[chave]["prioridade"])]
+        return {
+            "categoria": titulo["categorias"][0],
+            "categorias": tuple(titulo["categorias"]),
+            "tipo_arquivo": titulo["tipo_arquivo"],
+            "sigla": titulo["sigla"],
+        }
+
+
+@lru_cache(maxsize=None)
+def carregar_classificador(caminho_arquivo=CAMINHO_CATEGORIAS):
+    """Retorna o classificador da planilha de categorias, compilado na primeira chamada."""
+    return ClassificadorDocumento.from_excel(caminho_arquivo)
@@ -0,0 +1,436 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import shutil
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, '..')
+sys.path.append(src_dir)
+
+from src.utils.logger import ProcessType, get_logger
+
+# Formatos de saída: (aplicação do Office, FileFormat do SaveAs)
+FORMATO_DOCX = ("Word", 16)
+FORMATO_DOC = ("Word", 0)
+FORMATO_XLSX = ("Excel", 51)
+
+TIMEOUT_CONVERSAO = 300  # segundos por conversão
+RECICLAR_APOS = 50  # conversões por instância do Office
+
+
+class ConversaoTimeout(TimeoutError):
+    """A conversão não terminou dentro do prazo; a instância do Office que a executava foi descartada."""
+
+
+class ConverterBackend:
+    """
+    Backend de conversão usado pelos trabalhadores do ConverterPool.
+
+    abrir, converter e fechar são sempre chamados na thread do trabalhador que criou o
+    backend, o que permite manter objetos COM (que pertencem à thread) entre conversões.
+    """
+
+    def abrir(self):
+        """Prepara o backend (ex.: inicia as aplicações do Office)."""
+
+    def converter(self, caminho_entrada, caminho_saida, formato):
+        """Converte caminho_entrada para caminho_saida no formato informado (ex.: FORMATO_DOCX)."""
+        raise NotImplementedError
+
+    def fechar(self):
+        """Libera os recursos do backend (ex.: encerra as aplicações do Office)."""
+
+    def encerrar(self):
+        """
+        Encerra à força o que o backend iniciou (ex.: os processos do Office).
+
+        Chamado pelo monitor do pool, em outra thread, quando uma conversão excede o
+        prazo; não pode usar os objetos COM, que pertencem à thread do trabalhador.
+        """
+
+
+# Os processos do Office iniciados pelos trabalhadores são identificados pela
+# diferença entre os PIDs existentes antes e depois da criação da instância
+_trava_inicio_office = threading.Lock()
+
+_PROCESSOS_OFFICE = {"Word": "WINWORD.EXE", "Excel": "EXCEL.EXE"}
+
+
+def _pids_processo(nome_processo):
+    import psutil
+
+    pids = set()
+    for processo in psutil.process_iter(["name"]):
+        if (processo.info["name"] or "").upper() == nome_processo:
+            pids.add(processo.pid)
+    return pids
+
+
+def _encerrar_pid(pid):
+    """Encerra o processo, se ainda existir. Retorna True se ele foi encerrado."""
+    import psutil
+
+    try:
+        psutil.Process(pid).kill()
+        return True
+    except psutil.NoSuchProcess:
+        return False
+
+
+class ComConverterBackend(ConverterBackend):
+    """
+    Conversão pelo Word e pelo Excel via COM (win32com).
+
+    Cada aplicação é iniciada na primeira conversão que precisa dela e mantida aberta
+    para as conversões seguintes, até o backend ser fechado ou reciclado. As instâncias
+    são criadas com DispatchEx, que sempre inicia um processo novo: um trabalhador nunca
+    se conecta ao Office de outro trabalhador, ao de uma conversão travada ou ao do
+    usuário. O PID de cada processo é guardado para que ele possa ser encerrado.
+    """
+
+    def __init__(self):
+        self._aplicacoes = {}
+        self._pids = {}
+        self._pythoncom = None
+
+    def abrir(self):
+        import pythoncom
+
+        pythoncom.CoInitialize()
+        self._pythoncom = pythoncom
+
+    def _aplicacao(self, nome):
+        if nome not in self._aplicacoes:
+            import win32com.client as win32
+
+            with _trava_inicio_office:
+                existentes = _pids_processo(_PROCESSOS_OFFICE[nome])
+                aplicacao = win32.DispatchEx(f"{nome}.Application")
+                novos = _pids_processo(_PROCESSOS_OFFICE[nome]) - existentes
+            if nome == "Excel":
+                aplicacao = win32.gencache.EnsureDispatch(aplicacao)
+            aplicacao.DisplayAlerts = False
+            self._aplicacoes[nome] = aplicacao
+
+            pid = self._pid_aplicacao(aplicacao, novos)
+            if pid is not None:
+                self._pids[nome] = pid
+            else:
+                get_logger().warning(f"PID da instância do {nome} não identificado", ProcessType.FILE)
+        return self._aplicacoes[nome]
+
+    @staticmethod
+    def _pid_aplicacao(aplicacao, novos):
+        """PID do processo da instância: pela janela (Excel) ou pelo único processo novo (Word)."""
+        try:
+            import win32process
+
+            return win32process.GetWindowThreadProcessId(aplicacao.Hwnd)[1]
+        except Exception:
+            return next(iter(novos)) if len(novos) == 1 else None
+
+    def converter(self, caminho_entrada, caminho_saida, formato):
+        nome, codigo_formato = formato
+        aplicacao = self._aplicacao(nome)
+        if nome == "Excel":
+            arquivo = aplicacao.Workbooks.Open(caminho_entrada)
+        else:
+            arquivo = aplicacao.Documents.Open(caminho_entrada)
+        try:
+            arquivo.SaveAs(caminho_saida, FileFormat=codigo_formato)
+        finally:
+            arquivo.Close()
+
+    def fechar(self):
+        for nome, aplicacao in self._aplicacoes.items():
+            try:
+                aplicacao.Quit()
+            except Exception as e:
+                get_logger().warning(f"Falha ao encerrar o {nome}: {e}", ProcessType.FILE)
+                if nome in self._pids:
+                    _encerrar_pid(self._pids[nome])
+        self._aplicacoes.clear()
+        self._pids.clear()
+        if self._pythoncom is not None:
+            self._pythoncom.CoUninitialize()
+            self._pythoncom = None
+
+    def encerrar(self):
+        for nome, pid in list(self._pids.items()):
+            if _encerrar_pid(pid):
+                get_logger().warning(f"Processo do {nome} (PID {pid}) encerrado", ProcessType.FILE)
+
+
+class FakeConverterBackend(ConverterBackend):
+    """
+    Backend sem Office, para testar e medir o pool em qualquer sistema operacional.
+
+    Simula o custo de iniciar a aplicação (tempo_abertura) e o de cada conversão
+    (tempo_conversao) e copia o arquivo de entrada para a saída. Arquivos cujo nome
+    contém "travar" nunca terminam dentro do prazo e os que contêm "falhar" geram erro.
+    Como um processo do Office encerrado, uma conversão travada falha assim que o
+    backend é encerrado.
+    """
+
+    def __init__(self, tempo_abertura=0.5, tempo_conversao=0.01, tempo_travamento=3600):
+        self.tempo_abertura = tempo_abertura
+        self.tempo_conversao = tempo_conversao
+        self.tempo_travamento = tempo_travamento
+        self.aberturas = 0
+        self.conversoes = 0
+        self.encerrado = threading.Event()
+
+    def abrir(self):
+        time.sleep(self.tempo_abertura)
+        self.aberturas += 1
+
+    def encerrar(self):
+        self.encerrado.set()
+
+    def converter(self, caminho_entrada, caminho_saida, formato):
+        nome = os.path.basename(caminho_entrada)
+        if "travar" in nome and self.encerrado.wait(self.tempo_travamento):
+            raise RuntimeError(f"Conversor encerrado durante a conversão de {nome}")
+        if "falhar" in nome:
+            raise RuntimeError(f"Falha simulada ao converter {nome}")
+        time.sleep(self.tempo_conversao)
+        if os.path.abspath(caminho_entrada) != os.path.abspath(caminho_saida):
+            shutil.copyfile(caminho_entrada, caminho_saida)
+        self.conversoes += 1
+
+
+class _Tarefa:
+    __slots__ = ("caminho_entrada", "caminho_saida", "formato", "futuro", "inicio")
+
+    def __init__(self, caminho_entrada, caminho_saida, formato):
+        self.caminho_entrada = caminho_entrada
+        self.caminho_saida = caminho_saida
+        self.formato = formato
+        self.futuro = Future()
+        self.inicio = None
+
+    def concluir(self, resultado=None, erro=None):
+        """Resolve o futuro, a menos que o monitor ou o trabalhador já o tenha resolvido."""
+        try:
+            if erro is not None:
+                self.futuro.set_exception(erro)
+            else:
+                self.futuro.set_result(resultado)
+        except InvalidStateError:
+            pass
+
+
+class _Trabalhador(threading.Thread):
+    """Thread com um backend próprio que consome a fila de conversões do pool."""
+
+    def __init__(self, pool, numero):
+        super().__init__(name=f"conversor-{numero}", daemon=True)
+        self.pool = pool
+        self.backend = None
+        self.tarefa = None
+        self.conversoes = 0
+        self.descartado = False
+
+    def _abrir_backend(self):
+        self.backend = self.pool.fabrica_backend()
+        self.backend.abrir()
+        self.conversoes = 0
+        self.pool.aberturas += 1
+
+    def _fechar_backend(self):
+        if self.backend is None:
+            return
+        try:
+            self.backend.fechar()
+        except Exception as e:
+            get_logger().warning(f"Falha ao fechar o conversor {self.name}: {e}", ProcessType.FILE)
+        self.backend = None
+
+    def run(self):
+        try:
+            while not self.descartado:
+                tarefa = self.pool._fila.get()
+                if tarefa is None:
+                    break
+                if not tarefa.futuro.set_running_or_notify_cancel():
+                    continue
+                self._executar(tarefa)
+        finally:
+            self._fechar_backend()
+
+    def _executar(self, tarefa):
+        try:
+            if self.backend is None:
+                self._abrir_backend()
+            tarefa.inicio = time.monotonic()
+            self.tarefa = tarefa
+            self.backend.converter(tarefa.caminho_entrada, tarefa.caminho_saida, tarefa.formato)
+        except Exception as e:
+            # Uma instância do Office que falhou pode ficar em estado inconsistente
+            self._fechar_backend()
+            tarefa.concluir(erro=e)
+        else:
+            tarefa.concluir(tarefa.caminho_saida)
+            self.conversoes += 1
+            if self.conversoes >= self.pool.reciclar_apos:
+                self.pool.reciclagens += 1
+                self._fechar_backend()
+        finally:
+            self.tarefa = None
+
+
+class ConverterPool:
+    """
+    Pool de conversores de longa duração alimentado por uma fila.
+
+    Cada trabalhador mantém o seu backend (ex.: uma instância do Word e do Excel)
+    aberto entre as conversões, em vez de iniciar e encerrar o Office a cada arquivo.
+    O backend é reciclado após reciclar_apos conversões ou após um erro. Uma conversão
+    que excede o timeout falha com ConversaoTimeout; o trabalhador que a executava é
+    descartado e substituído, e os processos do seu backend são encerrados (ver
+    ConverterBackend.encerrar), o que também libera a chamada travada.
+    """
+
+    def __init__(self, fabrica_backend=ComConverterBackend, trabalhadores=1, timeout=TIMEOUT_CONVERSAO, reciclar_apos=RECICLAR_APOS):
+        """
+        Args:
+            fabrica_backend (callable): Cria um ConverterBackend para cada trabalhador.
+            trabalhadores (int): Quantidade de conversores simultâneos.
+            timeout (float): Prazo de cada conversão, em segundos, contado a partir do início da execução.
+            reciclar_apos (int): Conversões por backend antes de reabri-lo.
+        """
+        self.fabrica_backend = fabrica_backend
+        self.timeout = timeout
+        self.reciclar_apos = reciclar_apos
+        self.aberturas = 0
+        self.reciclagens = 0
+        self.expiradas = 0
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._fechado = threading.Event()
+        self._numero = 0
+        self._trabalhadores = [self._iniciar_trabalhador() for _ in range(trabalhadores)]
+        self._monitor = threading.Thread(target=self._monitorar, name="conversor-monitor", daemon=True)
+        self._monitor.start()
+
+    def _iniciar_trabalhador(self):
+        self._numero += 1
+        trabalhador = _Trabalhador(self, self._numero)
+        trabalhador.start()
+        return trabalhador
+
+    def _monitorar(self):
+        """Expira as conversões que passaram do prazo e substitui os trabalhadores presos."""
+        intervalo = min(1.0, self.timeout / 4)
+        while not self._fechado.wait(intervalo):
+            agora = time.monotonic()
+            with self._trava:
+                for posicao, trabalhador in enumerate(self._trabalhadores):
+                    tarefa = trabalhador.tarefa
+                    if tarefa is None or tarefa.inicio is None or agora - tarefa.inicio < self.timeout:
+                        continue
+
+                    trabalhador.descartado = True
+                    self.expiradas += 1
+                    tarefa.concluir(erro=ConversaoTimeout(
+                        f"Conversão de {os.path.basename(tarefa.caminho_entrada)} excedeu {self.timeout} s"
+                    ))
+                    self._encerrar_backend(trabalhador)
+                    self._trabalhadores[posicao] = self._iniciar_trabalhador()
+                    get_logger().warning(
+                        f"Conversor {trabalhador.name} excedeu o prazo de {self.timeout} s e foi substituído",
+                        ProcessType.FILE,
+                    )
+
+    @staticmethod
+    def _encerrar_backend(trabalhador):
+        backend = trabalhador.backend
+        if backend is None:
+            return
+        try:
+            backend.encerrar()
+        except Exception as e:
+            get_logger().warning(f"Falha ao encerrar o conversor {trabalhador.name}: {e}", ProcessType.FILE)
+
+    def submeter(self, caminho_entrada, caminho_saida, formato):
+        """
+        Enfileira uma conversão.
+
+        Returns:
+            concurrent.futures.Future: Resolvido com caminho_saida ou com a exceção da conversão.
+        """
+        if self._fechado.is_set():
+            raise RuntimeError("O pool de conversores já foi fechado.")
+        tarefa = _Tarefa(caminho_entrada, caminho_saida, formato)
+        self._fila.put(tarefa)
+        return tarefa.futuro
+
+    def converter(self, caminho_entrada, caminho_saida, formato):
+        """Converte um arquivo e aguarda o resultado (ver submeter)."""
+        return self.submeter(caminho_entrada, caminho_saida, formato).result()
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: {'trabalhadores', 'aberturas', 'reciclagens', 'expiradas', 'pendentes'}
+        """
+        return {
+            "trabalhadores": len(self._trabalhadores),
+            "aberturas": self.aberturas,
+            "reciclagens": self.reciclagens,
+            "expiradas": self.expiradas,
+            "pendentes": self._fila.qsize(),
+        }
+
+    def fechar(self, aguardar=True):
+        """Encerra os trabalhadores após as conversões já enfileiradas."""
+        if self._fechado.is_set():
+            return
+        self._fechado.set()
+        with self._trava:
+            trabalhadores = list(self._trabalhadores)
+        for _ in trabalhadores:
+            self._fila.put(None)
+        if aguardar:
+            for trabalhador in trabalhadores:
+                trabalhador.join(self.timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+        return False
+
+
+_pool_conversores = None
+_trava_pool = threading.Lock()
+
+
+def get_converter_pool():
+    """Retorna o pool de conversores do Office da execução, criado na primeira conversão."""
+    global _pool_conversores
+    with _trava_pool:
+        if _pool_conversores is None:
+            _pool_conversores = ConverterPool()
+            atexit.register(_pool_conversores.fechar)
+        return _pool_conversores
+
+
+def converter_arquivo(caminho_entrada, caminho_saida, formato):
+    """
+    Converte um arquivo pelo pool de conversores do Office.
+
+    Args:
+        caminho_entrada (str): Arquivo de origem.
+        caminho_saida (str): Arquivo convertido (pode ser o próprio arquivo de origem).
+        formato (tuple): FORMATO_DOCX, FORMATO_DOC ou FORMATO_XLSX.
+
+    Returns:
+        str: caminho_saida.
+    """
+    return get_converter_pool().converter(caminho_entrada, caminho_saida, formato)
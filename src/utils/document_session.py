@@ -0,0 +1,187 @@
+from docx import Document
+
+from src.utils.logger import ProcessType, get_logger
+from src.utils.docx_xml_utils import partes_editadas, salvar_documento
+from src.utils.extraction_cache import hash_arquivo
+from src.utils.read_files_utils import (
+    capture_code_from_docx,
+    capture_code_from_headers,
+    capture_type_from_headers,
+    captura_codigo_nucleo,
+    captura_tabela_embalagem,
+    captura_tabela_fabricacao,
+    get_headers_texts,
+)
+from src.utils.edit_files_utiles import (
+    adicionar_nova_linha_com_codigo_embalagem,
+    adicionar_nova_linha_fabricacao,
+    aplicar_substituicoes_em_lote,
+    edit_file_eme,
+    edit_file_embalagem_fabricacao,
+    edit_file_ficha,
+    edit_file_mame,
+    editar_celula_codigo_embalagem,
+    substituir_codigo_nucleo,
+)
+
+
+class DocumentSession:
+    """
+    Sessão de trabalho sobre um único documento Word.
+
+    O arquivo é lido uma única vez e todas as operações de extração e edição são
+    executadas sobre o documento em memória. O arquivo só é gravado em commit(),
+    uma única vez, independentemente da quantidade de edições realizadas, comparando
+    apenas as partes que as edições alteram e regravando as que mudaram (ver salvar_documento).
+
+    Com um cache de extrações (ver ExtractionCache), o tipo e as tabelas de componentes
+    lidos antes de qualquer edição são buscados pelo SHA-256 do arquivo original, e o
+    documento só é carregado pelo python-docx quando realmente necessário.
+    """
+
+    def __init__(self, caminho_arquivo, caminho_arquivo_salvo=None, cache=None, sha256=None):
+        """
+        Args:
+            caminho_arquivo (str): Caminho do arquivo .docx.
+            caminho_arquivo_salvo (str, optional): Caminho de gravação. Se None, sobrescreve o original.
+            cache (ExtractionCache, optional): Cache de extrações.
+            sha256 (str, optional): SHA-256 do arquivo, se já calculado. Calculado a partir do arquivo se houver cache.
+        """
+        self.caminho_arquivo = caminho_arquivo
+        self.caminho_arquivo_salvo = caminho_arquivo_salvo or caminho_arquivo
+        self.cache = cache
+        self.sha256 = sha256 if sha256 or cache is None else hash_arquivo(caminho_arquivo)
+        self._documento = None
+        self.leituras = 0
+        self.edicoes = 0
+        self.gravacoes = 0
+        self._cabecalhos_rodapes_editados = False
+
+    @property
+    def documento(self):
+        """Documento em memória, carregado na primeira operação que o utiliza."""
+        if self._documento is None:
+            self._documento = Document(self.caminho_arquivo)
+        return self._documento
+
+    # Extração
+
+    def _ler(self, funcao, *args, **kwargs):
+        self.leituras += 1
+        return funcao(self.documento, *args, **kwargs)
+
+    def _ler_em_cache(self, fato, funcao, *args):
+        """
+        Lê um fato do cache enquanto o documento não foi editado; após a primeira edição
+        o conteúdo já não corresponde ao SHA-256 do arquivo e o fato é lido do documento.
+        """
+        if self.cache is None or self.edicoes:
+            return self._ler(funcao, *args)
+        self.leituras += 1
+        return self.cache.obter_ou_extrair(self.sha256, fato, lambda: funcao(self.documento, *args))
+
+    def capturar_codigo(self, *args, **kwargs):
+        return self._ler(capture_code_from_docx, *args, **kwargs)
+
+    def capturar_codigo_cabecalhos(self, *args, **kwargs):
+        return self._ler(capture_code_from_headers, *args, **kwargs)
+
+    def capturar_tipo_cabecalhos(self):
+        return self._ler_em_cache("tipo_cabecalho", capture_type_from_headers)
+
+    def textos_cabecalhos(self):
+        return self._ler(get_headers_texts)
+
+    def tabela_embalagem(self, texto_inicial_tabela):
+        return self._ler_em_cache(f"tabela_embalagem:{texto_inicial_tabela}", captura_tabela_embalagem, texto_inicial_tabela)
+
+    def tabela_fabricacao(self, texto_inicial_tabela):
+        return self._ler_em_cache(f"tabela_fabricacao:{texto_inicial_tabela}", captura_tabela_fabricacao, texto_inicial_tabela)
+
+    def codigos_nucleo(self, keyword):
+        return self._ler_em_cache(f"codigos_nucleo:{keyword}", captura_codigo_nucleo, keyword)
+
+    # Edição (sem gravar; a gravação acontece em commit)
+
+    def _editar(self, funcao, *args, cabecalhos_rodapes=False):
+        """Executa a edição; cabecalhos_rodapes indica que ela altera cabeçalhos ou rodapés, além do corpo."""
+        self.edicoes += 1
+        self._cabecalhos_rodapes_editados |= cabecalhos_rodapes
+        return funcao(self.documento, *args, None)
+
+    def editar_ficha(self, texto_procurado, novo_texto):
+        return self._editar(edit_file_ficha, texto_procurado, novo_texto, cabecalhos_rodapes=True)
+
+    def editar_eme(self, texto_procurado, novo_texto):
+        return self._editar(edit_file_eme, texto_procurado, novo_texto)
+
+    def editar_mame(self, texto_procurado, novo_texto):
+        return self._editar(edit_file_mame, texto_procurado, novo_texto)
+
+    def editar_embalagem_fabricacao(self, texto_procurado, novo_texto):
+        return self._editar(edit_file_embalagem_fabricacao, texto_procurado, novo_texto, cabecalhos_rodapes=True)
+
+    def editar_celula_codigo_embalagem(self, codigo_antigo, novo_codigo):
+        return self._editar(editar_celula_codigo_embalagem, codigo_antigo, novo_codigo)
+
+    def substituir_codigo_nucleo(self, codigo_antigo, codigo_novo):
+        return self._editar(substituir_codigo_nucleo, codigo_antigo, codigo_novo)
+
+    def aplicar_substituicoes(self, substituicoes):
+        """Aplica um lote transacional de substituições (ver aplicar_substituicoes_em_lote)."""
+        if not substituicoes:
+            return 0
+        # No fluxo anterior cada substituição era uma edição com leitura e gravação próprias
+        self.edicoes += len(substituicoes) - 1
+        return self._editar(aplicar_substituicoes_em_lote, substituicoes)
+
+    def adicionar_linha_embalagem(self, novo_codigo, descricao, quantidade, unidade):
+        return self._editar(adicionar_nova_linha_com_codigo_embalagem, novo_codigo, descricao, quantidade, unidade)
+
+    def adicionar_linha_fabricacao(self, texto_inicial_tabela, novo_codigo, descricao, dcb, quantidade, formula, formula_unitaria):
+        return self._editar(
+            adicionar_nova_linha_fabricacao,
+            texto_inicial_tabela, novo_codigo, descricao, dcb, quantidade, formula, formula_unitaria,
+        )
+
+    # Gravação
+
+    def commit(self):
+        """
+        Grava o documento uma única vez, se houve alguma edição.
+
+        Returns:
+            dict: Resumo da sessão (ver resumo()).
+        """
+        membros = None
+        if self.edicoes:
+            membros = salvar_documento(
+                self.documento, self.caminho_arquivo_salvo, self.caminho_arquivo,
+                partes_editadas(self.documento, self._cabecalhos_rodapes_editados),
+            )
+            self.gravacoes += 1
+
+        resumo = self.resumo()
+        mensagem = (
+            f"Sessão do documento: {resumo['leituras_evitadas']} leitura(s) e "
+            f"{resumo['gravacoes_evitadas']} gravação(ões) evitadas"
+        )
+        if membros:
+            mensagem += f"; {membros['regravados']} parte(s) regravada(s) e {membros['copiados']} copiada(s) sem recompressão"
+        get_logger().info(mensagem, ProcessType.FILE)
+        return resumo
+
+    def resumo(self):
+        """
+        Compara a sessão com o fluxo em que cada operação abre e cada edição grava o arquivo.
+
+        Returns:
+            dict: {'operacoes', 'edicoes', 'leituras_evitadas', 'gravacoes_evitadas'}
+        """
+        operacoes = self.leituras + self.edicoes
+        return {
+            "operacoes": operacoes,
+            "edicoes": self.edicoes,
+            "leituras_evitadas": max(operacoes - 1, 0),
+            "gravacoes_evitadas": max(self.edicoes - self.gravacoes, 0),
+        }
@@ -0,0 +1,470 @@
+import copy
+import os
+import re
+import struct
+import tempfile
+import time
+import zlib
+import zipfile
+
+from docx.opc import oxml as opc_oxml
+from docx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PACKAGE_URI, PackURI
+from docx.oxml.ns import qn
+from docx.oxml.parser import parse_xml
+from docx.table import _Row
+from docx.text.run import Run
+
+_W_T = qn("w:t")
+_W_PPR = qn("w:pPr")
+_W_TCPR = qn("w:tcPr")
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# Filhos do run que compõem o texto do parágrafo no python-docx (CT_R.text); apenas os
+# w:t são editados, os demais (tabulações, quebras) delimitam o texto
+_XPATH_TEXTO_PARAGRAFO = (
+    "./w:r/w:t | ./w:r/w:tab | ./w:r/w:br | ./w:r/w:cr | ./w:r/w:noBreakHyphen | ./w:r/w:ptab"
+    " | ./w:hyperlink/w:r/w:t | ./w:hyperlink/w:r/w:tab | ./w:hyperlink/w:r/w:br"
+    " | ./w:hyperlink/w:r/w:cr | ./w:hyperlink/w:r/w:noBreakHyphen | ./w:hyperlink/w:r/w:ptab"
+)
+
+
+def _compilar_padrao(antigo):
+    if isinstance(antigo, re.Pattern):
+        return antigo
+    return re.compile(re.escape(str(antigo)))
+
+
+def _segmentos_paragrafo(p):
+    """
+    Texto do parágrafo (igual a Paragraph.text) e a posição de cada nó que o compõe.
+
+    Returns:
+        tuple: (texto, lista de (elemento, início, fim))
+    """
+    partes = []
+    segmentos = []
+    posicao = 0
+    for elemento in p.xpath(_XPATH_TEXTO_PARAGRAFO):
+        texto = (elemento.text or "") if elemento.tag == _W_T else str(elemento)
+        partes.append(texto)
+        segmentos.append((elemento, posicao, posicao + len(texto)))
+        posicao += len(texto)
+    return "".join(partes), segmentos
+
+
+def _substituir_no_paragrafo(p, padrao, novo):
+    """
+    Substitui as ocorrências do padrão nos nós w:t de um parágrafo (elemento w:p).
+
+    Uma ocorrência dividida entre vários runs recebe o texto novo no primeiro nó e é
+    removida dos seguintes; os demais nós, e a formatação de todos os runs, não são
+    alterados. Ocorrências que atravessam tabulações ou quebras de linha são mantidas.
+
+    Returns:
+        list: Elementos w:r alterados, na ordem do documento.
+    """
+    texto, segmentos = _segmentos_paragrafo(p)
+    edicoes = {}  # nó w:t -> [(início local, fim local, texto inserido)]
+
+    for ocorrencia in padrao.finditer(texto):
+        inicio, fim = ocorrencia.span()
+        if inicio == fim:
+            continue
+
+        afetados = [segmento for segmento in segmentos if segmento[1] < fim and segmento[2] > inicio]
+        if any(elemento.tag != _W_T for elemento, _, _ in afetados):
+            continue
+
+        substituto = novo(ocorrencia) if callable(novo) else novo
+        for posicao, (elemento, inicio_no, fim_no) in enumerate(afetados):
+            edicoes.setdefault(elemento, []).append((
+                max(inicio, inicio_no) - inicio_no,
+                min(fim, fim_no) - inicio_no,
+                substituto if posicao == 0 else "",
+            ))
+
+    runs_alterados = []
+    for elemento, _, _ in segmentos:
+        if elemento not in edicoes:
+            continue
+
+        texto_no = elemento.text or ""
+        for inicio, fim, substituto in reversed(edicoes[elemento]):
+            texto_no = texto_no[:inicio] + substituto + texto_no[fim:]
+        elemento.text = texto_no
+        if texto_no != texto_no.strip():
+            elemento.set(_XML_SPACE, "preserve")
+
+        run = elemento.getparent()
+        if not runs_alterados or runs_alterados[-1] is not run:
+            runs_alterados.append(run)
+
+    return runs_alterados
+
+
+def substituir_texto(objeto, antigo, novo):
+    """
+    Substitui texto em um parágrafo ou célula editando apenas os nós w:t afetados.
+
+    Diferente de atribuir .text (que recria os runs e perde a formatação), os runs
+    existentes são mantidos: o texto novo herda a formatação do run em que a ocorrência
+    começa, inclusive quando o código está dividido entre vários runs.
+
+    Args:
+        objeto (Paragraph | _Cell): Parágrafo ou célula do python-docx.
+        antigo (str | re.Pattern): Texto (ou expressão regular compilada) a substituir.
+        novo (str | callable): Texto novo, ou função que recebe o re.Match e retorna o texto.
+
+    Returns:
+        list: Runs (docx.text.run.Run) alterados; vazia se nada foi substituído.
+    """
+    padrao = _compilar_padrao(antigo)
+    paragrafos = [objeto] if hasattr(objeto, "_p") else objeto.paragraphs
+
+    runs = []
+    for paragrafo in paragrafos:
+        runs.extend(Run(r, paragrafo) for r in _substituir_no_paragrafo(paragrafo._p, padrao, novo))
+    return runs
+
+
+def _definir_texto_celula(tc, texto):
+    """
+    Troca o conteúdo de uma célula (w:tc) por um único texto, mantendo as propriedades
+    da célula, do primeiro parágrafo e do primeiro run (fonte, tamanho, negrito).
+    """
+    paragrafos = tc.p_lst
+    p = paragrafos[0] if paragrafos else tc.add_p()
+    for filho in list(tc):
+        if filho is not p and filho.tag != _W_TCPR:
+            tc.remove(filho)
+
+    runs = p.r_lst
+    rPr = copy.deepcopy(runs[0].rPr) if runs and runs[0].rPr is not None else None
+    for filho in list(p):
+        if filho.tag != _W_PPR:
+            p.remove(filho)
+
+    if texto:
+        r = p.add_r()
+        if rPr is not None:
+            r.insert(0, rPr)
+        r.text = texto
+
+
+def inserir_linha(tabela, posicao, textos=(), modelo=None, limpar_restantes=False):
+    """
+    Insere uma linha na tabela clonando o w:tr de uma linha modelo, com uma única
+    operação no XML.
+
+    A nova linha herda do modelo a quantidade de células, larguras, sombreamento e a
+    formatação do texto; as demais linhas não são tocadas. Mesclagens verticais do
+    modelo não são copiadas.
+
+    Args:
+        tabela (docx.table.Table): Tabela do documento.
+        posicao (int): Índice que a nova linha terá (len(tabela.rows) insere no final).
+        textos (iterable): Textos das primeiras células, na ordem dos w:tc; None mantém o texto do modelo.
+        modelo (int, optional): Índice da linha clonada. Padrão: a linha que ocupa a posição ou, no final, a última.
+        limpar_restantes (bool): Se True, as células sem texto informado ficam vazias em vez de manter o texto do modelo.
+
+    Returns:
+        docx.table._Row: Linha inserida.
+    """
+    linhas = tabela._tbl.tr_lst
+    if modelo is None:
+        modelo = min(posicao, len(linhas) - 1)
+
+    tr = copy.deepcopy(linhas[modelo])
+    celulas = tr.tc_lst
+    for tc in celulas:
+        tcPr = tc.tcPr
+        if tcPr is not None and tcPr.vMerge is not None:
+            tcPr._remove_vMerge()
+
+    textos = list(textos)
+    for indice, tc in enumerate(celulas):
+        texto = textos[indice] if indice < len(textos) else None
+        if texto is not None:
+            _definir_texto_celula(tc, str(texto))
+        elif limpar_restantes:
+            _definir_texto_celula(tc, "")
+
+    if posicao < len(linhas):
+        linhas[posicao].addprevious(tr)
+    else:
+        linhas[-1].addnext(tr)
+    return _Row(tr, tabela)
+
+
+# Membros do pacote que não são partes (ver docx.opc.pkgwriter.PackageWriter)
+_MEMBRO_TIPOS_CONTEUDO = "[Content_Types].xml"
+_MEMBRO_RELACOES_PACOTE = "_rels/.rels"
+_TAMANHO_BLOCO_COPIA = 1024 * 1024
+
+
+def partes_editadas(documento, cabecalhos_rodapes=False):
+    """
+    Partes XML que as funções de edição alteram: o corpo do documento e, se indicado,
+    os cabeçalhos e rodapés. Estilos, numeração, configurações e propriedades não são
+    editados e não precisam ser comparados ao salvar (ver salvar_documento).
+
+    Args:
+        documento (docx.document.Document): Documento em memória.
+        cabecalhos_rodapes (bool, optional): Inclui as partes de cabeçalho e rodapé.
+
+    Returns:
+        list: Partes do pacote.
+    """
+    partes = [documento.part]
+    if cabecalhos_rodapes:
+        partes.extend(
+            relacao.target_part for relacao in documento.part.rels.values()
+            if relacao.reltype in (RT.HEADER, RT.FOOTER)
+        )
+    return partes
+
+
+def _parte_alterada(parte, original):
+    """
+    Indica se a parte XML difere da lida do arquivo de origem.
+
+    O Word grava as partes com aspas duplas na declaração XML e quebras de linha CRLF,
+    que o lxml não reproduz; por isso a serialização atual é comparada com a do XML
+    original lido de novo pelo mesmo parser do python-docx, e não com os bytes do arquivo.
+    """
+    atual = parte.blob
+    if atual == original:
+        return False
+    return atual != opc_oxml.serialize_part_xml(parse_xml(original))
+
+
+def _relacoes_alteradas(relacoes, base_uri, original):
+    """Indica se as relações diferem das do arquivo .rels de origem (comparadas pelo destino absoluto)."""
+
+    def destino(elemento):
+        if elemento.target_mode == RTM.EXTERNAL:
+            return elemento.target_ref
+        return PackURI.from_rel_ref(base_uri, elemento.target_ref)
+
+    atuais = {
+        (relacao.rId, relacao.reltype, relacao.target_ref if relacao.is_external else relacao.target_part.partname)
+        for relacao in relacoes.values()
+    }
+    originais = {
+        (elemento.rId, elemento.reltype, destino(elemento))
+        for elemento in opc_oxml.parse_xml(original).Relationship_lst
+    }
+    return atuais != originais
+
+
+def _membros_regravados(documento, zip_origem, partes=None):
+    """
+    Compara o pacote em memória com o .docx de origem.
+
+    Partes binárias (imagens, objetos OLE) não são alteradas pelo python-docx e são
+    sempre copiadas; as partes XML indicadas e os respectivos arquivos de relações só
+    são regravados quando o conteúdo mudou (ver _parte_alterada e _relacoes_alteradas),
+    independentemente de como foram formatados por quem gravou o arquivo. As demais
+    partes XML são copiadas sem serem lidas.
+
+    Args:
+        partes (iterable, optional): Partes que podem ter sido editadas. Se None, todas
+            as partes XML são comparadas.
+
+    Returns:
+        dict: {nome do membro: bytes} dos membros alterados, ou None se o conjunto de
+        partes mudou (parte incluída ou removida) e o pacote precisa ser salvo inteiro.
+    """
+    pacote = documento.part.package
+    nomes = {_MEMBRO_TIPOS_CONTEUDO, _MEMBRO_RELACOES_PACOTE}
+    for parte in pacote.iter_parts():
+        nomes.add(parte.partname.membername)
+        if len(parte.rels):
+            nomes.add(parte.partname.rels_uri.membername)
+    if set(zip_origem.namelist()) != nomes:
+        return None
+
+    if partes is None:
+        partes = pacote.iter_parts()
+    comparadas = {}
+    relacoes = {_MEMBRO_RELACOES_PACOTE: (pacote.rels, PACKAGE_URI.baseURI)}
+    for parte in partes:
+        if hasattr(parte, "_element"):
+            comparadas[parte.partname.membername] = parte
+        if len(parte.rels):
+            relacoes[parte.partname.rels_uri.membername] = (parte.rels, parte.partname.baseURI)
+
+    alterados = {}
+    for nome, parte in comparadas.items():
+        if _parte_alterada(parte, zip_origem.read(nome)):
+            alterados[nome] = parte.blob
+    for nome, (colecao, base_uri) in relacoes.items():
+        if _relacoes_alteradas(colecao, base_uri, zip_origem.read(nome)):
+            alterados[nome] = colecao.xml
+    return alterados
+
+
+class _LimiteZipExcedido(ValueError):
+    """O arquivo gravado por _EscritorZip exigiria ZIP64."""
+
+
+class _EscritorZip:
+    """
+    Escritor mínimo de arquivos zip (sem ZIP64) que aceita membros já comprimidos.
+
+    O zipfile só grava membros comprimindo o conteúdo; este escritor monta os
+    cabeçalhos locais, o diretório central e o registro final a partir do formato do
+    zip, para copiar os membros do arquivo de origem sem descomprimi-los.
+    """
+
+    _CABECALHO_LOCAL = struct.Struct("<4s5H3L2H")
+    _REGISTRO_CENTRAL = struct.Struct("<4s6H3L5H2L")
+    _REGISTRO_FINAL = struct.Struct("<4s4H2LH")
+    _ASSINATURA_LOCAL = b"PK\x03\x04"
+    _ASSINATURA_CENTRAL = b"PK\x01\x02"
+    _ASSINATURA_FINAL = b"PK\x05\x06"
+    _FLAG_DESCRITOR_DADOS = 0x08
+    _FLAG_UTF8 = 0x800
+    # Acima destes limites o arquivo exigiria ZIP64
+    LIMITE_TAMANHO = 0xFFFFFFFF
+    LIMITE_MEMBROS = 0xFFFF
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._entradas = []
+
+    @staticmethod
+    def _data_dos(data_hora):
+        ano, mes, dia, hora, minuto, segundo = data_hora
+        return (ano - 1980) << 9 | mes << 5 | dia, hora << 11 | minuto << 5 | segundo // 2
+
+    def _gravar_cabecalho(self, nome, flags, metodo, data_hora, crc, tamanho_comprimido, tamanho, atributos):
+        try:
+            nome_bytes = nome.encode("ascii")
+        except UnicodeEncodeError:
+            nome_bytes = nome.encode("utf-8")
+            flags |= self._FLAG_UTF8
+        flags &= ~self._FLAG_DESCRITOR_DADOS  # CRC e tamanhos vão no cabeçalho local
+        versao = 20 if metodo == zipfile.ZIP_DEFLATED else 10
+        data, hora = self._data_dos(data_hora)
+
+        deslocamento = self._arquivo.tell()
+        if deslocamento + tamanho_comprimido > self.LIMITE_TAMANHO or len(self._entradas) >= self.LIMITE_MEMBROS:
+            raise _LimiteZipExcedido("O arquivo excede os limites do zip sem ZIP64")
+        self._arquivo.write(self._CABECALHO_LOCAL.pack(
+            self._ASSINATURA_LOCAL, versao, flags, metodo, hora, data,
+            crc, tamanho_comprimido, tamanho, len(nome_bytes), 0,
+        ))
+        self._arquivo.write(nome_bytes)
+        self._entradas.append((
+            nome_bytes, versao, flags, metodo, hora, data, crc, tamanho_comprimido, tamanho, atributos, deslocamento,
+        ))
+
+    def copiar(self, arquivo_origem, info):
+        """Copia um membro do zip de origem com os bytes já comprimidos, sem descomprimi-lo."""
+        arquivo_origem.seek(info.header_offset)
+        cabecalho = self._CABECALHO_LOCAL.unpack(arquivo_origem.read(self._CABECALHO_LOCAL.size))
+        if cabecalho[0] != self._ASSINATURA_LOCAL:
+            raise zipfile.BadZipFile(f"Cabeçalho local inválido no arquivo de origem: {info.filename}")
+        # Os dois últimos campos do cabeçalho local são os tamanhos do nome e do campo extra
+        arquivo_origem.seek(info.header_offset + self._CABECALHO_LOCAL.size + cabecalho[-2] + cabecalho[-1])
+
+        self._gravar_cabecalho(
+            info.filename, info.flag_bits, info.compress_type, info.date_time,
+            info.CRC, info.compress_size, info.file_size, info.external_attr,
+        )
+        restante = info.compress_size
+        while restante:
+            bloco = arquivo_origem.read(min(restante, _TAMANHO_BLOCO_COPIA))
+            if not bloco:
+                raise zipfile.BadZipFile(f"Membro truncado no arquivo de origem: {info.filename}")
+            self._arquivo.write(bloco)
+            restante -= len(bloco)
+
+    def gravar(self, nome, conteudo, atributos=0):
+        """Grava um membro novo, comprimido com deflate."""
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        comprimido = compressor.compress(conteudo) + compressor.flush()
+        self._gravar_cabecalho(
+            nome, 0, zipfile.ZIP_DEFLATED, time.localtime()[:6],
+            zlib.crc32(conteudo), len(comprimido), len(conteudo), atributos,
+        )
+        self._arquivo.write(comprimido)
+
+    def fechar(self):
+        """Grava o diretório central e o registro final."""
+        inicio = self._arquivo.tell()
+        for nome_bytes, versao, flags, metodo, hora, data, crc, tamanho_comprimido, tamanho, atributos, deslocamento in self._entradas:
+            self._arquivo.write(self._REGISTRO_CENTRAL.pack(
+                self._ASSINATURA_CENTRAL, versao, versao, flags, metodo, hora, data,
+                crc, tamanho_comprimido, tamanho, len(nome_bytes), 0, 0, 0, 0, atributos, deslocamento,
+            ))
+            self._arquivo.write(nome_bytes)
+        fim = self._arquivo.tell()
+        if fim > self.LIMITE_TAMANHO:
+            raise _LimiteZipExcedido("O arquivo excede os limites do zip sem ZIP64")
+        self._arquivo.write(self._REGISTRO_FINAL.pack(
+            self._ASSINATURA_FINAL, 0, 0, len(self._entradas), len(self._entradas), fim - inicio, inicio, 0,
+        ))
+
+
+def salvar_documento(documento, caminho_arquivo_salvo, caminho_origem=None, partes=None):
+    """
+    Salva o documento regravando apenas as partes XML alteradas.
+
+    Só as partes indicadas em `partes` (ver partes_editadas) são comparadas com as do
+    arquivo de origem; os demais membros do .docx (imagens, objetos OLE, estilos, temas)
+    são copiados com os bytes já comprimidos, sem serem lidos nem recomprimidos, de modo
+    que o tempo de gravação acompanha as partes editadas e não o documento inteiro. O
+    arquivo é escrito em um temporário na pasta de destino e só então substitui o destino.
+    Sem arquivo de origem, se partes foram incluídas ou removidas, ou se o resultado
+    exigiria ZIP64, o documento é salvo inteiro (documento.save).
+
+    Args:
+        documento (docx.document.Document): Documento em memória.
+        caminho_arquivo_salvo (str): Caminho do arquivo salvo (pode ser o de origem).
+        caminho_origem (str | Document, optional): Arquivo .docx de onde o documento foi aberto.
+        partes (iterable, optional): Partes que podem ter sido editadas. Se None, todas
+            as partes XML são comparadas.
+
+    Returns:
+        dict: {'regravados', 'copiados'} com a quantidade de membros de cada tipo, ou
+        None se o documento foi salvo inteiro.
+    """
+    if not (isinstance(caminho_origem, str) and isinstance(caminho_arquivo_salvo, str) and os.path.isfile(caminho_origem)):
+        documento.save(caminho_arquivo_salvo)
+        return None
+
+    with zipfile.ZipFile(caminho_origem) as zip_origem:
+        alterados = _membros_regravados(documento, zip_origem, partes)
+        quantidade_membros = len(zip_origem.infolist())
+        if alterados is not None:
+            descritor, temporario = tempfile.mkstemp(
+                suffix=".docx", dir=os.path.dirname(os.path.abspath(caminho_arquivo_salvo))
+            )
+            os.close(descritor)
+            try:
+                with open(caminho_origem, "rb") as arquivo_origem, open(temporario, "wb") as arquivo_destino:
+                    zip_destino = _EscritorZip(arquivo_destino)
+                    for info in zip_origem.infolist():
+                        if info.filename in alterados:
+                            zip_destino.gravar(info.filename, alterados[info.filename], info.external_attr)
+                        else:
+                            zip_destino.copiar(arquivo_origem, info)
+                    zip_destino.fechar()
+                os.replace(temporario, caminho_arquivo_salvo)
+            except _LimiteZipExcedido:
+                # O zipfile grava ZIP64 quando necessário; o pacote é salvo inteiro
+                os.remove(temporario)
+                alterados = None
+            except Exception:
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
+
+    if alterados is None:
+        documento.save(caminho_arquivo_salvo)
+        return None
+    return {"regravados": len(alterados), "copiados": quantidade_membros - len(alterados)}
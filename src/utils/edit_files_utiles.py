@@ -3,13 +3,11 @@ import os
 import pandas as pd
 import logging
 from xml.etree import ElementTree as ET
-from docx import Document
 import win32com.client
 import re
 from datetime import datetime
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Pt
-from docx.oxml.ns import qn
 from copy import deepcopy
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +15,9 @@ src_dir = os.path.join(current_dir, '..')
 sys.path.append(src_dir)
 
 from config.config import load_config, get_caminho_de_para 
+from src.utils.read_files_utils import abrir_documento
+from src.utils.table_index import celulas_unicas, indice_tabelas
+from src.utils.docx_xml_utils import inserir_linha, partes_editadas, salvar_documento, substituir_texto
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -26,30 +27,14 @@ load_config()
 def edit_file_ficha(caminho_arquivo, texto_procurado, novo_texto, caminho_arquivo_salvo):
 
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
+    documento = abrir_documento(caminho_arquivo)
 
     
     # Percorre as tabelas do documento
     for tabela in documento.tables:
-        for linha in tabela.rows:
-            for celula in linha.cells:
-                if texto_procurado in celula.text.strip():  # Verifica se o texto corresponde ao procurado
-                  
-                    celula.text = celula.text.replace(texto_procurado, novo_texto)  # Altera o texto
-
-                    # Ajusta a formatação da célula
-                    for paragrafo in celula.paragraphs:
-                        for run in paragrafo.runs:
-                            run.font.name = "Calibri"
-                            run.font.size = Pt(12)
-                            run.bold = True
-
-                            # Garante que a fonte seja Calibri (Corpo)
-                            rFonts = run._element.rPr.rFonts
-                            rFonts.set(qn("w:ascii"), "Calibri")
-                            rFonts.set(qn("w:hAnsi"), "Calibri")
-                    
-
+        for celula in celulas_unicas(tabela):
+            # Altera apenas o texto procurado, mantendo os runs e a formatação da célula
+            substituir_texto(celula, texto_procurado, novo_texto)
 
     for i, secao in enumerate(documento.sections):
         rodape = secao.footer
@@ -64,110 +49,90 @@ def edit_file_ficha(caminho_arquivo, texto_procurado, novo_texto, caminho_arquiv
                 numero_revisao = int(match.group(1))  # Captura o número da revisão
                 nova_revisao = f"Revisão {numero_revisao + 1:02d}"  # Incrementa +1
                 
-                # Substitui o texto no parágrafo
-                paragrafo.text = re.sub(r"Revisão \d+", nova_revisao, paragrafo.text)
+                # Substitui o texto no parágrafo, mantendo a formatação do rodapé
+                substituir_texto(paragrafo, re.compile(r"Revisão \d+"), nova_revisao)
                
 
     # Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento, cabecalhos_rodapes=True))
 
 
 def edit_file_eme(caminho_arquivo, texto_procurado, novo_texto, caminho_arquivo_salvo):
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
+    documento = abrir_documento(caminho_arquivo)
 
     # 1. Substitui o texto_procurado nas tabelas
     texto_alterado = False
     for tabela in documento.tables:
-        for linha in tabela.rows:
-            for celula in linha.cells:
-                if texto_procurado in celula.text.strip():
-                    
-                    celula.text = celula.text.replace(texto_procurado, novo_texto)
-
-
-                    # Aplica a formatação Arial e tamanho 10
-                    for paragrafo in celula.paragraphs:
-                        for run in paragrafo.runs:
-                            run.font.name = "Arial"  # Define a fonte Arial
-                            run.font.size = Pt(10)  # Define o tamanho da fonte 10
-                    
-                    texto_alterado = True
+        for celula in celulas_unicas(tabela):
+            # Altera apenas o texto procurado, mantendo os runs e a formatação da célula
+            if substituir_texto(celula, texto_procurado, novo_texto):
+                texto_alterado = True
 
     if not texto_alterado:
         print("Texto procurado não encontrado no documento.")
 
 
     # 2. Localiza a tabela de revisão e insere uma nova linha no topo
-    tabela_revisao_encontrada = False
-    for tabela in documento.tables:
-        if "REVISÃO" in tabela.cell(0, 0).text.strip():
-            tabela_revisao_encontrada = True
-
-            # Determina o maior número de revisão
-            maior_revisao = 0
-            for linha in tabela.rows[1:]:  # Ignora o cabeçalho
-                try:
-                    revisao_atual = int(re.search(r"\d+", linha.cells[0].text.strip()).group())
-                    maior_revisao = max(maior_revisao, revisao_atual)
-                except (ValueError, AttributeError):
-                    continue
+    entrada = indice_tabelas(documento).contendo("REVISÃO")
+    tabela_revisao_encontrada = entrada is not None
+    if tabela_revisao_encontrada:
+        tabela = entrada.tabela
+
+        # Determina o maior número de revisão
+        maior_revisao = 0
+        for linha in tabela.rows[1:]:  # Ignora o cabeçalho
+            try:
+                revisao_atual = int(re.search(r"\d+", linha.cells[0].text.strip()).group())
+                maior_revisao = max(maior_revisao, revisao_atual)
+            except (ValueError, AttributeError):
+                continue
+
+        # Cria a nova revisão
+        nova_revisao = maior_revisao + 1
+        data_atual = datetime.now().strftime("%d/%m/%Y")
+
+        # Insere a nova revisão como primeira linha após o cabeçalho, clonando a linha
+        # atual (mesma formatação); as demais linhas não são alteradas
+        nova_linha = inserir_linha(tabela, 1, [
+            str(nova_revisao).zfill(2),
+            "-",  # Coluna ITEM
+            "Revisão dos documentos mediante ao CM-TBS-00728;",
+            data_atual,
+        ])
+
+        # Aplica a formatação na nova linha
+        for i, cell in enumerate(nova_linha.cells):  # Percorre as células da linha
+            # Aplica a formatação de fonte e tamanho
+            for paragrafo in cell.paragraphs:
+                for run in paragrafo.runs:
+                    run.font.name = "Arial"  # Define a fonte Arial
+                    run.font.size = Pt(10)  # Define o tamanho da fonte 10
 
-            # Cria a nova revisão
-            nova_revisao = maior_revisao + 1
-            data_atual = datetime.now().strftime("%d/%m/%Y")
-
-            # Adiciona uma linha no final para evitar sobrescrever linhas existentes
-            tabela.add_row()
-            for i in range(len(tabela.rows) - 1, 1, -1):  # Move as linhas para baixo
-                for j, cell in enumerate(tabela.rows[i - 1].cells):
-                    tabela.rows[i].cells[j].text = cell.text
-
-            # Preenche a nova primeira linha com os dados
-            primeira_linha = tabela.rows[1].cells
-            primeira_linha[0].text = str(nova_revisao).zfill(2)
-            primeira_linha[1].text = "-"  # Coluna ITEM
-            primeira_linha[2].text = "Revisão dos documentos mediante ao CM-TBS-00728;"
-            primeira_linha[3].text = data_atual
-
-            # Aplica a formatação em todas as células da tabela
-            for linha in tabela.rows:
-                for i, cell in enumerate(linha.cells):  # Percorre as células da linha
-                    # Aplica a formatação de fonte e tamanho
-                    for paragrafo in cell.paragraphs:
-                        for run in paragrafo.runs:
-                            run.font.name = "Arial"  # Define a fonte Arial
-                            run.font.size = Pt(10)  # Define o tamanho da fonte 10
-                    
-                    # Alinha as células específicas ao centro (primeira, segunda e quarta coluna)
-                    if i == 0 or i == 1 or i == 3:  # Primeira, segunda e quarta coluna
-                        for paragrafo in cell.paragraphs:
-                            paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Alinha as células específicas ao centro (primeira, segunda e quarta coluna)
+            if i == 0 or i == 1 or i == 3:  # Primeira, segunda e quarta coluna
+                for paragrafo in cell.paragraphs:
+                    paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-            break
 
     if not tabela_revisao_encontrada:
         print("Tabela de revisão não encontrada no documento.")
 
     # 3. Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
  
 
 def edit_file_mame(caminho_arquivo, texto_procurado, novo_texto, caminho_arquivo_salvo):
    
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
+    documento = abrir_documento(caminho_arquivo)
     #1. Substitui o texto_procurado nos parágrafos
+    texto_alterado = False
     for paragrafo in documento.paragraphs:
-        if texto_procurado in paragrafo.text:
-            
-            paragrafo.text = paragrafo.text.replace(texto_procurado, novo_texto)
-
-            # Aplica a formatação (Fonte Arial e Tamanho 10) ao novo texto
-            for run in paragrafo.runs:  # Itera sobre todos os 'runs' no parágrafo
-                run.font.name = 'Arial'  # Define a fonte Arial
-                run.font.size = Pt(10)   # Define o tamanho da fonte 10
-            
+        # Altera apenas o texto procurado, mantendo os runs e a formatação do parágrafo
+        if substituir_texto(paragrafo, texto_procurado, novo_texto):
             texto_alterado = True
 
     # Verifica se o texto foi alterado
@@ -175,64 +140,58 @@ def edit_file_mame(caminho_arquivo, texto_procurado, novo_texto, caminho_arquivo
         print("Texto procurado não encontrado no documento.")
 
     # 2. Localiza a tabela de revisão e insere uma nova linha no topo
-    tabela_revisao_encontrada = False
-    for tabela in documento.tables:
-        if "REVISÃO" in tabela.cell(0, 0).text.strip():
-            tabela_revisao_encontrada = True
-
-            # Determina o maior número de revisão
-            maior_revisao = 0
-            for linha in tabela.rows[1:]:  # Ignora o cabeçalho
-                try:
-                    revisao_atual = int(re.search(r"\d+", linha.cells[0].text.strip()).group())
-                    maior_revisao = max(maior_revisao, revisao_atual)
-                except (ValueError, AttributeError):
-                    continue
+    entrada = indice_tabelas(documento).contendo("REVISÃO")
+    tabela_revisao_encontrada = entrada is not None
+    if tabela_revisao_encontrada:
+        tabela = entrada.tabela
+
+        # Determina o maior número de revisão
+        maior_revisao = 0
+        for linha in tabela.rows[1:]:  # Ignora o cabeçalho
+            try:
+                revisao_atual = int(re.search(r"\d+", linha.cells[0].text.strip()).group())
+                maior_revisao = max(maior_revisao, revisao_atual)
+            except (ValueError, AttributeError):
+                continue
+
+        # Cria a nova revisão
+        nova_revisao = maior_revisao + 1
+        data_atual = datetime.now().strftime("%d/%m/%Y")
+
+        # Insere a nova revisão como primeira linha após o cabeçalho, clonando a linha
+        # atual (mesma formatação); as demais linhas não são alteradas
+        nova_linha = inserir_linha(tabela, 1, [
+            str(nova_revisao).zfill(2),
+            "-",  # Coluna ITEM
+            "Revisão dos documentos mediante ao CM-TBS-00728;",
+            data_atual,
+        ])
+
+        # Aplica a formatação na nova linha
+        for i, cell in enumerate(nova_linha.cells):  # Percorre as células da linha
+            # Aplica a formatação de fonte e tamanho
+            for paragrafo in cell.paragraphs:
+                for run in paragrafo.runs:
+                    run.font.name = "Arial"  # Define a fonte Arial
+                    run.font.size = Pt(10)  # Define o tamanho da fonte 10
 
-            # Cria a nova revisão
-            nova_revisao = maior_revisao + 1
-            data_atual = datetime.now().strftime("%d/%m/%Y")
-
-            # Adiciona uma linha no final para evitar sobrescrever linhas existentes
-            tabela.add_row()
-            for i in range(len(tabela.rows) - 1, 1, -1):  # Move as linhas para baixo
-                for j, cell in enumerate(tabela.rows[i - 1].cells):
-                    tabela.rows[i].cells[j].text = cell.text
-
-            # Preenche a nova primeira linha com os dados
-            primeira_linha = tabela.rows[1].cells
-            primeira_linha[0].text = str(nova_revisao).zfill(2)
-            primeira_linha[1].text = "-"  # Coluna ITEM
-            primeira_linha[2].text = "Revisão dos documentos mediante ao CM-TBS-00728;"
-            primeira_linha[3].text = data_atual
-
-
-            # Aplica a formatação em todas as células da tabela
-            for linha in tabela.rows:
-                for i, cell in enumerate(linha.cells):  # Percorre as células da linha
-                    # Aplica a formatação de fonte e tamanho
-                    for paragrafo in cell.paragraphs:
-                        for run in paragrafo.runs:
-                            run.font.name = "Arial"  # Define a fonte Arial
-                            run.font.size = Pt(10)  # Define o tamanho da fonte 10
-                    
-                    # Alinha as células específicas ao centro (primeira, segunda e quarta coluna)
-                    if i == 0 or i == 1 or i == 3:  # Primeira, segunda e quarta coluna
-                        for paragrafo in cell.paragraphs:
-                            paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-         
-            break
+            # Alinha as células específicas ao centro (primeira, segunda e quarta coluna)
+            if i == 0 or i == 1 or i == 3:  # Primeira, segunda e quarta coluna
+                for paragrafo in cell.paragraphs:
+                    paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+     
 
     if not tabela_revisao_encontrada:
         print("Tabela de revisão não encontrada no documento.")
 
     # 3. Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
     
 
 def edit_file_embalagem_fabricacao(caminho_arquivo, texto_procurado, novo_texto, caminho_arquivo_salvo):
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
+    documento = abrir_documento(caminho_arquivo)
 
     # Percorre as seções do documento para acessar os cabeçalhos
     for secao in documento.sections:
@@ -240,16 +199,16 @@ def edit_file_embalagem_fabricacao(caminho_arquivo, texto_procurado, novo_texto,
 
         # Percorre as tabelas dentro do cabeçalho
         for tabela in cabecalho.tables:
-            for linha in tabela.rows:
-                for celula in linha.cells:
-                    if texto_procurado in celula.text.strip():  # Verifica se o texto corresponde ao procurado
-                        celula.text = celula.text.replace(texto_procurado, novo_texto)  # Altera o texto
+            # Cada célula física uma única vez, mesmo quando mesclada
+            for celula in celulas_unicas(tabela):
+                if texto_procurado in celula.text.strip():  # Verifica se o texto corresponde ao procurado
+                    celula.text = celula.text.replace(texto_procurado, novo_texto)  # Altera o texto
 
-                    # Aplica a formatação de fonte e tamanho
-                    for paragrafo in celula.paragraphs:
-                        for run in paragrafo.runs:
-                            run.font.name = "Arial"  # Define a fonte Arial
-                            run.font.size = Pt(9)  # Define o tamanho da fonte 9
+                # Aplica a formatação de fonte e tamanho
+                for paragrafo in celula.paragraphs:
+                    for run in paragrafo.runs:
+                        run.font.name = "Arial"  # Define a fonte Arial
+                        run.font.size = Pt(9)  # Define o tamanho da fonte 9
 
         # Percorre os parágrafos no cabeçalho
         for paragrafo in cabecalho.paragraphs:
@@ -263,90 +222,59 @@ def edit_file_embalagem_fabricacao(caminho_arquivo, texto_procurado, novo_texto,
 
 
 
-    tabela_revisao_encontrada = False
-    for tabela in documento.tables:
-        # Imprime o conteúdo da célula de cabeçalho para verificar
-        cabecalho = tabela.cell(0, 0).text.strip()
-        
-        if "Nº Revisão" == cabecalho:  # Verifica se a tabela é a que você deseja
-            tabela_revisao_encontrada = True
-
-            # Determina o maior número de revisão
-            maior_revisao = 0
-            for linha in tabela.rows[1:]:  # Ignora o cabeçalho
-                try:
-                    # Tenta capturar o número da revisão da primeira célula
-                    texto_revisao = linha.cells[0].text.strip()
-                    
-                    # A expressão regular tentará pegar o número, mas só se encontrar um número válido
-                    if re.search(r"\d+", texto_revisao):
-                        revisao_atual = int(re.search(r"\d+", texto_revisao).group())
-                        maior_revisao = max(maior_revisao, revisao_atual)
-                    else:
-                        print("Nenhum número de revisão encontrado nesta linha.")
-                except (ValueError, AttributeError) as e:
-                    print(f"Erro ao processar a linha: {e}")
-                    continue
-
-            # Cria a nova revisão
-            nova_revisao = maior_revisao + 1
-            data_atual = datetime.now().strftime("%d/%m/%Y")
-
-            # Adiciona uma linha no final para evitar sobrescrever linhas existentes
-            nova_linha = tabela.add_row()
-
-            # Preenche a nova linha com os dados
-            nova_linha.cells[0].text = str(nova_revisao).zfill(2)
-            nova_linha.cells[1].text = "Revisão dos documentos mediante ao CM-TBS-00728;"
-            nova_linha.cells[2].text = data_atual
-
-            # Copia a formatação da célula acima para a nova célula
-            for i, cell in enumerate(nova_linha.cells):
-                # Acessa a célula da linha acima usando o índice
-                celula_acima = tabela.cell(len(tabela.rows) - 2, i)  # Índice da linha acima (penúltima linha)
-
-                # Copiar a formatação de texto da célula acima
-                for par in celula_acima.paragraphs:
-                    if par.text.strip():  # Se houver texto
-                        for run in par.runs:
-                            # Aplica a formatação da célula acima
-                            for new_paragraph in cell.paragraphs:
-                                for new_run in new_paragraph.runs:
-                                    new_run.font.name = run.font.name
-                                    new_run.font.size = run.font.size
-                                    new_run.font.bold = run.font.bold
-                                    new_run.font.italic = run.font.italic
-                                    new_run.font.underline = run.font.underline
-
-                # Copiar a cor de fundo (shading) se existir
-                try:
-                    celula_acima_format = celula_acima._element.xpath(".//w:shd")
-                    if celula_acima_format:
-                        # Adiciona o shading na nova célula sem remover da original
-                        if not cell._element.xpath(".//w:shd"):  # Verifica se já existe fundo
-                            shading_copy = deepcopy(celula_acima_format[0])  # Cria uma cópia do elemento
-                            cell._element.get_or_add_tcPr().append(shading_copy)
-                except Exception as e:
-                    print(f"Erro ao copiar a formatação de fundo: {e}")
-
-            # Aplica a formatação de fonte Arial, tamanho 9 e alinha as células
-            for cell in nova_linha.cells:
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        run.font.name = "Arial"  # Define a fonte Arial
-                        run.font.size = Pt(9)  # Define o tamanho da fonte 9
+    # Localiza a tabela de revisão pela legenda da primeira célula
+    entrada = indice_tabelas(documento).buscar("Nº Revisão")
+    tabela_revisao_encontrada = entrada is not None
+    if tabela_revisao_encontrada:
+        tabela = entrada.tabela
 
-                    # Alinha o texto da primeira, segunda e quarta coluna ao centro
-                    if paragraph.alignment != WD_ALIGN_PARAGRAPH.CENTER:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Determina o maior número de revisão
+        maior_revisao = 0
+        for linha in tabela.rows[1:]:  # Ignora o cabeçalho
+            try:
+                # Tenta capturar o número da revisão da primeira célula
+                texto_revisao = linha.cells[0].text.strip()
+                
+                # A expressão regular tentará pegar o número, mas só se encontrar um número válido
+                if re.search(r"\d+", texto_revisao):
+                    revisao_atual = int(re.search(r"\d+", texto_revisao).group())
+                    maior_revisao = max(maior_revisao, revisao_atual)
+                else:
+                    print("Nenhum número de revisão encontrado nesta linha.")
+            except (ValueError, AttributeError) as e:
+                print(f"Erro ao processar a linha: {e}")
+                continue
+
+        # Cria a nova revisão
+        nova_revisao = maior_revisao + 1
+        data_atual = datetime.now().strftime("%d/%m/%Y")
+
+        # Adiciona a nova revisão no final, clonando a última linha: a nova linha herda a
+        # formatação do texto e o fundo (shading) das células da linha acima
+        nova_linha = inserir_linha(tabela, len(tabela.rows), [
+            str(nova_revisao).zfill(2),
+            "Revisão dos documentos mediante ao CM-TBS-00728;",
+            data_atual,
+        ], limpar_restantes=True)
+
+        # Aplica a formatação de fonte Arial, tamanho 9 e alinha as células
+        for cell in nova_linha.cells:
+            for paragraph in cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.name = "Arial"  # Define a fonte Arial
+                    run.font.size = Pt(9)  # Define o tamanho da fonte 9
+
+                # Alinha o texto da primeira, segunda e quarta coluna ao centro
+                if paragraph.alignment != WD_ALIGN_PARAGRAPH.CENTER:
+                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-            break
 
     if not tabela_revisao_encontrada:
         print("Tabela de revisão não encontrada no documento.")
 
     # Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento, cabecalhos_rodapes=True))
 
 
 
@@ -359,13 +287,14 @@ def editar_celula_codigo_embalagem(caminho_arquivo, codigo_antigo, novo_codigo,
     - Alinha o texto ao centro e aplica a formatação de fonte Arial, tamanho 9.
 
     Args:
-        caminho_arquivo (str): Caminho do arquivo Word (.docx) original.
+        caminho_arquivo (str | Document): Caminho do arquivo Word (.docx) original ou documento já aberto.
         codigo_antigo (str): Código antigo que será localizado na tabela.
         novo_codigo (str): Novo código a ser adicionado ou substituído.
-        caminho_arquivo_salvo (str): Caminho do arquivo Word (.docx) salvo.
+        caminho_arquivo_salvo (str): Caminho do arquivo Word (.docx) salvo. Se None, o documento
+            não é salvo (a gravação fica a cargo de quem o abriu).
     """
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
+    documento = abrir_documento(caminho_arquivo)
     codigo_encontrado = False  # Flag para verificar se o código foi localizado
 
     # Percorre as tabelas do documento
@@ -404,122 +333,229 @@ def editar_celula_codigo_embalagem(caminho_arquivo, codigo_antigo, novo_codigo,
         print(f"Código '{codigo_antigo}' não encontrado no documento.")
 
     # Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
 
 
 
 
 def adicionar_nova_linha_com_codigo_embalagem(caminho_arquivo, novo_codigo, descricao, quantidade, unidade, caminho_arquivo_salvo):
     # Abre o arquivo Word
-    documento = Document(caminho_arquivo)
-
-    # Percorre as tabelas do documento
-    for tabela_index, tabela in enumerate(documento.tables):
-        
-        # Verifica se o cabeçalho está na primeira linha
-        if "Componentes – Material de Embalagem" in tabela.rows[0].cells[0].text:
-            
-
-            # Acha a posição do cabeçalho (linha 2, índice 1)
-            posicao_cabecalho = 2  # Cabeçalho está na segunda linha
-
-            # Copia os dados da linha 3 (primeira linha de dados reais)
-            linha_base = [celula.text for celula in tabela.rows[posicao_cabecalho + 1].cells]
-
-            # Modifica o código (primeira célula) da nova linha e deixa a descrição em branco
-            linha_base[0] = novo_codigo
-            linha_base[1] = ""  # Deixa a descrição em branco
-            linha_base[2] = descricao  # Insere a nova descrição (na coluna 3)
-            linha_base[3] = quantidade  # Insere a quantidade (na coluna 4)
-            linha_base[4] = unidade  # Insere a unidade (na coluna 5)
-
-            # Insere a nova linha após o cabeçalho e antes da linha 3
-            linhas_existentes = [[celula.text for celula in linha.cells] for linha in tabela.rows]
-            linhas_existentes.insert(posicao_cabecalho + 1, linha_base)
-
-            # Remove todas as linhas da tabela original
-            for _ in range(len(tabela.rows)):
-                tabela._element.remove(tabela.rows[0]._element)
-
-            # Recria a tabela com a primeira linha ajustada
-            for linha_index, linha_dados in enumerate(linhas_existentes):
-                nova_linha = tabela.add_row()
-                for idx, valor in enumerate(linha_dados):
-                    nova_linha.cells[idx].text = valor
-
-            # Exibe a tabela atualizada no console
-            for linha_index, linha in enumerate(tabela.rows):
-                conteudo_celulas = [celula.text.strip() for celula in linha.cells]
-            break  # Processa apenas a tabela correta
+    documento = abrir_documento(caminho_arquivo)
+
+    # Localiza a tabela pelo cabeçalho na primeira linha
+    entrada = indice_tabelas(documento).contendo("Componentes – Material de Embalagem")
+    if entrada:
+        tabela = entrada.tabela
+
+        # Acha a posição do cabeçalho (linha 2, índice 1)
+        posicao_cabecalho = 2  # Cabeçalho está na segunda linha
+
+        # Insere a nova linha após o cabeçalho e antes da linha 3, clonando a linha 3
+        # (primeira linha de dados reais): as demais colunas mantêm os dados dela
+        inserir_linha(tabela, posicao_cabecalho + 1, [
+            novo_codigo,
+            "",  # Deixa a descrição em branco
+            descricao,  # Insere a nova descrição (na coluna 3)
+            quantidade,  # Insere a quantidade (na coluna 4)
+            unidade,  # Insere a unidade (na coluna 5)
+        ])
 
     # Salva o documento com as alterações
-    documento.save(caminho_arquivo_salvo)
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
 
 def substituir_codigo_nucleo(file_path, codigo_antigo, codigo_novo, output_path):
     """
     Substitui o código antigo pelo novo em parágrafos e tabelas de um documento Word.
-    Aplica fonte Arial e tamanho 9 aos textos substituídos.
+    Apenas o texto do código é alterado; os runs e a formatação existentes são mantidos.
 
     Args:
-        file_path (str): Caminho do arquivo Word original.
+        file_path (str | Document): Caminho do arquivo Word original ou documento já aberto.
         codigo_antigo (str): Código antigo a ser substituído.
         codigo_novo (str): Novo código para substituir o antigo.
-        output_path (str): Caminho para salvar o documento modificado.
+        output_path (str): Caminho para salvar o documento modificado. Se None, o documento não é salvo.
     """
     # Abrir o arquivo Word
-    doc = Document(file_path)
+    doc = abrir_documento(file_path)
 
     # Substituir o código nos parágrafos
     for paragraph in doc.paragraphs:
-        if codigo_antigo in paragraph.text:
-            paragraph.text = paragraph.text.replace(codigo_antigo, codigo_novo)
-            # Aplica a formatação aos runs do parágrafo
-            for run in paragraph.runs:
-                run.font.name = "Arial"  # Define a fonte Arial
-                run.font.size = Pt(9)  # Define o tamanho 9pt
+        substituir_texto(paragraph, codigo_antigo, codigo_novo)
 
     # Substituir o código nas tabelas
     for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if codigo_antigo in cell.text:
-                    cell.text = cell.text.replace(codigo_antigo, codigo_novo)
-                    # Aplica a formatação aos runs dos parágrafos na célula
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.font.name = "Arial"  # Define a fonte Arial
-                            run.font.size = Pt(9)  # Define o tamanho 9pt
+        for cell in celulas_unicas(table):
+            substituir_texto(cell, codigo_antigo, codigo_novo)
 
     # Salvar o documento modificado
-    doc.save(output_path)
-    print(f"Arquivo salvo com sucesso em {output_path}")
+    if output_path:
+        salvar_documento(doc, output_path, file_path, partes_editadas(doc))
+        print(f"Arquivo salvo com sucesso em {output_path}")
 
 def adicionar_nova_linha_fabricacao(caminho_arquivo, texto_inicial_tabela, novo_codigo, descricao, dcb, quantidade, formula, formula_unitaria, caminho_arquivo_salvo):
     # Carregar o documento Word
-    documento = Document(caminho_arquivo)
-
-    # Iterar pelas tabelas no documento
-    for tabela in documento.tables:
-        # Verificar se a tabela começa com o texto inicial desejado
-        if tabela.rows[0].cells[0].text.strip().startswith(texto_inicial_tabela):
-            # Criar uma nova linha no final da tabela
-            nova_linha = tabela.add_row()
-
-            # Preencher os dados da nova linha
-            nova_linha.cells[0].text = ""
-            nova_linha.cells[1].text = novo_codigo  # Coluna vazia
-            nova_linha.cells[2].text = descricao
-            nova_linha.cells[3].text = dcb
-            nova_linha.cells[4].text = quantidade
-            nova_linha.cells[5].text = formula
-            nova_linha.cells[6].text = formula_unitaria
-
-            # Reordenar a tabela: Mover a nova linha para a posição desejada
-            nova_linha_xml = nova_linha._element  # Pegar o elemento XML da nova linha
-            tabela._tbl.remove(nova_linha_xml)  # Remover do final
-            tabela._tbl.insert(4, nova_linha_xml)  # Inserir sem substituir nenhuma linha (índice 5)
-
-            break  # Processar apenas a primeira tabela correspondente
+    documento = abrir_documento(caminho_arquivo)
+
+    # Localizar a primeira tabela que começa com o texto inicial desejado
+    entrada = indice_tabelas(documento).comecando_com(texto_inicial_tabela)
+    if entrada:
+        tabela = entrada.tabela
+        # Inserir a nova linha na terceira posição (índice 4 entre os filhos do w:tbl, após
+        # w:tblPr, w:tblGrid e as duas primeiras linhas), clonando a linha que ocupa essa posição
+        inserir_linha(tabela, 2, [
+            "",
+            novo_codigo,  # Coluna vazia
+            descricao,
+            dcb,
+            quantidade,
+            formula,
+            formula_unitaria,
+        ], limpar_restantes=True)
 
     # Salvar o documento atualizado
-    documento.save(caminho_arquivo_salvo)
\ No newline at end of file
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
+
+# Modos aceitos por aplicar_substituicoes_em_lote
+SUBSTITUICAO_CELULA = "celula"  # mesma regra de editar_celula_codigo_embalagem
+SUBSTITUICAO_TEXTO = "texto"  # mesma regra de substituir_codigo_nucleo
+
+
+def _validar_substituicao(substituicao):
+    """Retorna a mensagem de erro de uma substituição inválida, ou None."""
+    if substituicao.get("modo") not in (SUBSTITUICAO_CELULA, SUBSTITUICAO_TEXTO):
+        return f"modo inválido: {substituicao.get('modo')!r}"
+    if not str(substituicao.get("antigo") or "").strip():
+        return "código antigo vazio"
+    if not str(substituicao.get("novo") or "").strip():
+        return f"novo texto vazio para '{substituicao['antigo']}'"
+    return None
+
+
+def _formatar_celula_substituida(celula, substituicao):
+    for paragrafo in celula.paragraphs:
+        if substituicao.get("centralizar", substituicao["modo"] == SUBSTITUICAO_CELULA):
+            paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for run in paragrafo.runs:
+            run.font.name = substituicao.get("fonte", "Arial")
+            run.font.size = Pt(substituicao.get("tamanho", 9))
+
+
+def aplicar_substituicoes_em_lote(caminho_arquivo, substituicoes, caminho_arquivo_salvo):
+    """
+    Aplica várias substituições de código em uma única varredura do documento e o salva uma vez.
+
+    Cada substituição é um dicionário com:
+    - "antigo": código a localizar;
+    - "novo": código novo;
+    - "modo": SUBSTITUICAO_CELULA (célula cujo texto é exatamente o código; se o código
+      começa com "3" é substituído, senão recebe o novo entre parênteses, como em
+      editar_celula_codigo_embalagem) ou SUBSTITUICAO_TEXTO (substitui o código por "novo"
+      em parágrafos e células, como em substituir_codigo_nucleo);
+    - "fonte", "tamanho", "centralizar" (opcionais): formatação aplicada ao texto alterado.
+      No modo SUBSTITUICAO_TEXTO apenas os nós de texto do código são alterados e a
+      formatação existente é mantida, salvo "fonte" e "tamanho" informados.
+
+    Cada célula física é contada uma única vez. Uma célula mesclada verticalmente aparece
+    em várias linhas da tabela, e o mesmo código pode ser lido (e informado no lote) uma
+    vez por linha. Nesse caso, as repetições que sobram depois de o código ter sido
+    encontrado são ignoradas, como no fluxo anterior, que editava a célula uma vez e seguia.
+
+    O lote é transacional: todas as substituições são validadas e localizadas antes de
+    qualquer alteração. Se alguma for inválida ou não for encontrada, nada é alterado e
+    o arquivo não é salvo. Um erro durante a aplicação restaura o corpo do documento.
+
+    Args:
+        caminho_arquivo (str | Document): Caminho do arquivo Word (.docx) ou documento já aberto.
+        substituicoes (list): Lista de substituições.
+        caminho_arquivo_salvo (str): Caminho do arquivo salvo. Se None, o documento não é salvo.
+
+    Returns:
+        int: Quantidade de parágrafos e células alterados.
+
+    Raises:
+        ValueError: Se alguma substituição for inválida ou não for encontrada no documento.
+    """
+    erros = [erro for erro in map(_validar_substituicao, substituicoes) if erro]
+    if erros:
+        raise ValueError(f"Lote de substituições rejeitado: {'; '.join(erros)}")
+
+    documento = abrir_documento(caminho_arquivo)
+
+    # Códigos repetidos no modo célula alteram as ocorrências seguintes, na ordem do documento
+    pendentes_celula = {}
+    for substituicao in substituicoes:
+        if substituicao["modo"] == SUBSTITUICAO_CELULA:
+            pendentes_celula.setdefault(str(substituicao["antigo"]), []).append(substituicao)
+    substituicoes_texto = [s for s in substituicoes if s["modo"] == SUBSTITUICAO_TEXTO]
+
+    # 1. Localiza todos os alvos sem alterar o documento
+    alvos = []
+    encontrados_texto = set()
+    for paragrafo in documento.paragraphs:
+        for indice, substituicao in enumerate(substituicoes_texto):
+            if str(substituicao["antigo"]) in paragrafo.text:
+                alvos.append((paragrafo, substituicao))
+                encontrados_texto.add(indice)
+
+    celulas_visitadas = set()
+    codigos_celula_encontrados = set()
+    for tabela in documento.tables:
+        for linha in tabela.rows:
+            for celula in linha.cells:
+                # Células mescladas aparecem repetidas em linha.cells
+                if celula._tc in celulas_visitadas:
+                    continue
+                celulas_visitadas.add(celula._tc)
+
+                texto = celula.text
+                fila = pendentes_celula.get(texto.strip())
+                if fila:
+                    alvos.append((celula, fila.pop(0)))
+                    codigos_celula_encontrados.add(texto.strip())
+                for indice, substituicao in enumerate(substituicoes_texto):
+                    if str(substituicao["antigo"]) in texto:
+                        alvos.append((celula, substituicao))
+                        encontrados_texto.add(indice)
+
+    erros = [
+        f"código '{codigo}' não encontrado em nenhuma célula"
+        for codigo, fila in pendentes_celula.items()
+        if fila and codigo not in codigos_celula_encontrados
+    ]
+    erros += [
+        f"código '{substituicao['antigo']}' não encontrado no documento"
+        for indice, substituicao in enumerate(substituicoes_texto)
+        if indice not in encontrados_texto
+    ]
+    if erros:
+        raise ValueError(f"Lote de substituições rejeitado: {'; '.join(erros)}")
+
+    # 2. Aplica as substituições, restaurando o corpo do documento em caso de erro
+    corpo_original = deepcopy(documento.element.body)
+    try:
+        for alvo, substituicao in alvos:
+            antigo = str(substituicao["antigo"])
+            novo = str(substituicao["novo"])
+            if substituicao["modo"] == SUBSTITUICAO_CELULA:
+                alvo.text = novo if antigo.startswith("3") else f"{antigo} ({novo})"
+                _formatar_celula_substituida(alvo, substituicao)
+            else:
+                # Mantém os runs; a formatação só é aplicada se informada no lote
+                for run in substituir_texto(alvo, antigo, novo):
+                    if "fonte" in substituicao:
+                        run.font.name = substituicao["fonte"]
+                    if "tamanho" in substituicao:
+                        run.font.size = Pt(substituicao["tamanho"])
+    except Exception:
+        # Mantém o mesmo elemento w:body, que já está referenciado pelo objeto Document
+        corpo = documento.element.body
+        for filho in list(corpo):
+            corpo.remove(filho)
+        corpo.extend(list(corpo_original))
+        raise
+
+    if caminho_arquivo_salvo:
+        salvar_documento(documento, caminho_arquivo_salvo, caminho_arquivo, partes_editadas(documento))
+    return len(alvos)
@@ -1,46 +1,78 @@
 import pandas as pd
 import re
+from itertools import islice
 from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_FORMULA
 from xlsxwriter import Workbook as XWorkBook
 from datetime import datetime
 from openpyxl.styles import Alignment
-import win32com.client as win32
+from src.utils.document_converter import FORMATO_XLSX, converter_arquivo
+from src.utils.xlsx_repair import preparar_xlsx
+from src.utils.merged_cells_index import celula_gravavel, indice_mesclagens, inserir_linhas
+from src.utils.sheet_structure import analisar_secao_revisoes
+from src.utils.de_para_utils import DeParaIndex, carregar_de_para, CODIGO_NAO_ENCONTRADO
 
-def buscar_descricao_para(codigo_de, df):
+def buscar_descricao_para(codigo_de, de_para):
     codigo_de_formatado = str(codigo_de).split(" ")[0]
     try:
-        resultado = df.loc[df['Codigo - DE'].astype(str) == str(codigo_de_formatado)]
-        if not resultado.empty:
-            return str(resultado['Descrição Item'].iloc[0])
-        return ""
+        return de_para.descricao(codigo_de_formatado)
     except Exception as e:
         return f'Erro: {e}'
 # Função para buscar na tabela DePara
-def buscar_codigo_para(codigo_de, df):
+def buscar_codigo_para(codigo_de, de_para):
     codigo_de_formatado = str(codigo_de).split(" ")[0]
     try:
-        resultado = df.loc[df['Codigo - DE'].astype(str) == str(codigo_de_formatado)]
-        if not resultado.empty:
-            return str(resultado['Codigo -  PARA'].iloc[0])
-        return 'Código não encontrado'
+        return de_para.codigo_para(codigo_de_formatado, CODIGO_NAO_ENCONTRADO)
     except Exception as e:
         return f'Erro: {e}'
     
-def edit_excel_codigo(arquivo_principal, arquivo_consulta, excel_type_verification):
-    # Carregar o arquivo principal sem cabeçalhos
-    df = pd.read_excel(arquivo_principal, header=None)
+def dataframe_planilha(ws):
+    """
+    Monta o DataFrame de pd.read_excel(header=None) a partir de uma aba já carregada.
+
+    O pandas aceita o workbook já carregado pelo openpyxl (ver pandas.ExcelFile) e lê a
+    aba com as mesmas regras de pd.read_excel, sem abrir o arquivo de novo. Ao percorrer
+    a aba, o openpyxl cria as células vazias do intervalo usado; elas não têm valor nem
+    estilo e não alteram o conteúdo gravado.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Aba carregada com load_workbook.
+
+    Returns:
+        pandas.DataFrame: DataFrame da aba, ou None se a aba tem fórmulas (o pandas lê os
+            valores calculados gravados no arquivo, que a aba carregada não tem).
+    """
+    for linha in ws.iter_rows():
+        if any(celula.data_type == TYPE_FORMULA for celula in linha):
+            return None
+
+    return pd.read_excel(ws.parent, sheet_name=ws.title, header=None, engine="openpyxl")
 
-    # Carregar o arquivo DePara
-    df_consulta = pd.read_excel(arquivo_consulta, header=2)
 
+def coluna_lista_fornecedores(excel_type_verification):
+    """Coluna (1 = A) com os códigos DE da lista de fornecedores: A no TYPE_A e F no TYPE_B."""
+    return 1 if excel_type_verification == "TYPE_A" else 6
+
+
+def traduzir_lista_fornecedores(df, de_para, excel_type_verification, secao):
+    """
+    Traduz os códigos da lista de fornecedores lida em um DataFrame (header=None).
+
+    Args:
+        secao (RevisionSection): Análise da coluna da lista na aba de onde o DataFrame
+            foi lido (ver analisar_secao_revisoes), com o fim da lista.
+
+    Returns:
+        tuple: (textos da coluna B por linha a partir da linha 4, códigos DE lidos)
+    """
     # Capturar a coluna A (índice 0) a partir da linha 3 (índice 2 em pandas)
-    coluna_a = df.iloc[3:,0 if excel_type_verification == "TYPE_A" else 5]
+    coluna_a = df.iloc[3:,coluna_lista_fornecedores(excel_type_verification) - 1]
 
-    # Encontrar a posição onde está "REVISÃO" e parar antes dessa linha
-    posicao_parada = coluna_a[coluna_a.astype(str).str.contains("REVISÃO", na=False)].index.min()
+    # Posição (índice do pandas) da linha onde está "REVISÃO"
+    posicao_parada = secao.linha_fim_lista - 1 if secao.linha_fim_lista else None
 
     # Ajustar para capturar apenas até a linha antes da palavra "REVISÃO"
-    if pd.notna(posicao_parada):  # Verificar se a posição de parada é válida
+    if posicao_parada is not None:  # Verificar se a posição de parada é válida
         coluna_a = coluna_a.iloc[:(posicao_parada-1)].reset_index(drop=True)
     else:
         print("O valor 'REVISÃO' não foi encontrado. Capturando toda a coluna.")
@@ -49,46 +81,78 @@ def edit_excel_codigo(arquivo_principal, arquivo_consulta, excel_type_verificati
     # Remover células vazias ou inválidas
     coluna_a = coluna_a.dropna().astype(str)
 
-    # Processar códigos com \n e buscar na tabela DePara
-    def processar_multiplos_codigos(valor, df):
-        codigos = str(valor).split('\n')  # Dividir os códigos
-        resultados = []
-        
-        if excel_type_verification == "TYPE_A":
-            resultados = [buscar_codigo_para(codigo.strip(), df) for codigo in codigos]
-        else:
-            resultados = [f"{buscar_codigo_para(codigo.strip(), df)} {buscar_descricao_para(codigo.strip(), df)}" for codigo in codigos]
-        return '\n'.join(map(str, resultados))  # Garantir que todos os resultados são strings
+    # Separar as células com vários códigos (\n) em uma linha por código
+    listas_codigos = coluna_a.str.split('\n')
+    codigos = listas_codigos.explode()
 
-    # Aplicar a função para processar múltiplos códigos
-    coluna_b = coluna_a.apply(
-        lambda valor: processar_multiplos_codigos(valor, df_consulta)
+    # Traduzir todos os códigos de uma vez na tabela DePara
+    codigos_para, descricoes = de_para.traduzir_serie(codigos)
+    codigos_para = codigos_para.fillna(CODIGO_NAO_ENCONTRADO)
+
+    if excel_type_verification == "TYPE_A":
+        traduzidos = codigos_para
+    else:
+        traduzidos = codigos_para + " " + descricoes.fillna("")
+
+    # Remontar o texto de cada célula na ordem original
+    partes = iter(traduzidos.tolist())
+    coluna_b = pd.Series(
+        ['\n'.join(islice(partes, quantidade)) for quantidade in listas_codigos.str.len()],
+        index=coluna_a.index,
     )
 
-    # Carregar o arquivo Excel original com openpyxl para preservar a formatação
-    wb = load_workbook(arquivo_principal)
-    ws = wb.active
-    
+    return coluna_b, codigos.str.strip().str.split(" ").str[0].tolist()
+
+
+def gravar_coluna_traduzida(ws, coluna_b, excel_type_verification):
+    """Grava os códigos traduzidos na coluna B (TYPE_A) ou G (TYPE_B) da aba, a partir da linha 4."""
     coluna_b_index = 2 if excel_type_verification == "TYPE_A" else 7
 
+    # Índice das células mescladas da aba, construído uma única vez
+    mesclagens = indice_mesclagens(ws)
+
     # Atualizar somente a coluna B (índice 1 no Excel, começando na linha 3)
     for i, valor in enumerate(coluna_b, start=4):
         # Verificar se a célula correspondente na coluna A não está vazia
         if ws.cell(row=i, column=1).value:  # Apenas atualiza se a célula da coluna A não estiver vazia
-            # Verificar se a célula é mesclada
-            if not ws.cell(row=i, column=coluna_b_index).coordinate in ws.merged_cells:
-                ws.cell(row=i, column=coluna_b_index, value=valor)  # Atualizar somente células não mescladas
-            else:
-                # Identificar a célula superior esquerda do merge e atualizar
-                for merged_range in ws.merged_cells.ranges:
-                    if ws.cell(row=i, column=2).coordinate in merged_range:
-                        top_left = merged_range.min_row, merged_range.min_col
-                        ws.cell(row=top_left[0], column=top_left[1], value=valor)
-                        break
+            # Células mescladas são atualizadas na célula superior esquerda do merge
+            celula_gravavel(ws, i, coluna_b_index, mesclagens).value = valor
+
+
+def edit_excel_codigo(arquivo_principal, de_para, excel_type_verification):
+    """
+    Traduz os códigos da lista de fornecedores conforme a tabela DE-PARA.
+
+    Args:
+        arquivo_principal (str): Caminho para o arquivo Excel a ser editado.
+        de_para (DeParaIndex | str): Tabela DE-PARA já carregada. Um caminho para a
+            planilha DE-PARA ainda é aceito como alternativa, mas força uma nova leitura.
+        excel_type_verification (str): Tipo do arquivo ("TYPE_A" ou "TYPE_B").
+
+    Returns:
+        list: Códigos DE lidos da lista de fornecedores, usados no índice reverso de códigos.
+    """
+    # Carregar o arquivo principal sem cabeçalhos
+    df = pd.read_excel(arquivo_principal, header=None)
+
+    # Carregar o arquivo DePara apenas se não foi fornecido já carregado
+    if not isinstance(de_para, DeParaIndex):
+        de_para = carregar_de_para(de_para)
+
+    # Carregar o arquivo Excel original com openpyxl para preservar a formatação
+    wb = load_workbook(arquivo_principal)
+
+    # O pandas lê a primeira aba; o fim da lista é procurado na mesma aba
+    secao = analisar_secao_revisoes(wb.worksheets[0], coluna_lista_fornecedores(excel_type_verification))
+    coluna_b, codigos = traduzir_lista_fornecedores(df, de_para, excel_type_verification, secao)
+
+    gravar_coluna_traduzida(wb.active, coluna_b, excel_type_verification)
 
     # Salvar o arquivo preservando a formatação
     wb.save(arquivo_principal)
 
+    return codigos
+
 def adicionar_revisao(arquivo_principal, motivo, data=None):
     """
     Adiciona uma nova revisão ao arquivo Excel com base na última revisão encontrada,
@@ -101,39 +165,39 @@ def adicionar_revisao(arquivo_principal, motivo, data=None):
     """
     # Carregar o arquivo Excel original com openpyxl para preservar a formatação
     wb = load_workbook(arquivo_principal)
-    ws = wb.active
-
-    # Identificar a linha onde começam as revisões (procurar pela palavra "REVISÃO")
-    linha_revisoes = None
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value and "REVISÃO" in str(cell.value).upper():
-                linha_revisoes = cell.row
-                break
-        if linha_revisoes:
-            break
-
-    if not linha_revisoes:
-        print("Não foi possível encontrar a seção de revisões.")
+    nova_revisao = adicionar_revisao_planilha(wb.active, motivo, data)
+    if nova_revisao is None:
         return
 
-    # Encontrar a última linha com revisão
-    ultima_linha = linha_revisoes + 1
-    ultima_revisao = 0  # Inicializar com 0 caso não haja revisões anteriores
+    # Salvar o arquivo preservando a formatação
+    wb.save(arquivo_principal)
+    print(f"Revisão {nova_revisao} adicionada com sucesso.")
+
+
+def adicionar_revisao_planilha(ws, motivo, data=None, secao=None):
+    """
+    Adiciona a nova revisão em uma aba já carregada (ver adicionar_revisao), sem salvar.
+
+    Args:
+        secao (RevisionSection, optional): Análise da coluna A da aba, se já feita.
+
+    Returns:
+        int: Número da nova revisão, ou None se a seção de revisões não foi encontrada.
+    """
+    # Seção de revisões (título "REVISÃO" e números das revisões na coluna A)
+    if secao is None:
+        secao = analisar_secao_revisoes(ws)
+
+    if not secao.linha_titulo:
+        print("Não foi possível encontrar a seção de revisões.")
+        return
 
-    while True:
-        valor_celula = ws.cell(row=ultima_linha, column=1).value  # Assume que a coluna 1 contém os números das revisões
-        if valor_celula is None:  # Se a célula estiver vazia, é o fim das revisões
-            break
-        try:
-            # Tentar converter para inteiro para identificar o número da última revisão
-            ultima_revisao = int(valor_celula)
-        except ValueError:
-            pass  # Ignorar valores não numéricos
-        ultima_linha += 1
+    # Linha após a última revisão
+    ultima_linha = secao.ultima_linha
+    ultima_revisao = secao.ultima_revisao
 
-    # Inserir uma nova linha
-    ws.insert_rows(ultima_linha)
+    # Inserir uma nova linha (deslocando as mesclagens abaixo dela)
+    inserir_linhas(ws, ultima_linha)
 
     # Determinar o número da nova revisão
     nova_revisao = ultima_revisao + 1
@@ -143,12 +207,11 @@ def adicionar_revisao(arquivo_principal, motivo, data=None):
         data = datetime.now().strftime('%d/%m/%Y')
 
     # Adicionar a nova revisão
-    # Mesclar A, B, C para a nova revisão
+    # Mesclar A, B, C para a nova revisão e D, E, F para o motivo
     ws.merge_cells(start_row=ultima_linha, start_column=1, end_row=ultima_linha, end_column=3)
-    celula_revisao = ws.cell(row=ultima_linha, column=1, value=nova_revisao)  # Coluna A (mesclada com B e C)
-
-    # Mesclar D, E, F para o motivo
     ws.merge_cells(start_row=ultima_linha, start_column=4, end_row=ultima_linha, end_column=6)
+
+    celula_revisao = ws.cell(row=ultima_linha, column=1, value=nova_revisao)  # Coluna A (mesclada com B e C)
     celula_motivo = ws.cell(row=ultima_linha, column=4, value=motivo)  # Coluna D (mesclada com E e F)
 
     # Colocar a data na coluna G
@@ -160,9 +223,7 @@ def adicionar_revisao(arquivo_principal, motivo, data=None):
     celula_motivo.alignment = alinhamento_centro
     celula_data.alignment = alinhamento_centro
 
-    # Salvar o arquivo preservando a formatação
-    wb.save(arquivo_principal)
-    print(f"Revisão {nova_revisao} adicionada com sucesso.")
+    return nova_revisao
 
 
 def get_excel_footer(file_path):
@@ -195,65 +256,63 @@ def get_excel_footer(file_path):
 
 def convert_to_xlsx(file_path):
     """Converte o arquivo para .xlsx novamente para corrigir possíveis problemas de arquivo."""
-    excel = win32.gencache.EnsureDispatch('Excel.Application')
-    excel.DisplayAlerts = False
     try:
-        wb = excel.Workbooks.Open(file_path)
+        # A instância do Excel é mantida aberta pelo pool de conversores entre os arquivos
         file_path_xlsx = file_path  # Adiciona _reparado para evitar sobrescrever
-        wb.SaveAs(file_path_xlsx, FileFormat=51)  # 51 = formato .xlsx
-        wb.Close()
-        return file_path_xlsx
+        return converter_arquivo(file_path, file_path_xlsx, FORMATO_XLSX)
     except Exception as e:
         print(f"Erro ao converter o arquivo: {e}")
         return file_path
-    finally:
-        excel.Quit()
 
 def update_excel_footer(file_path):
     try:
-        # Converter para .xlsx novamente (mesmo que já seja .xlsx)
-        #função criada para bug de carregamento de workbook do excel file
+        # A conversão pelo Excel (contorno para falhas de carregamento do workbook) só é
+        # usada quando a planilha não pode ser lida nem reparada no zip/XML
         if file_path.endswith(".xlsx"):
-            file_path = convert_to_xlsx(file_path)
+            file_path = preparar_xlsx(file_path, convert_to_xlsx)
 
         # Carregar o arquivo Excel para verificar o rodapé
         wb = load_workbook(file_path)
-        sheet = wb.active
-
-        rodape_esquerdo = str(sheet.oddFooter.left.text) if sheet.oddFooter.left.text else ""
-        match = re.search(r"(Revisão\s+)(\d+)", rodape_esquerdo)
-
-        if match:
-            # Atualiza a revisão no rodapé
-            prefixo = match.group(1)
-            numero_atual = int(match.group(2))
-            novo_numero = numero_atual + 1
-            novo_rodape = rodape_esquerdo.replace(f"{prefixo}{numero_atual:02}", f"{prefixo}{novo_numero:02}")
-            sheet.oddFooter.left.text = novo_rodape
-            wb.save(file_path)
-            print(f"Rodapé atualizado: {novo_rodape}")
-        else:
-            print("Número de revisão não encontrado no rodapé. Verificando na coluna A...")
-
-            # Verificar revisão na coluna A usando openpyxl
-            for row in sheet.iter_rows(min_col=1, max_col=1, min_row=1):
-                for cell in row:
-                    # Imprimir o valor de cada célula para ver o que está sendo processado
-                    print(f"Verificando célula: {cell.value}")
-
-                    if isinstance(cell.value, str):
-                        # A expressão regular agora está procurando por "revisão" seguido de um número após uma vírgula
-                        match_col_a = re.search(r"(revisão\s+)(\d+)", cell.value, re.IGNORECASE)
-                        if match_col_a:
-                            # Construa o novo texto preservando o resto da string, mas substituindo o número da revisão
-                            novo_texto = cell.value.replace(match_col_a.group(0), f"{match_col_a.group(1)}{int(match_col_a.group(2)) + 1:02}")
-                            cell.value = novo_texto
-                            print(f"Revisão encontrada e alterada: {novo_texto}")
-
-            # Salvar o arquivo atualizado na coluna A
-            wb.save(file_path)
-            print("Revisões atualizadas na coluna A e no rodapé.")
+        atualizar_rodape_planilha(wb.active)
+        wb.save(file_path)
 
     except Exception as e:
         print(f"Erro ao processar o arquivo: {e}")
 
+
+def atualizar_rodape_planilha(sheet):
+    """
+    Incrementa a revisão do rodapé esquerdo de uma aba já carregada ou, se o rodapé
+    não tem revisão, as revisões da coluna A (ver update_excel_footer), sem salvar.
+    """
+    rodape_esquerdo = str(sheet.oddFooter.left.text) if sheet.oddFooter.left.text else ""
+    match = re.search(r"(Revisão\s+)(\d+)", rodape_esquerdo)
+
+    if match:
+        # Atualiza a revisão no rodapé
+        prefixo = match.group(1)
+        numero_atual = int(match.group(2))
+        novo_numero = numero_atual + 1
+        novo_rodape = rodape_esquerdo.replace(f"{prefixo}{numero_atual:02}", f"{prefixo}{novo_numero:02}")
+        sheet.oddFooter.left.text = novo_rodape
+        print(f"Rodapé atualizado: {novo_rodape}")
+    else:
+        print("Número de revisão não encontrado no rodapé. Verificando na coluna A...")
+
+        # Verificar revisão na coluna A usando openpyxl
+        mesclagens = indice_mesclagens(sheet)
+        for row in sheet.iter_rows(min_col=1, max_col=1, min_row=1):
+            for cell in row:
+                # Imprimir o valor de cada célula para ver o que está sendo processado
+                print(f"Verificando célula: {cell.value}")
+
+                if isinstance(cell.value, str):
+                    # A expressão regular agora está procurando por "revisão" seguido de um número após uma vírgula
+                    match_col_a = re.search(r"(revisão\s+)(\d+)", cell.value, re.IGNORECASE)
+                    if match_col_a:
+                        # Construa o novo texto preservando o resto da string, mas substituindo o número da revisão
+                        novo_texto = cell.value.replace(match_col_a.group(0), f"{match_col_a.group(1)}{int(match_col_a.group(2)) + 1:02}")
+                        celula_gravavel(sheet, cell.row, cell.column, mesclagens).value = novo_texto
+                        print(f"Revisão encontrada e alterada: {novo_texto}")
+
+        print("Revisões atualizadas na coluna A e no rodapé.")
@@ -0,0 +1,184 @@
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.utils.logger import ProcessType, get_logger
+from src.utils.xlsx_repair import preparar_xlsx
+from src.utils.verify_excel_type import classificar_excel
+from src.utils.de_para_utils import DeParaIndex, carregar_de_para
+from src.utils.sheet_structure import analisar_secao_revisoes
+from src.utils.edit_files_utils_excel import (
+    adicionar_revisao_planilha,
+    atualizar_rodape_planilha,
+    coluna_lista_fornecedores,
+    convert_to_xlsx,
+    dataframe_planilha,
+    gravar_coluna_traduzida,
+    traduzir_lista_fornecedores,
+)
+
+
+class ExcelSession:
+    """
+    Sessão de trabalho sobre uma única planilha Excel.
+
+    Substitui a sequência verify_excel_type, edit_excel_codigo, adicionar_revisao e
+    update_excel_footer, em que cada etapa lia (e as edições gravavam) o arquivo de
+    novo: a planilha é preparada (ver preparar_xlsx) no máximo uma vez, carregada
+    pelo openpyxl uma única vez e gravada uma única vez em commit().
+
+    A classificação continua sendo feita pela leitura somente leitura de
+    classificar_excel, que não monta as células e pode ser evitada pelo cache de
+    extrações; a lista de fornecedores é lida da própria aba carregada.
+    """
+
+    def __init__(self, caminho_arquivo, caminho_arquivo_salvo=None):
+        """
+        Args:
+            caminho_arquivo (str): Caminho da planilha .xlsx.
+            caminho_arquivo_salvo (str, optional): Caminho de gravação. Se None, sobrescreve o original.
+        """
+        self.caminho_arquivo = caminho_arquivo
+        self.caminho_arquivo_salvo = caminho_arquivo_salvo or caminho_arquivo
+        self._workbook = None
+        self._preparado = False
+        self._secoes = {}
+        self.edicoes = 0
+        self.gravacoes = 0
+        self.tempos = {}
+
+    def _medir(self, etapa, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            self.tempos[etapa] = self.tempos.get(etapa, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def _preparar(self):
+        """Garante, uma única vez, que a planilha pode ser lida sem abrir o Excel quando possível."""
+        if not self._preparado and self.caminho_arquivo.endswith(".xlsx"):
+            self.caminho_arquivo = self._medir("preparação", preparar_xlsx, self.caminho_arquivo, convert_to_xlsx)
+        self._preparado = True
+
+    @property
+    def workbook(self):
+        """
+        Workbook completo em memória, carregado na primeira operação que o utiliza.
+
+        A planilha é preparada antes da carga mesmo quando o tipo veio do cache de
+        extrações e classificar() não foi executado.
+        """
+        if self._workbook is None:
+            self._preparar()
+            self._workbook = self._medir("carga", load_workbook, self.caminho_arquivo)
+        return self._workbook
+
+    # Extração
+
+    def classificar(self):
+        """
+        Tipo da planilha (ver classificar_excel), ou None se não foi possível lê-la.
+
+        Returns:
+            str: "TYPE_A", "TYPE_B", "TYPE_C", "TYPE_D", "TYPE_REVISION", "INVALID_TYPE" ou None.
+        """
+        try:
+            self._preparar()
+            return self._medir("classificação", classificar_excel, self.caminho_arquivo)
+        except Exception as e:
+            print(f"Erro ao processar o arquivo: {e}")
+            return None
+
+    def _secao_revisoes(self, ws, coluna):
+        """Limites da seção de revisões na coluna da aba, analisados uma única vez (ver RevisionSection)."""
+        chave = (ws.title, coluna)
+        if chave not in self._secoes:
+            self._secoes[chave] = self._medir("estrutura", analisar_secao_revisoes, ws, coluna)
+        return self._secoes[chave]
+
+    def _dataframe(self):
+        """DataFrame da primeira aba, como lido por pd.read_excel(header=None)."""
+        self._preparar()
+        df = dataframe_planilha(self.workbook.worksheets[0])
+        if df is None:
+            # Abas com fórmulas: os valores calculados só existem no arquivo
+            df = pd.read_excel(self.caminho_arquivo, header=None)
+        return df
+
+    # Edição (sem gravar; a gravação acontece em commit)
+
+    def traduzir_codigos(self, de_para, excel_type_verification):
+        """
+        Traduz os códigos da lista de fornecedores conforme a tabela DE-PARA (ver edit_excel_codigo).
+
+        Returns:
+            list: Códigos DE lidos da lista de fornecedores.
+        """
+        self._preparar()
+        df = self._medir("leitura", self._dataframe)
+        if not isinstance(de_para, DeParaIndex):
+            de_para = self._medir("leitura DE-PARA", carregar_de_para, de_para)
+
+        # O DataFrame é o da primeira aba, como em pd.read_excel
+        secao = self._secao_revisoes(self.workbook.worksheets[0], coluna_lista_fornecedores(excel_type_verification))
+        coluna_b, codigos = self._medir("tradução", traduzir_lista_fornecedores, df, de_para, excel_type_verification, secao)
+        self._medir("tradução", gravar_coluna_traduzida, self.workbook.active, coluna_b, excel_type_verification)
+        self.edicoes += 1
+        return codigos
+
+    def adicionar_revisao(self, motivo, data=None):
+        """Adiciona uma nova revisão na seção de revisões (ver adicionar_revisao)."""
+        ws = self.workbook.active
+        secao = self._secao_revisoes(ws, 1)
+        nova_revisao = self._medir("revisão", adicionar_revisao_planilha, ws, motivo, data, secao)
+        if nova_revisao is None:
+            return None
+
+        # A nova linha desloca a seção; as análises anteriores deixam de valer
+        self._secoes.clear()
+        self.edicoes += 1
+        print(f"Revisão {nova_revisao} adicionada com sucesso.")
+        return nova_revisao
+
+    def atualizar_rodape(self):
+        """Incrementa a revisão do rodapé ou da coluna A (ver update_excel_footer)."""
+        try:
+            self._preparar()
+            self._medir("rodapé", atualizar_rodape_planilha, self.workbook.active)
+            self.edicoes += 1
+        except Exception as e:
+            print(f"Erro ao processar o arquivo: {e}")
+
+    # Gravação
+
+    def commit(self):
+        """
+        Grava a planilha uma única vez, se houve alguma edição, e registra o tempo de cada etapa.
+
+        Returns:
+            dict: Resumo da sessão (ver resumo()).
+        """
+        if self.edicoes:
+            self._medir("gravação", self.workbook.save, self.caminho_arquivo_salvo)
+            self.gravacoes += 1
+
+        resumo = self.resumo()
+        etapas = ", ".join(f"{etapa} {tempo:.0f} ms" for etapa, tempo in resumo["tempos"].items())
+        get_logger().info(
+            f"Sessão da planilha: {resumo['edicoes']} edição(ões), {self.gravacoes} gravação(ões) | {etapas}",
+            ProcessType.EXCEL,
+        )
+        return resumo
+
+    def resumo(self):
+        """
+        Returns:
+            dict: {'edicoes', 'gravacoes', 'tempos' (ms por etapa), 'tempo_total' (ms)}
+        """
+        return {
+            "edicoes": self.edicoes,
+            "gravacoes": self.gravacoes,
+            "tempos": dict(self.tempos),
+            "tempo_total": sum(self.tempos.values()),
+        }
@@ -0,0 +1,230 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+
+from src.config.config import get_caminho_cache
+from src.utils.logger import ProcessType, get_logger
+
+# Cache local das extrações, no mesmo diretório do cache da DE-PARA (ver get_caminho_cache)
+CACHE_ARQUIVO = 'extracoes.sqlite3'
+
+# Versão das regras de extração: incrementar quando a captura de códigos, tipos ou
+# tabelas mudar, para que os resultados gravados com a regra anterior sejam ignorados
+EXTRACAO_VERSAO = 1
+
+LIMITE_BYTES = 64 * 1024 * 1024
+LIMITE_ENTRADAS = 20000
+
+_SQL_TABELA = """
+CREATE TABLE IF NOT EXISTS extracoes (
+    sha256 TEXT NOT NULL,
+    fato TEXT NOT NULL,
+    versao INTEGER NOT NULL,
+    valor BLOB NOT NULL,
+    tamanho INTEGER NOT NULL,
+    gravado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL,
+    acertos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sha256, fato)
+)
+"""
+_SQL_INDICE = "CREATE INDEX IF NOT EXISTS extracoes_acessado_em ON extracoes (acessado_em)"
+
+
+def hash_arquivo(caminho_arquivo):
+    """SHA-256 do conteúdo do arquivo, lido em blocos de 1 MB."""
+    sha256 = hashlib.sha256()
+    with open(caminho_arquivo, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache local (SQLite) dos fatos extraídos de arquivos .docx e .xlsx.
+
+    As entradas são indexadas pelo SHA-256 do conteúdo do arquivo e pelo nome do fato
+    extraído (ex.: "triagem", "tipo_excel", "tabela_embalagem:<legenda>"), de modo que
+    um arquivo devolvido à fila com os mesmos bytes (após um ERRO ou um reinício da
+    execução) não precisa ser lido novamente. O cache é limitado em bytes e em
+    quantidade de entradas, descartando primeiro as entradas acessadas há mais tempo.
+
+    Falhas do SQLite nunca interrompem o processamento: a entrada é tratada como
+    ausente e o fato é extraído normalmente.
+    """
+
+    def __init__(self, caminho_banco=None, limite_bytes=LIMITE_BYTES, limite_entradas=LIMITE_ENTRADAS):
+        """
+        Args:
+            caminho_banco (str, optional): Arquivo SQLite. Padrão: extracoes.sqlite3 na pasta de cache.
+            limite_bytes (int): Tamanho máximo somado dos valores gravados.
+            limite_entradas (int): Quantidade máxima de entradas.
+        """
+        self.caminho_banco = caminho_banco or os.path.join(get_caminho_cache(), CACHE_ARQUIVO)
+        self.limite_bytes = limite_bytes
+        self.limite_entradas = limite_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.gravacoes = 0
+        self.descartes = 0
+        self._conexao = None
+        self._trava = threading.Lock()
+
+    def _conectar(self):
+        if self._conexao is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho_banco)), exist_ok=True)
+            conexao = sqlite3.connect(self.caminho_banco, timeout=5, check_same_thread=False)
+            conexao.execute(_SQL_TABELA)
+            conexao.execute(_SQL_INDICE)
+            conexao.commit()
+            self._conexao = conexao
+        return self._conexao
+
+    def obter(self, sha256, fato):
+        """
+        Retorna o valor gravado para o fato do arquivo.
+
+        Args:
+            sha256 (str): SHA-256 do conteúdo do arquivo (ver hash_arquivo).
+            fato (str): Nome do fato extraído.
+
+        Returns:
+            tuple: (True, valor) se encontrado ou (False, None) caso contrário.
+        """
+        with self._trava:
+            try:
+                conexao = self._conectar()
+                linha = conexao.execute(
+                    "SELECT valor FROM extracoes WHERE sha256 = ? AND fato = ? AND versao = ?",
+                    (sha256, fato, EXTRACAO_VERSAO),
+                ).fetchone()
+                if linha is None:
+                    self.falhas += 1
+                    return False, None
+
+                valor = pickle.loads(linha[0])
+                conexao.execute(
+                    "UPDATE extracoes SET acessado_em = ?, acertos = acertos + 1 WHERE sha256 = ? AND fato = ?",
+                    (time.time(), sha256, fato),
+                )
+                conexao.commit()
+            except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+                get_logger().warning(f"Não foi possível ler o cache de extrações: {e}", ProcessType.FILE)
+                self.falhas += 1
+                return False, None
+
+            self.acertos += 1
+            return True, valor
+
+    def gravar(self, sha256, fato, valor):
+        """Grava o valor extraído para o fato do arquivo e aplica os limites do cache."""
+        with self._trava:
+            try:
+                conteudo = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+                agora = time.time()
+                conexao = self._conectar()
+                conexao.execute(
+                    "INSERT OR REPLACE INTO extracoes (sha256, fato, versao, valor, tamanho, gravado_em, acessado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sha256, fato, EXTRACAO_VERSAO, conteudo, len(conteudo), agora, agora),
+                )
+                self._descartar(conexao)
+                conexao.commit()
+                self.gravacoes += 1
+            except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+                get_logger().warning(f"Não foi possível gravar o cache de extrações: {e}", ProcessType.FILE)
+
+    def obter_ou_extrair(self, sha256, fato, extrair):
+        """
+        Retorna o fato do cache ou o extrai com extrair() e grava o resultado.
+
+        None não é gravado: é o que as extrações devolvem quando não conseguem ler o
+        arquivo (ver ExcelSession.classificar), e gravá-lo prenderia o arquivo nesse
+        resultado enquanto o conteúdo não mudasse.
+
+        Args:
+            sha256 (str): SHA-256 do conteúdo do arquivo, ou None para não usar o cache.
+            fato (str): Nome do fato extraído.
+            extrair (callable): Função sem argumentos que extrai o fato do arquivo.
+        """
+        if sha256 is None:
+            return extrair()
+
+        encontrado, valor = self.obter(sha256, fato)
+        if encontrado:
+            return valor
+
+        valor = extrair()
+        if valor is not None:
+            self.gravar(sha256, fato, valor)
+        return valor
+
+    def _descartar(self, conexao):
+        """Remove as entradas acessadas há mais tempo até o cache respeitar os limites."""
+        quantidade, total = conexao.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM extracoes").fetchone()
+        if quantidade <= self.limite_entradas and total <= self.limite_bytes:
+            return
+
+        # Entradas de versões anteriores das regras nunca mais são lidas
+        self.descartes += conexao.execute("DELETE FROM extracoes WHERE versao != ?", (EXTRACAO_VERSAO,)).rowcount
+        quantidade, total = conexao.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM extracoes").fetchone()
+
+        remover = []
+        for sha256, fato, tamanho in conexao.execute(
+            "SELECT sha256, fato, tamanho FROM extracoes ORDER BY acessado_em"
+        ):
+            if quantidade <= self.limite_entradas and total <= self.limite_bytes:
+                break
+            remover.append((sha256, fato))
+            quantidade -= 1
+            total -= tamanho
+
+        conexao.executemany("DELETE FROM extracoes WHERE sha256 = ? AND fato = ?", remover)
+        self.descartes += len(remover)
+
+    def estatisticas(self):
+        """
+        Contadores da execução atual e ocupação do cache.
+
+        Returns:
+            dict: {'acertos', 'falhas', 'taxa_acerto', 'gravacoes', 'descartes', 'entradas', 'bytes'}
+        """
+        consultas = self.acertos + self.falhas
+        estatisticas = {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "gravacoes": self.gravacoes,
+            "descartes": self.descartes,
+            "entradas": 0,
+            "bytes": 0,
+        }
+        with self._trava:
+            try:
+                estatisticas["entradas"], estatisticas["bytes"] = self._conectar().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM extracoes"
+                ).fetchone()
+            except sqlite3.Error:
+                pass
+        return estatisticas
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+_cache_extracoes = None
+
+
+def get_extraction_cache():
+    """Retorna o cache de extrações da execução, criado na primeira chamada."""
+    global _cache_extracoes
+    if _cache_extracoes is None:
+        _cache_extracoes = ExtractionCache()
+    return _cache_extracoes
@@ -0,0 +1,112 @@
+# Atributo da aba em que o índice fica guardado (ver indice_mesclagens)
+_ATRIBUTO_INDICE = "_indice_mesclagens"
+
+
+def _assinatura(ws):
+    """Coordenadas dos intervalos mesclados da aba, para detectar mesclagens incluídas ou removidas."""
+    return frozenset(intervalo.coord for intervalo in ws.merged_cells.ranges)
+
+
+class MergedCellIndex:
+    """
+    Índice das células mescladas de uma aba do openpyxl.
+
+    Mapeia cada célula coberta por um intervalo mesclado para a célula superior
+    esquerda (âncora) do intervalo, de modo que a âncora de qualquer célula é obtida
+    em O(1), em vez de percorrer ws.merged_cells.ranges a cada consulta.
+    """
+
+    def __init__(self, ws):
+        """
+        Args:
+            ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+        """
+        self._assinatura = _assinatura(ws)
+        self._ancoras = {}
+        for intervalo in ws.merged_cells.ranges:
+            ancora = (intervalo.min_row, intervalo.min_col)
+            for linha in range(intervalo.min_row, intervalo.max_row + 1):
+                for coluna in range(intervalo.min_col, intervalo.max_col + 1):
+                    self._ancoras[(linha, coluna)] = ancora
+
+    def atualizado(self, ws):
+        """Indica se as mesclagens da aba ainda são as mesmas da construção do índice."""
+        return _assinatura(ws) == self._assinatura
+
+    def __contains__(self, celula):
+        """Indica se a célula (linha, coluna) faz parte de um intervalo mesclado."""
+        return celula in self._ancoras
+
+    def __len__(self):
+        return len(self._ancoras)
+
+    def ancora(self, linha, coluna):
+        """(linha, coluna) da âncora do intervalo mesclado da célula, ou None se a célula não é mesclada."""
+        return self._ancoras.get((linha, coluna))
+
+
+def indice_mesclagens(ws):
+    """
+    Retorna o índice de mesclagens da aba, construído na primeira chamada.
+
+    O índice fica guardado na própria aba, é reaproveitado pelas funções que editam a
+    mesma aba e é reconstruído se intervalos forem mesclados ou desfeitos.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+
+    Returns:
+        MergedCellIndex: Índice das células mescladas da aba.
+    """
+    indice = getattr(ws, _ATRIBUTO_INDICE, None)
+    if indice is None or not indice.atualizado(ws):
+        indice = MergedCellIndex(ws)
+        setattr(ws, _ATRIBUTO_INDICE, indice)
+    return indice
+
+
+def celula_gravavel(ws, linha, coluna, indice=None):
+    """
+    Célula em que um valor destinado a (linha, coluna) deve ser gravado.
+
+    Células mescladas (exceto a âncora) são somente leitura no openpyxl; para elas é
+    retornada a âncora do intervalo.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+        linha (int): Linha da célula.
+        coluna (int): Coluna da célula.
+        indice (MergedCellIndex, optional): Índice já obtido com indice_mesclagens(ws).
+
+    Returns:
+        openpyxl.cell.cell.Cell: Célula gravável.
+    """
+    if indice is None:
+        indice = indice_mesclagens(ws)
+    ancora = indice.ancora(linha, coluna)
+    if ancora is None:
+        return ws.cell(row=linha, column=coluna)
+    return ws.cell(row=ancora[0], column=ancora[1])
+
+
+def inserir_linhas(ws, linha, quantidade=1):
+    """
+    Insere linhas na aba deslocando também as mesclagens, como o Excel faz.
+
+    O ws.insert_rows do openpyxl move as células mas não os intervalos mesclados, que
+    passam a apontar para as linhas erradas (e a cobrir as linhas inseridas). Aqui os
+    intervalos abaixo da inserção descem junto com as células e os que atravessam a
+    linha de inserção são estendidos.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+        linha (int): Linha antes da qual as novas linhas são inseridas.
+        quantidade (int): Quantidade de linhas inseridas.
+    """
+    ws.insert_rows(linha, quantidade)
+    for intervalo in ws.merged_cells.ranges:
+        if intervalo.min_row >= linha:
+            intervalo.shift(row_shift=quantidade)
+        elif intervalo.max_row >= linha:
+            intervalo.expand(down=quantidade)
+            intervalo.format()  # Cria as células mescladas das linhas inseridas
@@ -3,15 +3,20 @@ import os
 import pandas as pd
 import logging
 import zipfile
+import posixpath
 from xml.etree import ElementTree as ET
 from docx import Document
-import win32com.client
+from docx.document import Document as DocumentoWord
 import re
+from functools import lru_cache
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.join(current_dir, '..') 
 sys.path.append(src_dir)
 
 from config.config import load_config, get_caminho_de_para 
+from src.utils.document_classifier import carregar_classificador
+from src.utils.document_converter import FORMATO_DOC, FORMATO_DOCX, converter_arquivo
+from src.utils.table_index import indice_tabelas, textos_linha
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -35,124 +40,198 @@ def read_excel_file(caminhoArquivo, header=2, sheet_name=0):
         return None
     
 
+def abrir_documento(documento):
+    """
+    Retorna o documento Word já aberto ou abre o arquivo .docx informado.
+
+    Permite que as funções de leitura e edição recebam tanto um caminho quanto um
+    documento carregado uma única vez (ver DocumentSession).
+
+    Args:
+        documento (str | docx.document.Document): Caminho do arquivo ou documento já aberto.
+
+    Returns:
+        docx.document.Document: Documento em memória.
+    """
+    if isinstance(documento, DocumentoWord):
+        return documento
+    return Document(documento)
+
+@lru_cache(maxsize=32)
+def _compilar_prefixos(prefixos):
+    """
+    Compila os prefixos em uma árvore de prefixos (trie), uma única vez por lista de prefixos.
+
+    Args:
+        prefixos (tuple): Prefixos que identificam o código.
+
+    Returns:
+        dict: Nó raiz da árvore; a chave None marca o fim de um prefixo.
+    """
+    raiz = {}
+    for prefixo in prefixos:
+        no = raiz
+        for caractere in prefixo:
+            no = no.setdefault(caractere, {})
+        no[None] = prefixo
+    return raiz
+
+def _prefixos_do_texto(arvore, texto):
+    """Prefixos com que o texto começa, do mais longo para o mais curto."""
+    encontrados = [arvore[None]] if None in arvore else []
+    no = arvore
+    for caractere in texto:
+        no = no.get(caractere)
+        if no is None:
+            break
+        if None in no:
+            encontrados.append(no[None])
+    encontrados.reverse()
+    return encontrados
+
+def _codigo_valido(codigo):
+    return bool(codigo) and codigo != ":"
+
+def _buscar_codigo_documento(paragrafos, tabelas, prefixos):
+    """
+    Regra de captura do código no corpo do documento, compartilhada pela leitura via
+    python-docx e pela leitura direta do XML.
+
+    Os prefixos são compilados uma única vez (ver _compilar_prefixos) e parágrafos e
+    células são percorridos uma única vez. Quando o prefixo não traz o código, a busca
+    fica pendente e é resolvida pelo próximo parágrafo não vazio (ou pela próxima
+    célula, nas tabelas), com o mesmo resultado da busca para frente feita antes.
+
+    Args:
+        paragrafos (list): Textos dos parágrafos do corpo.
+        tabelas (iterable): Tabelas do corpo, cada uma um iterável de linhas com os textos das células.
+        prefixos (list): Prefixos que identificam o código.
+    """
+    # Prefixos mais longos (mais específicos) têm prioridade
+    arvore = _compilar_prefixos(tuple(prefixos))
+
+    # Verifica parágrafos no documento
+    pendente = False
+    reserva = None  # Código de um prefixo menos específico do parágrafo pendente
+    for paragrafo in paragrafos:
+        texto = paragrafo.strip()
+
+        if pendente:
+            if not texto:
+                continue
+            # O próximo parágrafo não vazio é o código do prefixo pendente
+            if _codigo_valido(texto):
+                return texto.replace('.', '')
+            if reserva:
+                return reserva.replace('.', '')
+            pendente = False
+
+        codigos = [texto[len(prefixo):].strip() for prefixo in _prefixos_do_texto(arvore, texto)]
+        if not codigos:
+            continue
+        if _codigo_valido(codigos[0]):
+            return codigos[0].replace('.', '')
+
+        pendente = True
+        reserva = next((codigo for codigo in codigos[1:] if _codigo_valido(codigo)), None)
+
+    # Prefixo pendente no último parágrafo não vazio
+    if pendente and reserva:
+        return reserva.replace('.', '')
+
+    # Verifica tabelas no documento se o código não foi encontrado nos parágrafos
+    for tabela in tabelas:
+        for linha in tabela:
+            celulas = [celula.strip() for celula in linha]
+            for j, texto in enumerate(celulas):
+                for prefixo in _prefixos_do_texto(arvore, texto):
+                    codigo = texto[len(prefixo):].strip()
+
+                    if not codigo and j + 1 < len(celulas):
+                        codigo = celulas[j + 1]
+
+                    if _codigo_valido(codigo):
+                        return codigo.replace('.', '')
+
+    # Se nenhum código for encontrado
+    return "Nenhum código encontrado."
+
+def _tabelas_documento(tabelas):
+    """Textos das células de tabelas python-docx, calculados sob demanda linha a linha."""
+    return ((textos_linha(linha) for linha in tabela.rows) for tabela in tabelas)
+
+def _cabecalhos_documento(documento):
+    """Parágrafos e tabelas do cabeçalho principal de cada seção de um documento python-docx."""
+    for secao in documento.sections:
+        header = secao.header
+        yield [paragrafo.text for paragrafo in header.paragraphs], _tabelas_documento(header.tables)
+
 def capture_code_from_docx(caminho_arquivo, prefixos=["Código:", "CÓDIGO DO MATERIAL", "CÓDIGO", "Código do Produto: ", "CÓDIGO INTERNO DO MATERIAL"]):
     try:
-        # Ordena os prefixos por comprimento decrescente para dar prioridade aos mais específicos
-        prefixos = sorted(prefixos, key=len, reverse=True)
-        
         # Abre o arquivo Word
-        documento = Document(caminho_arquivo)
-        
-        # Verifica parágrafos no documento
-        for i, paragrafo in enumerate(documento.paragraphs):
-            texto = paragrafo.text.strip()
-            for prefixo in prefixos:  # Itera pelos prefixos em ordem de prioridade
-                if texto.startswith(prefixo):
-                    # Captura o código após o prefixo
-                    codigo = texto[len(prefixo):].strip()
-                    
-                    if not codigo or codigo == ":":
-                        for j in range(i + 1, len(documento.paragraphs)):
-                            prox_paragrafo = documento.paragraphs[j].text.strip()
-                            if prox_paragrafo:
-                                codigo = prox_paragrafo
-                                break
-                    
-                    # Retorna se encontrar um código válido
-                    if codigo and codigo != ":":
-                        return codigo.replace('.', '')
-        
-        # Verifica tabelas no documento se o código não foi encontrado nos parágrafos
-        for tabela in documento.tables:
-            for i, linha in enumerate(tabela.rows):
-                celulas = [celula.text.strip() for celula in linha.cells]
-                for j, texto in enumerate(celulas):
-                    for prefixo in prefixos:
-                        if texto.startswith(prefixo):
-                            codigo = texto[len(prefixo):].strip()
-                            
-                            if not codigo and j + 1 < len(celulas):
-                                codigo = celulas[j + 1].strip()
-                            
-                            if codigo and codigo != ":":
-                                return codigo.replace('.', '')
+        documento = abrir_documento(caminho_arquivo)
 
-        # Se nenhum código for encontrado
-        return "Nenhum código encontrado."
+        paragrafos = [paragrafo.text for paragrafo in documento.paragraphs]
+        return _buscar_codigo_documento(paragrafos, _tabelas_documento(documento.tables), prefixos)
     except Exception as e:
         logging.error(f"Erro ao tentar capturar o código do documento: {e}")
         return "Erro ao capturar o código."
 
-def get_headers_texts(caminho_arquivo):
+def _textos_tabelas_cabecalhos(cabecalhos):
     header_texts_data = []
-    documento = Document(caminho_arquivo)
+    for _, tabelas in cabecalhos:
+        for tabela in tabelas:
+            for linha in tabela:
+                for texto in linha:
+                    header_texts_data.append(texto.strip())
+    return header_texts_data
 
-    for secao in documento.sections:
-        header = secao.header
-        for tabela in header.tables:
-            for linha in tabela.rows:
-                celulas = [celula.text.strip() for celula in linha.cells]
-                for texto in celulas:
-                    header_texts_data.append(texto)
+def get_headers_texts(caminho_arquivo):
+    documento = abrir_documento(caminho_arquivo)
+    return _textos_tabelas_cabecalhos(_cabecalhos_documento(documento))
 
-    return header_texts_data
+def _classificar_cabecalho(header_texts):
+    """Classifica os textos das tabelas do cabeçalho pela planilha de categorias."""
+    return carregar_classificador().classificar(" ".join(header_texts))
 
-def capture_type_from_headers(caminho_arquivo):
-    header_texts_data = " ".join(get_headers_texts(caminho_arquivo)).replace("\n", " ").strip()
-    if "FICHA DE ANÁLISE" in header_texts_data:
-        return "FICHA DE ANÁLISE"
-    elif "INSTRUÇÃO DE EMBALAGEM" in header_texts_data:
-        return "INSTRUÇÃO DE EMBALAGEM"
-    elif "INSTRUÇÃO DE FABRICAÇÃO" in header_texts_data:
-        return "INSTRUÇÃO DE FABRICAÇÃO"
-    elif "ESPECIFICAÇÃO DE MATERIAL DE EMBALAGEM" in header_texts_data:
-        return "EME"
-    elif "ESPECIFICAÇÃO DE MATÉRIA PRIMA" in header_texts_data:
-        return "EMP"
-    elif "ESPECIFICAÇÃO DE PRODUTO ACABADO" in header_texts_data:
-        return "EPA"
-    elif "ESPECIFICAÇÃO DE PRODUTO EM ESTABILIDADE" in header_texts_data:
-        return "EPE"
-    elif "ESPECIFICAÇÃO DE PRODUTO INTERMEDIÁRIO" in header_texts_data:
-        return "EPI"
-    elif "MÉTODO DE ANÁLISE DE MATERIAL DE EMBALAGEM" in header_texts_data:
-        return "MAME"
-    elif "MÉTODO DE ANÁLISE DE MATÉRIA PRIMA" in header_texts_data:
-        return "MAMP"
-    elif "MÉTODO DE ANÁLISE DE PRODUTO ACABADO" in header_texts_data:
-        return "MAPA"
-    elif "METODOLOGIA DE ANÁLISE DE PRODUTO EM ESTABILIDADE" in header_texts_data:
-        return "MAPE"
-    elif "MÉTODO DE ANÁLISE PRODUTO DE INTERMEDIÁRIO" in header_texts_data:
-        return "MAPI"
-    else:
-        return None
+def _classificar_tipo_cabecalho(header_texts):
+    classificacao = _classificar_cabecalho(header_texts)
+    return classificacao["sigla"] if classificacao else None
 
-def capture_code_from_headers(caminho_arquivo, prefixos=["Código do Produto: "]):
+def classify_document_from_headers(caminho_arquivo):
     """
-    Função independente para buscar códigos e o texto 'INSTRUÇÃO DE EMBALAGEM' nos cabeçalhos do documento.
-    Verifica parágrafos e tabelas dentro dos cabeçalhos de cada seção.
+    Classifica o documento pelos títulos do cabeçalho.
 
     Args:
-        caminho_arquivo (str): Caminho para o arquivo .docx.
-        prefixos (list): Lista de prefixos para identificar os códigos.
+        caminho_arquivo (str | Document): Caminho para o arquivo .docx ou documento já aberto.
 
     Returns:
-        tuple: (código encontrado, instrução encontrada), ou ("Nenhum código encontrado", "Nenhuma instrução encontrada").
+        dict: {'categoria', 'categorias', 'tipo_arquivo', 'sigla'} ou None se o título não for reconhecido.
     """
-    documento = Document(caminho_arquivo)
+    return _classificar_cabecalho(get_headers_texts(caminho_arquivo))
 
+def capture_type_from_headers(caminho_arquivo):
+    return _classificar_tipo_cabecalho(get_headers_texts(caminho_arquivo))
+
+def _buscar_codigo_cabecalhos(cabecalhos, prefixos):
+    """
+    Regra de captura do código e da instrução nos cabeçalhos, compartilhada pela leitura
+    via python-docx e pela leitura direta do XML.
+
+    Args:
+        cabecalhos (iterable): Para cada seção, tupla (textos dos parágrafos, tabelas) do cabeçalho.
+        prefixos (list): Prefixos que identificam o código.
+    """
     # Variáveis para armazenar os resultados
     codigo_encontrado = None
     instrucao_encontrada = None
 
-    # Itera pelas seções do documento para acessar os cabeçalhos
-    for i, secao in enumerate(documento.sections):
-        header = secao.header  # Obtém o cabeçalho da seção
+    # Itera pelos cabeçalhos de cada seção do documento
+    for paragrafos, tabelas in cabecalhos:
 
         # Verifica parágrafos no cabeçalho
-        for paragrafo in header.paragraphs:
-            texto = paragrafo.text.strip()
+        for paragrafo in paragrafos:
+            texto = paragrafo.strip()
 
             # Verifica prefixos para código
             for prefixo in prefixos:
@@ -170,9 +249,9 @@ def capture_code_from_headers(caminho_arquivo, prefixos=["Código do Produto: "]
             
 
         # Verifica tabelas no cabeçalho
-        for t, tabela in enumerate(header.tables):
-            for linha in tabela.rows:
-                celulas = [celula.text.strip() for celula in linha.cells]
+        for tabela in tabelas:
+            for linha in tabela:
+                celulas = [celula.strip() for celula in linha]
                 for j, texto in enumerate(celulas):
                     # Verifica prefixos para código
                     for prefixo in prefixos:
@@ -198,24 +277,213 @@ def capture_code_from_headers(caminho_arquivo, prefixos=["Código do Produto: "]
 
     return codigo_encontrado, instrucao_encontrada
 
+def capture_code_from_headers(caminho_arquivo, prefixos=["Código do Produto: "]):
+    """
+    Função independente para buscar códigos e o texto 'INSTRUÇÃO DE EMBALAGEM' nos cabeçalhos do documento.
+    Verifica parágrafos e tabelas dentro dos cabeçalhos de cada seção.
+
+    Args:
+        caminho_arquivo (str | Document): Caminho para o arquivo .docx ou documento já aberto.
+        prefixos (list): Lista de prefixos para identificar os códigos.
+
+    Returns:
+        tuple: (código encontrado, instrução encontrada), ou ("Nenhum código encontrado", "Nenhuma instrução encontrada").
+    """
+    documento = abrir_documento(caminho_arquivo)
+    return _buscar_codigo_cabecalhos(_cabecalhos_documento(documento), prefixos)
+
+
+# Leitura direta do XML do .docx, sem montar a árvore de objetos do python-docx.
+# Usada na triagem dos arquivos, quando só os textos do corpo e dos cabeçalhos importam.
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PR = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_PREFIXOS_CODIGO_DOCUMENTO = ["Código:", "CÓDIGO DO MATERIAL", "CÓDIGO", "Código do Produto: ", "CÓDIGO INTERNO DO MATERIAL"]
+_PREFIXOS_CODIGO_CABECALHO = ["Código do Produto: "]
+
+_CONTAINER_DOCUMENTO = [_W + "document", _W + "body"]
+_CONTAINER_CABECALHO = [_W + "hdr"]
+
+def _texto_paragrafo_xml(paragrafo):
+    """Texto de um w:p, com as mesmas regras de Paragraph.text do python-docx."""
+    partes = []
+    for filho in paragrafo:
+        if filho.tag == _W + "r":
+            runs = (filho,)
+        elif filho.tag == _W + "hyperlink":
+            runs = filho.findall(_W + "r")
+        else:
+            continue
+        for run in runs:
+            for elemento in run:
+                tag = elemento.tag
+                if tag == _W + "t":
+                    partes.append(elemento.text or "")
+                elif tag == _W + "tab" or tag == _W + "ptab":
+                    partes.append("\t")
+                elif tag == _W + "cr":
+                    partes.append("\n")
+                elif tag == _W + "br":
+                    if elemento.get(_W + "type", "textWrapping") == "textWrapping":
+                        partes.append("\n")
+                elif tag == _W + "noBreakHyphen":
+                    partes.append("-")
+    return "".join(partes)
+
+def _valor_propriedade(elemento, caminho, padrao):
+    propriedade = elemento.find(caminho)
+    if propriedade is None:
+        return padrao
+    return propriedade.get(_W + "val", padrao)
+
+def _extrair_parte_xml(fluxo, container):
+    """
+    Lê incrementalmente uma parte XML (corpo ou cabeçalho) do .docx.
+
+    Retorna os textos dos parágrafos diretos do container, as tabelas diretas (linhas
+    com os textos das células, repetindo células mescladas como _Row.cells do python-docx)
+    e o rId do cabeçalho principal de cada seção.
+    """
+    paragrafos, tabelas, secoes = [], [], []
+    container_tabela = container + [_W + "tbl"]
+    container_linha = container_tabela + [_W + "tr"]
+    container_celula = container_linha + [_W + "tc"]
+    container_secao = container + [_W + "p", _W + "pPr"]
+
+    pilha = []
+    tabela, linha, celula, linha_anterior = [], [], [], {}
+    for evento, elemento in ET.iterparse(fluxo, events=("start", "end")):
+        if evento == "start":
+            pilha.append(elemento.tag)
+            continue
+
+        pilha.pop()
+        tag = elemento.tag
+        if tag == _W + "p":
+            if pilha == container:
+                paragrafos.append(_texto_paragrafo_xml(elemento))
+            elif pilha == container_celula:
+                celula.append(_texto_paragrafo_xml(elemento))
+        elif tag == _W + "tc" and pilha == container_linha:
+            span = int(_valor_propriedade(elemento, f"{_W}tcPr/{_W}gridSpan", 1))
+            # w:vMerge sem w:val equivale a "continue"
+            vmerge = elemento.find(f"{_W}tcPr/{_W}vMerge")
+            continuacao = vmerge is not None and vmerge.get(_W + "val", "continue") == "continue"
+            linha.append(("\n".join(celula), span, continuacao))
+            celula = []
+        elif tag == _W + "tr" and pilha == container_tabela:
+            coluna = int(_valor_propriedade(elemento, f"{_W}trPr/{_W}gridBefore", 0))
+            textos, grade = [], {}
+            for texto, span, continuacao in linha:
+                # Continuação de mesclagem vertical repete o texto da célula de cima
+                if continuacao:
+                    texto = linha_anterior.get(coluna, "")
+                for _ in range(span):
+                    textos.append(texto)
+                    grade[coluna] = texto
+                    coluna += 1
+            tabela.append(textos)
+            linha, linha_anterior = [], grade
+        elif tag == _W + "tbl" and pilha == container:
+            tabelas.append(tabela)
+            tabela, linha_anterior = [], {}
+        elif tag == _W + "sectPr" and (pilha == container or pilha == container_secao):
+            rid = None
+            for referencia in elemento.findall(_W + "headerReference"):
+                if referencia.get(_W + "type") == "default":
+                    rid = referencia.get(_R + "id")
+            secoes.append(rid)
+
+        # Libera os elementos já processados do corpo
+        if pilha == container:
+            elemento.clear()
+
+    return paragrafos, tabelas, secoes
+
+def extrair_conteudo_docx(caminho_arquivo):
+    """
+    Extrai os textos do corpo e dos cabeçalhos de um .docx lendo apenas word/document.xml
+    e os word/header*.xml usados pelas seções, sem o python-docx.
+
+    Args:
+        caminho_arquivo (str): Caminho para o arquivo .docx.
+
+    Returns:
+        dict: {'paragrafos': [...], 'tabelas': [...], 'cabecalhos': [(paragrafos, tabelas), ...]},
+            com um cabeçalho por seção, como em documento.sections[i].header.
+    """
+    with zipfile.ZipFile(caminho_arquivo) as pacote:
+        with pacote.open("word/document.xml") as fluxo:
+            paragrafos, tabelas, secoes = _extrair_parte_xml(fluxo, _CONTAINER_DOCUMENTO)
+
+        relacoes = {}
+        if secoes and any(secoes):
+            with pacote.open("word/_rels/document.xml.rels") as fluxo:
+                for relacao in ET.parse(fluxo).getroot().iter(_PR + "Relationship"):
+                    alvo = relacao.get("Target", "")
+                    alvo = alvo[1:] if alvo.startswith("/") else posixpath.normpath(posixpath.join("word", alvo))
+                    relacoes[relacao.get("Id")] = alvo
+
+        # Seções sem cabeçalho próprio usam o da seção anterior (is_linked_to_previous)
+        cabecalhos, lidos, rid_atual = [], {}, None
+        for rid in secoes:
+            rid_atual = rid or rid_atual
+            if rid_atual is None:
+                cabecalhos.append(([], []))
+                continue
+            if rid_atual not in lidos:
+                with pacote.open(relacoes[rid_atual]) as fluxo:
+                    paragrafos_cabecalho, tabelas_cabecalho, _ = _extrair_parte_xml(fluxo, _CONTAINER_CABECALHO)
+                lidos[rid_atual] = (paragrafos_cabecalho, tabelas_cabecalho)
+            cabecalhos.append(lidos[rid_atual])
+
+    return {"paragrafos": paragrafos, "tabelas": tabelas, "cabecalhos": cabecalhos}
+
+def triagem_docx(caminho_arquivo, conteudo=None):
+    """
+    Captura o código, a instrução e o tipo do documento com uma única leitura do XML.
+
+    Segue o mesmo fluxo do processamento: o código é procurado no corpo
+    (capture_code_from_docx) e, se não encontrado, nos cabeçalhos
+    (capture_code_from_headers). O tipo equivale a capture_type_from_headers.
+
+    Args:
+        caminho_arquivo (str): Caminho para o arquivo .docx.
+        conteudo (dict, optional): Resultado de extrair_conteudo_docx já calculado.
+
+    Returns:
+        dict: {'codigo', 'tipo_documento', 'tipo_cabecalho', 'classificacao'}. 'tipo_documento'
+            é a instrução encontrada nos cabeçalhos, ou "" se o código foi encontrado no corpo;
+            'classificacao' é o resultado completo do classificador de categorias.
+    """
+    if conteudo is None:
+        conteudo = extrair_conteudo_docx(caminho_arquivo)
+
+    codigo = _buscar_codigo_documento(conteudo["paragrafos"], conteudo["tabelas"], _PREFIXOS_CODIGO_DOCUMENTO)
+    tipo_documento = ""
+    if codigo == "Nenhum código encontrado.":
+        codigo, tipo_documento = _buscar_codigo_cabecalhos(conteudo["cabecalhos"], _PREFIXOS_CODIGO_CABECALHO)
+
+    classificacao = _classificar_cabecalho(_textos_tabelas_cabecalhos(conteudo["cabecalhos"]))
+    return {
+        "codigo": codigo,
+        "tipo_documento": tipo_documento,
+        "tipo_cabecalho": classificacao["sigla"] if classificacao else None,
+        "classificacao": classificacao,
+    }
+
 def convert_doc_to_docx(input_path, output_path):
     try:
-        word = win32com.client.Dispatch("Word.Application")
-        doc = word.Documents.Open(input_path)
-        doc.SaveAs(output_path, FileFormat=16)  # 16 corresponde ao formato .docx
-        doc.Close()
-        word.Quit()
+        # A instância do Word é mantida aberta pelo pool de conversores entre os arquivos
+        converter_arquivo(input_path, output_path, FORMATO_DOCX)
     except Exception as e:
         logging.error(f"Erro ao tentar converter o arquivo doc_to_docx: {e}")
 
 
 def convert_docx_to_doc(input_path, output_path):
     try:
-        word = win32com.client.Dispatch("Word.Application")
-        doc = word.Documents.Open(input_path)
-        doc.SaveAs(output_path, FileFormat=0)
-        doc.Close()
-        word.Quit()
+        converter_arquivo(input_path, output_path, FORMATO_DOC)
     except Exception as e:
         logging.error(f"Erro ao tentar converter o arquivo docx_to_doc: {e}")
 
@@ -284,81 +552,81 @@ def write_document_content_to_file(caminho_arquivo, caminho_saida):
 
 def captura_tabela_embalagem(arq, texto_inicial_tabela):
     # Carregar o documento Word
-    documento = Document(arq)
+    documento = abrir_documento(arq)
 
     # Lista para armazenar os dados extraídos
     dados_extracao = []
 
-    # Iterar pelas tabelas no documento
-    for tabela in documento.tables:
-        # Verificar se a primeira célula da tabela contém o texto inicial desejado
-        if tabela.rows[0].cells[0].text.strip().startswith(texto_inicial_tabela):
-            for linha in tabela.rows[1:]:  # Ignorar o cabeçalho
-                # Verificar se há pelo menos 5 colunas na linha (para evitar erros de índice)
-                if len(linha.cells) >= 5:
-                    try:
-                        # Capturar o código (procurar na posição 0 ou 1)
-                        codigo = linha.cells[0].text.strip() if linha.cells[0].text.strip().isdigit() else linha.cells[1].text.strip()
-
-                        # Capturar os demais valores
-                        descricao = linha.cells[2].text.strip()  # Descrição
-                        quantidade = linha.cells[3].text.strip()  # Quantidade
-                        unidade = linha.cells[4].text.strip()  # Unidade
-
-                        # Verificar se os dados são válidos
-                        if codigo.isdigit() and quantidade.replace('.', '', 1).isdigit():
-                            dados_extracao.append({
-                                "Código": codigo,
-                                "Descrição": descricao,
-                                "Quantidade": quantidade,
-                                "Unidade": unidade
-                            })
-                    except IndexError:
-                        # Ignorar linhas com estrutura inesperada
-                        continue
-            break  # Processar apenas a primeira tabela encontrada com o texto inicial
+    # Localizar a primeira tabela cuja primeira célula começa com o texto inicial desejado
+    entrada = indice_tabelas(documento).comecando_com(texto_inicial_tabela)
+    if entrada:
+        tabela = entrada.tabela
+        for linha in tabela.rows[1:]:  # Ignorar o cabeçalho
+            # Verificar se há pelo menos 5 colunas na linha (para evitar erros de índice)
+            celulas = textos_linha(linha)  # Textos da linha lidos uma única vez
+            if len(celulas) >= 5:
+                try:
+                    # Capturar o código (procurar na posição 0 ou 1)
+                    codigo = celulas[0] if celulas[0].isdigit() else celulas[1]
+
+                    # Capturar os demais valores
+                    descricao = celulas[2]  # Descrição
+                    quantidade = celulas[3]  # Quantidade
+                    unidade = celulas[4]  # Unidade
+
+                    # Verificar se os dados são válidos
+                    if codigo.isdigit() and quantidade.replace('.', '', 1).isdigit():
+                        dados_extracao.append({
+                            "Código": codigo,
+                            "Descrição": descricao,
+                            "Quantidade": quantidade,
+                            "Unidade": unidade
+                        })
+                except IndexError:
+                    # Ignorar linhas com estrutura inesperada
+                    continue
 
     return dados_extracao
 
 
 def captura_tabela_fabricacao(arq, texto_inicial_tabela):
     # Carregar o documento Word
-    documento = Document(arq)
+    documento = abrir_documento(arq)
 
     # Lista para armazenar os dados extraídos
     dados_extracao = []
 
-    # Iterar pelas tabelas no documento
-    for tabela in documento.tables:
-        # Verificar se a primeira célula da tabela contém o texto inicial desejado
-        if tabela.rows[0].cells[0].text.strip().startswith(texto_inicial_tabela):
-            for linha in tabela.rows[1:]:  # Ignorar o cabeçalho
-                # Verificar se há pelo menos 5 colunas na linha (para evitar erros de índice)
-                if len(linha.cells) >= 5:
-                    try:
-                        # Capturar o código (procurar na posição 0 ou 1)
-                        codigo = linha.cells[0].text.strip() if linha.cells[0].text.strip().isdigit() else linha.cells[1].text.strip()
-
-                        # Capturar os demais valores
-                        descricao = linha.cells[2].text.strip()  # Descrição
-                        dcb = linha.cells[3].text.strip()  # DCB
-                        QuantTeórica  = linha.cells[4].text.strip()  # Unidade
-                        formula = linha.cells[5].text.strip()
-                        formulaUni = linha.cells[6].text.strip()
-                        # Verificar se os dados são válidos
-                        if codigo.isdigit() and dcb.replace('.', '', 1).isdigit():
-                            dados_extracao.append({
-                                "Código": codigo,
-                                "Descrição": descricao,
-                                "DCB": dcb,
-                                "QuantTeórica": QuantTeórica,
-                                "Fórmula":formula,
-                                "Fórmula Unitária":formulaUni
-                            })
-                    except IndexError:
-                        # Ignorar linhas com estrutura inesperada
-                        continue
-            break  # Processar apenas a primeira tabela encontrada com o texto inicial
+    # Localizar a primeira tabela cuja primeira célula começa com o texto inicial desejado
+    entrada = indice_tabelas(documento).comecando_com(texto_inicial_tabela)
+    if entrada:
+        tabela = entrada.tabela
+        for linha in tabela.rows[1:]:  # Ignorar o cabeçalho
+            # Verificar se há pelo menos 5 colunas na linha (para evitar erros de índice)
+            celulas = textos_linha(linha)  # Textos da linha lidos uma única vez
+            if len(celulas) >= 5:
+                try:
+                    # Capturar o código (procurar na posição 0 ou 1)
+                    codigo = celulas[0] if celulas[0].isdigit() else celulas[1]
+
+                    # Capturar os demais valores
+                    descricao = celulas[2]  # Descrição
+                    dcb = celulas[3]  # DCB
+                    QuantTeórica  = celulas[4]  # Unidade
+                    formula = celulas[5]
+                    formulaUni = celulas[6]
+                    # Verificar se os dados são válidos
+                    if codigo.isdigit() and dcb.replace('.', '', 1).isdigit():
+                        dados_extracao.append({
+                            "Código": codigo,
+                            "Descrição": descricao,
+                            "DCB": dcb,
+                            "QuantTeórica": QuantTeórica,
+                            "Fórmula":formula,
+                            "Fórmula Unitária":formulaUni
+                        })
+                except IndexError:
+                    # Ignorar linhas com estrutura inesperada
+                    continue
 
     return dados_extracao
 
@@ -367,7 +635,7 @@ def captura_codigo_nucleo(file_path, keyword):
 
     pattern = r"\b\d{8}\b"
     # Abrir o arquivo Word
-    doc = Document(file_path)
+    doc = abrir_documento(file_path)
 
     # Lista para armazenar códigos encontrados
     matched_codes = []
@@ -381,9 +649,9 @@ def captura_codigo_nucleo(file_path, keyword):
     # Procurar a palavra-chave nas tabelas
     for table in doc.tables:
         for row in table.rows:
-            for cell in row.cells:
-                if keyword in cell.text:
-                    codes = re.findall(pattern, cell.text)
+            for texto in textos_linha(row):  # Textos da linha lidos uma única vez
+                if keyword in texto:
+                    codes = re.findall(pattern, texto)
                     matched_codes.extend(codes)
 
     # Remover duplicatas
@@ -0,0 +1,86 @@
+TEXTO_REVISAO = "REVISÃO"
+
+# Primeira linha da lista de fornecedores (linha 4 do Excel, índice 3 no pandas)
+LINHA_INICIAL_LISTA = 4
+
+
+def _valores_coluna(ws, coluna):
+    """
+    Valores de uma coluna da aba, da linha 1 até a última linha usada.
+
+    Só a coluna é percorrida; fora do intervalo usado da aba nenhuma célula é consultada,
+    já que o openpyxl cria as células que lê (ws.iter_rows, ws.cell).
+    """
+    if coluna > ws.max_column:
+        return []
+    return [
+        valor for valor, in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=coluna, max_col=coluna, values_only=True)
+    ]
+
+
+class RevisionSection:
+    """
+    Limites da seção de revisões de uma aba do openpyxl, lidos de uma única coluna.
+
+    Atributos:
+        coluna (int): Coluna analisada.
+        linha_titulo (int): Primeira linha cuja célula contém "REVISÃO", sem diferenciar
+            maiúsculas (título da seção de revisões), ou None.
+        linha_fim_lista (int): Primeira linha a partir da linha 4 cuja célula contém
+            exatamente "REVISÃO" (fim da lista de fornecedores), ou None.
+        ultima_linha (int): Primeira linha vazia após o título, onde entra a nova revisão.
+        ultima_revisao (int): Número da última revisão da seção (0 se não houver).
+    """
+
+    def __init__(self, ws, coluna=1):
+        """
+        Args:
+            ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+            coluna (int): Coluna analisada (1 = coluna A).
+        """
+        self.coluna = coluna
+        self.linha_titulo = None
+        self.linha_fim_lista = None
+        self.ultima_linha = None
+        self.ultima_revisao = 0
+
+        # Lê só a coluna e para a análise assim que os dois limites são encontrados
+        valores = _valores_coluna(ws, coluna)
+        for linha, valor in enumerate(valores, start=1):
+            if not valor:
+                continue
+            texto = str(valor)
+            if self.linha_titulo is None and TEXTO_REVISAO in texto.upper():
+                self.linha_titulo = linha
+            if linha >= LINHA_INICIAL_LISTA and TEXTO_REVISAO in texto:
+                self.linha_fim_lista = linha
+                break
+
+        if self.linha_titulo is None:
+            return
+
+        # As revisões seguem o título até a primeira célula vazia
+        self.ultima_linha = self.linha_titulo + 1
+        while True:
+            valor = valores[self.ultima_linha - 1] if self.ultima_linha <= len(valores) else None
+            if valor is None:
+                break
+            try:
+                self.ultima_revisao = int(valor)
+            except ValueError:
+                pass  # Ignorar valores não numéricos
+            self.ultima_linha += 1
+
+
+def analisar_secao_revisoes(ws, coluna=1):
+    """
+    Localiza a seção de revisões e o fim da lista de fornecedores em uma coluna da aba.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Aba já carregada.
+        coluna (int): Coluna analisada (1 = coluna A).
+
+    Returns:
+        RevisionSection: Limites encontrados.
+    """
+    return RevisionSection(ws, coluna)
@@ -0,0 +1,148 @@
+from docx.table import _Cell, Table
+
+# Atributo do documento em que o índice fica guardado (ver indice_tabelas)
+_ATRIBUTO_INDICE = "_indice_tabelas"
+
+
+def normalizar_legenda(texto):
+    """Remove os espaços das pontas e reduz espaços internos (e quebras de linha) a um só."""
+    return " ".join(str(texto).split())
+
+
+def _legenda_tabela(tbl, tabela):
+    """
+    Texto da primeira célula da primeira linha, lido direto do XML.
+
+    Equivale a tabela.rows[0].cells[0].text (ou tabela.cell(0, 0).text) sem montar a
+    grade de células da linha ou da tabela inteira.
+    """
+    linhas = tbl.tr_lst
+    if not linhas or not linhas[0].tc_lst:
+        return None
+    return _Cell(linhas[0].tc_lst[0], tabela).text
+
+
+def textos_linha(linha):
+    """
+    Retrato dos textos de uma linha de tabela, lido uma única vez.
+
+    Monta as células da linha (linha.cells) uma única vez e lê o texto de cada célula
+    física uma única vez, mesmo quando ela se repete por estar mesclada.
+
+    Args:
+        linha (docx.table._Row): Linha da tabela.
+
+    Returns:
+        tuple: Textos das células sem espaços nas pontas, na mesma posição de linha.cells.
+    """
+    textos = {}
+    return tuple(
+        textos[celula._tc] if celula._tc in textos else textos.setdefault(celula._tc, celula.text.strip())
+        for celula in linha.cells
+    )
+
+
+def celulas_unicas(tabela):
+    """
+    Células físicas de uma tabela, cada uma uma única vez, na ordem do documento.
+
+    Percorre os w:tc diretamente, sem montar a grade de células (em que células
+    mescladas se repetem). Continuações de mesclagem vertical são ignoradas, como em
+    linha.cells, que as substitui pela célula de cima.
+
+    Args:
+        tabela (docx.table.Table): Tabela do documento.
+    """
+    for tc in tabela._tbl.iter_tcs():
+        if tc.vMerge != "continue":
+            yield _Cell(tc, tabela)
+
+
+class TabelaIndexada:
+    """Tabela do documento com a legenda (primeira célula) já normalizada."""
+
+    __slots__ = ("posicao", "legenda", "tabela")
+
+    def __init__(self, posicao, legenda, tabela):
+        self.posicao = posicao
+        self.legenda = legenda
+        self.tabela = tabela
+
+    @property
+    def linhas(self):
+        """Intervalo das linhas de dados (após a linha da legenda), sempre com o tamanho atual da tabela."""
+        return range(1, len(self.tabela._tbl.tr_lst))
+
+
+class TableIndex:
+    """
+    Índice das tabelas de um documento Word pela legenda da primeira célula.
+
+    As legendas são lidas uma única vez por documento; as buscas percorrem apenas as
+    legendas já normalizadas, na ordem do documento, em vez de montar as células de
+    cada tabela novamente.
+    """
+
+    def __init__(self, documento):
+        """
+        Args:
+            documento (docx.document.Document): Documento já aberto.
+        """
+        self._elementos = tuple(documento.element.body.tbl_lst)
+        self._tabelas = []
+        self._por_legenda = {}
+
+        for posicao, tbl in enumerate(self._elementos):
+            tabela = Table(tbl, documento._body)
+            legenda = _legenda_tabela(tbl, tabela)
+            if legenda is None:
+                continue
+
+            entrada = TabelaIndexada(posicao, normalizar_legenda(legenda), tabela)
+            self._tabelas.append(entrada)
+            self._por_legenda.setdefault(entrada.legenda, entrada)
+
+    def atualizado(self, documento):
+        """Indica se as tabelas do documento ainda são as mesmas da construção do índice."""
+        return tuple(documento.element.body.tbl_lst) == self._elementos
+
+    def __iter__(self):
+        return iter(self._tabelas)
+
+    def __len__(self):
+        return len(self._tabelas)
+
+    def buscar(self, legenda):
+        """Primeira tabela cuja legenda é igual à informada."""
+        return self._por_legenda.get(normalizar_legenda(legenda))
+
+    def comecando_com(self, texto):
+        """Primeira tabela cuja legenda começa com o texto informado."""
+        texto = normalizar_legenda(texto)
+        return next((entrada for entrada in self._tabelas if entrada.legenda.startswith(texto)), None)
+
+    def contendo(self, texto):
+        """Primeira tabela cuja legenda contém o texto informado."""
+        texto = normalizar_legenda(texto)
+        return next((entrada for entrada in self._tabelas if texto in entrada.legenda), None)
+
+
+def indice_tabelas(documento):
+    """
+    Retorna o índice de tabelas do documento, construído na primeira chamada.
+
+    O índice fica guardado no próprio documento, é reaproveitado por todas as funções
+    que recebem o mesmo documento (ver DocumentSession) e é reconstruído se tabelas
+    forem incluídas ou removidas.
+
+    Args:
+        documento (docx.document.Document): Documento já aberto.
+
+    Returns:
+        TableIndex: Índice das tabelas do documento.
+    """
+    indice = getattr(documento, _ATRIBUTO_INDICE, None)
+    if indice is None or not indice.atualizado(documento):
+        indice = TableIndex(documento)
+        setattr(documento, _ATRIBUTO_INDICE, indice)
+    return indice
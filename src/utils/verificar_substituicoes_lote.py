@@ -0,0 +1,106 @@
+"""
+Verificação do lote de substituições em células (aplicar_substituicoes_em_lote).
+
+Gera uma INSTRUÇÃO DE EMBALAGEM com a tabela "Componentes – Material de Embalagem"
+em que a célula de um código está mesclada verticalmente em duas linhas (e por isso
+é lida duas vezes por captura_tabela_embalagem) e em que outro código aparece em
+duas células distintas. Edita as células como em editar_arquivo e confere que:
+
+- a célula mesclada é editada uma única vez e o lote não é rejeitado;
+- as duas células distintas com o mesmo código são editadas;
+- um código ausente do documento continua rejeitando o lote inteiro.
+
+Uso:
+    python -m src.utils.verificar_substituicoes_lote
+"""
+import os
+import sys
+import tempfile
+
+from docx import Document
+
+from src.utils.edit_files_utiles import SUBSTITUICAO_CELULA
+from src.utils.document_session import DocumentSession
+from src.utils.logger import initialize_logger
+
+TITULO_TABELA = "Componentes – Material de Embalagem"
+
+# Linhas da tabela: código, (vazio), descrição, quantidade, unidade
+LINHAS = [
+    ("1001", "", "Caixa", "1", "UN"),
+    ("1001", "", "Caixa (continuação)", "2", "UN"),  # mesclada com a linha anterior na coluna A
+    ("3002", "", "Bula", "1", "UN"),
+    ("4003", "", "Rótulo", "1", "UN"),
+    ("4003", "", "Rótulo reserva", "1", "UN"),  # mesmo código em outra célula
+]
+DE_PARA = {"1001": "9001", "3002": "9002", "4003": "9003"}
+
+
+def gerar_documento(caminho):
+    documento = Document()
+    tabela = documento.add_table(rows=len(LINHAS) + 1, cols=5)
+    tabela.cell(0, 0).text = TITULO_TABELA
+    for indice, linha in enumerate(LINHAS, start=1):
+        for coluna, texto in enumerate(linha):
+            tabela.cell(indice, coluna).text = texto
+
+    # A mesclagem mantém o texto das duas células; deixa só o código uma vez
+    mesclada = tabela.cell(1, 0).merge(tabela.cell(2, 0))
+    mesclada.text = "1001"
+    documento.save(caminho)
+
+
+def substituicoes_embalagem(sessao):
+    """Lote montado como no ramo INSTRUÇÃO DE EMBALAGEM de editar_arquivo."""
+    return [
+        {"antigo": item["Código"], "novo": DE_PARA[item["Código"]], "modo": SUBSTITUICAO_CELULA}
+        for item in sessao.tabela_embalagem(TITULO_TABELA)
+        if item["Código"] in DE_PARA
+    ]
+
+
+def verificar(pasta):
+    erros = []
+    caminho = os.path.join(pasta, "embalagem.docx")
+    gerar_documento(caminho)
+
+    sessao = DocumentSession(caminho)
+    substituicoes = substituicoes_embalagem(sessao)
+    if [s["antigo"] for s in substituicoes].count("1001") != 2:
+        erros.append("a célula mesclada não foi lida duas vezes; o documento gerado não reproduz o caso")
+    try:
+        sessao.aplicar_substituicoes(substituicoes)
+        sessao.commit()
+    except ValueError as e:
+        erros.append(f"lote rejeitado: {e}")
+
+    textos = [celula.text for celula in Document(caminho).tables[0].columns[0].cells[1:]]
+    esperado = ["1001 (9001)", "1001 (9001)", "9002", "4003 (9003)", "4003 (9003)"]
+    if textos != esperado:
+        erros.append(f"células editadas divergem: {textos}")
+
+    # Código ausente: o lote inteiro é rejeitado e nada é gravado
+    gerar_documento(caminho)
+    sessao = DocumentSession(caminho)
+    try:
+        sessao.aplicar_substituicoes(
+            substituicoes_embalagem(sessao) + [{"antigo": "7777", "novo": "1", "modo": SUBSTITUICAO_CELULA}]
+        )
+        erros.append("o lote com um código ausente não foi rejeitado")
+    except ValueError:
+        pass
+
+    print(f"Substituições em lote: {'OK' if not erros else 'FALHOU'}")
+    for erro in erros:
+        print(f"  {erro}")
+    return len(erros)
+
+
+def main():
+    initialize_logger()
+    with tempfile.TemporaryDirectory() as pasta:
+        return 1 if verificar(pasta) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
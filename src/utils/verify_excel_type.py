@@ -1,95 +1,250 @@
-import pandas as pd
-from openpyxl import load_workbook
-import win32com.client as win32
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.utils import column_index_from_string
+from openpyxl.worksheet.header_footer import HeaderFooter
+from xml.etree import ElementTree as ET
 import re
 
+from src.utils.document_converter import FORMATO_XLSX, converter_arquivo
+from src.utils.xlsx_repair import preparar_xlsx
+
 def convert_to_xlsx(file_path):
     """Converte o arquivo para .xlsx novamente para corrigir possíveis problemas de arquivo."""
-    excel = win32.gencache.EnsureDispatch('Excel.Application')
-    excel.DisplayAlerts = False
     try:
-        wb = excel.Workbooks.Open(file_path)
+        # A instância do Excel é mantida aberta pelo pool de conversores entre os arquivos
         file_path_xlsx = file_path  # Adiciona _reparado para evitar sobrescrever
-        wb.SaveAs(file_path_xlsx, FileFormat=51)  # 51 = formato .xlsx
-        wb.Close()
-        return file_path_xlsx
+        return converter_arquivo(file_path, file_path_xlsx, FORMATO_XLSX)
     except Exception as e:
         print(f"Erro ao converter o arquivo: {e}")
         return file_path
-    finally:
-        excel.Quit()
 
 
-def verify_excel_type(file_path):
+# Textos da célula A2 (primeira coluna da segunda linha) e os tipos correspondentes
+TIPOS_CELULA_A2 = (("LISTA DE", "TYPE_A"), ("DADOS FORNECEDOR", "TYPE_B"))
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+_C = f"{{{_NS_MAIN}}}c"
+_V = f"{{{_NS_MAIN}}}v"
+_IS = f"{{{_NS_MAIN}}}is"
+_T = f"{{{_NS_MAIN}}}t"
+_R = f"{{{_NS_MAIN}}}r"
+_ROW = f"{{{_NS_MAIN}}}row"
+_HEADER_FOOTER = f"{{{_NS_MAIN}}}headerFooter"
+
+# Valor de células não vazias que não são texto (números, datas, booleanos e erros)
+_NAO_TEXTO = object()
+
+
+def _valor_celula(c, textos_compartilhados):
+    """
+    Valor de uma célula (w:c) para a classificação, como lido pelo pandas com o openpyxl
+    (data_only=True): o texto para células de texto, None para células vazias e
+    _NAO_TEXTO para as demais.
+    """
+    tipo = c.get("t")
+    if tipo == "inlineStr":
+        conteudo = c.find(_IS)
+        if conteudo is None:
+            return None
+        partes = [filho.text or "" for filho in conteudo if filho.tag == _T]
+        partes += [t.text or "" for r in conteudo.iter(_R) for t in r.iter(_T)]
+        return "".join(partes)
+
+    v = c.find(_V)
+    if v is None or v.text is None:
+        return None
+    if tipo == "s":
+        return textos_compartilhados[int(v.text)]
+    if tipo == "str":
+        return v.text
+    return _NAO_TEXTO
+
+
+def _vazio(valor):
+    """Células vazias para o pandas (None e texto vazio)."""
+    return valor is None or valor == ""
+
+
+def _largura_linha(colunas, celulas, valores, textos_compartilhados):
+    """Coluna da última célula não vazia da linha (0 se vazia), procurada a partir do final."""
+    for coluna, c in zip(reversed(colunas), reversed(celulas)):
+        valor = valores[coluna] if coluna in valores else _valor_celula(c, textos_compartilhados)
+        if not _vazio(valor):
+            return coluna
+    return 0
+
+
+def _linhas_planilha(arquivo, caminho_aba, textos_compartilhados, leitura):
+    """
+    Percorre o XML da aba linha a linha sem montar as células do openpyxl.
+
+    Converte apenas os valores das colunas A e B. A largura da linha (coluna da última
+    célula não vazia) só é calculada se a função retornada for chamada antes da linha
+    seguinte. O headerFooter, que fica após as linhas, é lido na mesma passada e
+    guardado em leitura["cabecalho_rodape"].
+
+    Yields:
+        tuple: (índice da linha a partir de 0, valor de A, valor de B, função que retorna a largura da linha)
+    """
+    with arquivo.open(caminho_aba) as fluxo:
+        numero = -1
+        for _, elemento in ET.iterparse(fluxo):
+            if elemento.tag == _HEADER_FOOTER:
+                leitura["cabecalho_rodape"] = HeaderFooter.from_tree(elemento)
+                continue
+            if elemento.tag != _ROW:
+                continue
+
+            numero = int(elemento.get("r")) - 1 if elemento.get("r") else numero + 1
+            celulas = elemento.findall(_C)
+            if all(c.get("r") for c in celulas):
+                colunas = [column_index_from_string(c.get("r").rstrip("0123456789")) for c in celulas]
+            else:
+                colunas = list(range(1, len(celulas) + 1))
+
+            valores = {
+                coluna: _valor_celula(c, textos_compartilhados)
+                for coluna, c in zip(colunas, celulas)
+                if coluna <= 2
+            }
+            yield numero, valores.get(1), valores.get(2), lambda: _largura_linha(colunas, celulas, valores, textos_compartilhados)
+            elemento.clear()
+
+
+def _cabecalho_rodape(arquivo, caminho_aba):
+    """Cabeçalho e rodapé de uma aba, lidos do seu XML sem converter as células."""
+    with arquivo.open(caminho_aba) as fluxo:
+        for _, elemento in ET.iterparse(fluxo):
+            if elemento.tag == _HEADER_FOOTER:
+                return HeaderFooter.from_tree(elemento)
+            if elemento.tag == _ROW:
+                elemento.clear()
+    return HeaderFooter()
+
+
+def _abrir_workbook(file_path):
+    """
+    Lê a estrutura do workbook com o ExcelReader do openpyxl (o mesmo de load_workbook),
+    sem carregar as abas.
+
+    Returns:
+        tuple: (ExcelReader, caminho da primeira aba de dados, caminho da aba ativa ou None
+            se a aba ativa for um gráfico)
+    """
+    # Mesmos parâmetros usados pelo pandas na leitura da planilha
+    reader = ExcelReader(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        reader.read_manifest()
+        reader.read_strings()
+        reader.read_workbook()
+
+        # Mesma ordem de wb._sheets: as abas cujo XML existe, incluindo as de gráfico
+        abas = [rel for _, rel in reader.parser.find_sheets() if rel.target in reader.valid_files]
+        caminho_primeira = [rel.target for rel in abas if "chartsheet" not in rel.Type][0]
+
+        ativa = next((view.activeTab for view in reader.parser.wb.views if view.activeTab is not None), 0)
+        caminho_ativa = None
+        if ativa < len(abas) and "chartsheet" not in abas[ativa].Type:
+            caminho_ativa = abas[ativa].target
+    except Exception:
+        reader.archive.close()
+        raise
+    return reader, caminho_primeira, caminho_ativa
+
+
+def classificar_excel(file_path):
+    """
+    Classifica a planilha abrindo o workbook uma única vez, em modo somente leitura.
+
+    Lê do XML da primeira aba, em uma única passada, apenas as células necessárias (A2,
+    B1 e a coluna A, até encontrar "revisão") e o cabeçalho/rodapé. Retorna os
+    mesmos tipos da leitura anterior com pd.read_excel e load_workbook, inclusive o
+    KeyError quando a planilha não tem segunda linha (ou segunda coluna) com dados.
+
+    Args:
+        file_path (str): Caminho da planilha .xlsx.
+
+    Returns:
+        str: "TYPE_A", "TYPE_B", "TYPE_C", "TYPE_D", "TYPE_REVISION" ou "INVALID_TYPE".
+    """
+    reader, caminho_primeira, caminho_ativa = _abrir_workbook(file_path)
     try:
+        celula_b1 = None
+        tem_segunda_linha = False  # Alguma linha após a primeira com dados (df.at[1, 0] existe)
+        largura = 0  # Quantidade de colunas do DataFrame, calculada só até chegar a 2 (df.at[0, 1] existe)
+        revisao = False
+        leitura = {}
+        linhas = _linhas_planilha(reader.archive, caminho_primeira, reader.shared_strings, leitura)
+        for numero, valor_a, valor_b, largura_linha in linhas:
+            # Com A ou B preenchida a linha já tem dados; as demais células só são
+            # verificadas enquanto a largura ou a segunda linha ainda não foram determinadas
+            if not _vazio(valor_b):
+                largura = max(largura, 2)
+                tem_segunda_linha = tem_segunda_linha or numero >= 1
+            elif largura < 2 or (numero >= 1 and not tem_segunda_linha):
+                largura_calculada = largura_linha()
+                largura = max(largura, largura_calculada)
+                tem_segunda_linha = tem_segunda_linha or (numero >= 1 and largura_calculada > 0)
+
+            if numero == 0:
+                celula_b1 = valor_b
+            elif numero == 1 and isinstance(valor_a, str):
+                for texto, tipo in TIPOS_CELULA_A2:
+                    if texto in valor_a:
+                        return tipo
 
-        if file_path.endswith(".xlsx"):
-            file_path = convert_to_xlsx(file_path)
-
-        df = pd.read_excel(file_path, header=None)
-        
-        # Primeira célula que queremos verificar
-        cell_title_position_1 = df.at[1, 0]
-        matches = False
-
-        # Verifica se cell_title_position_1 é string e contém as palavras-chave esperadas
-        if isinstance(cell_title_position_1, str):
-            if "LISTA DE" in cell_title_position_1:
-                matches = True
-                return "TYPE_A"
-            elif "DADOS FORNECEDOR" in cell_title_position_1:
-                matches = True
-                return "TYPE_B"
-            
-        if matches == False:
             # Verificar se a palavra "revisão" aparece em alguma célula da coluna A
-            for value in df[0]:  # Coluna A é o índice 0
-                if isinstance(value, str) and "revisão" in value.lower():
-                    matches = True
-                    return "TYPE_REVISION"
-                
-        if matches == False:
-            # Carregar o arquivo Excel para verificar o rodapé
-            wb = load_workbook(file_path)
-            sheet = wb.active
-
-            rodape_esquerdo = str(sheet.oddFooter.left.text) if sheet.oddFooter.left.text else ""
-            match = re.search(r"(Revisão\s+)(\d+)", rodape_esquerdo)
-            if match:
-                matches = True
+            revisao = revisao or (isinstance(valor_a, str) and "revisão" in valor_a.lower())
+            if revisao and tem_segunda_linha:
                 return "TYPE_REVISION"
 
-        if matches == False:
-        
-            # Se nenhuma das condições acima for satisfeita, verificar outra célula
-            cell_title_position_2 = df.at[0, 1]
-        
-            if isinstance(cell_title_position_2, str):
-                if  "PLANILHA DE CÁLCULOS" in cell_title_position_2:
-                    matches = True
-                    return "TYPE_C"
-     
-        if matches == False:
-
-            wb = load_workbook(file_path)
-            # Acessar a primeira planilha
-            sheet = wb.active  # ou wb['NomeDaPlanilha'] se quiser especificar uma aba
-
-            # Tentar acessar os cabeçalhos do layout de página
-            cabecalho_esquerdo = getattr(sheet, "oddHeader", None)
-            cabecalho_central = getattr(sheet, "evenHeader", None)
-            cabecalho_direito = getattr(sheet, "firstHeader", None)
-
-            # Filtrar apenas os cabeçalhos que possuem conteúdo
-            cabecalhos = [str(c).strip() for c in [cabecalho_esquerdo, cabecalho_central, cabecalho_direito] if c]
-
-            if any("FICHA DE CÁLCULOS" in c for c in cabecalhos):
-                return "TYPE_D"
+        if not tem_segunda_linha:
+            raise KeyError(1)
+
+        # O headerFooter da primeira aba já foi lido junto com as linhas
+        if caminho_ativa is None:
+            cabecalho_rodape = HeaderFooter()
+        elif caminho_ativa == caminho_primeira:
+            cabecalho_rodape = leitura.get("cabecalho_rodape", HeaderFooter())
+        else:
+            cabecalho_rodape = _cabecalho_rodape(reader.archive, caminho_ativa)
+
+        # Verificar a revisão no rodapé
+        rodape_esquerdo = str(cabecalho_rodape.oddFooter.left.text) if cabecalho_rodape.oddFooter.left.text else ""
+        if re.search(r"(Revisão\s+)(\d+)", rodape_esquerdo):
+            return "TYPE_REVISION"
+
+        # Se nenhuma das condições acima for satisfeita, verificar a célula B1
+        if largura < 2:
+            raise KeyError(1)
+        if isinstance(celula_b1, str) and "PLANILHA DE CÁLCULOS" in celula_b1:
+            return "TYPE_C"
+
+        # Filtrar apenas os cabeçalhos que possuem conteúdo
+        cabecalhos = [
+            str(c).strip()
+            for c in [cabecalho_rodape.oddHeader, cabecalho_rodape.evenHeader, cabecalho_rodape.firstHeader]
+            if c
+        ]
+        if any("FICHA DE CÁLCULOS" in c for c in cabecalhos):
+            return "TYPE_D"
 
         return "INVALID_TYPE"
+    finally:
+        reader.archive.close()
+
+
+def verify_excel_type(file_path):
+    try:
+
+        # A conversão pelo Excel (contorno para falhas de carregamento do workbook) só é
+        # usada quando a planilha não pode ser lida nem reparada no zip/XML
+        if file_path.endswith(".xlsx"):
+            file_path = preparar_xlsx(file_path, convert_to_xlsx)
+
+        return classificar_excel(file_path)
 
     except Exception as e:
         print(f"Erro ao processar o arquivo: {e}")
         return None
-
-
@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import zipfile
+import posixpath
+import warnings
+from xml.etree import ElementTree as ET
+
+from openpyxl import load_workbook
+from openpyxl.packaging.core import DocumentProperties
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, '..')
+sys.path.append(src_dir)
+
+from src.utils.logger import ProcessType, get_logger
+
+_MEMBRO_TIPOS_CONTEUDO = "[Content_Types].xml"
+_MEMBRO_PROPRIEDADES = "docProps/core.xml"
+_CT = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+_PR = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# Tipos padrão exigidos pelo openpyxl para localizar as relações e as partes XML
+_TIPOS_PADRAO = {
+    "rels": "application/vnd.openxmlformats-package.relationships+xml",
+    "xml": "application/xml",
+}
+
+_PROPRIEDADES_MINIMAS = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    b'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+    b'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"/>'
+)
+
+# Estimativa do custo de abrir e regravar a planilha pelo Excel via COM, usada
+# enquanto nenhuma conversão foi medida na execução
+TEMPO_CONVERSAO_ESTIMADO = 5.0
+
+_estatisticas = {
+    "verificados": 0,
+    "validos": 0,
+    "reparados": 0,
+    "convertidos": 0,
+    "tempo_conversoes": 0.0,
+}
+
+
+def xlsx_legivel(caminho_arquivo):
+    """
+    Indica se a planilha é carregada pelo openpyxl (usado também pelo pandas).
+
+    Lê o pacote em modo somente leitura e percorre os valores de todas as abas, o que
+    valida as relações, os estilos, as strings compartilhadas e o XML das planilhas.
+    Abas cuja parte não é encontrada são descartadas pelo openpyxl apenas com um
+    aviso; por isso a quantidade de abas carregadas é comparada com a do workbook.xml.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            wb = load_workbook(caminho_arquivo, read_only=True)
+            try:
+                for planilha in wb.worksheets:
+                    for _ in planilha.iter_rows(values_only=True):
+                        pass
+                carregadas = len(wb.sheetnames)
+            finally:
+                wb.close()
+        return carregadas == _quantidade_abas(caminho_arquivo)
+    except Exception:
+        return False
+
+
+def _quantidade_abas(caminho_arquivo):
+    """Quantidade de abas declaradas no workbook.xml do pacote."""
+    with zipfile.ZipFile(caminho_arquivo) as pacote:
+        relacoes = ET.fromstring(pacote.read("_rels/.rels"))
+        alvo = next(
+            relacao.get("Target") for relacao in relacoes.iter(_PR + "Relationship")
+            if relacao.get("Type", "").endswith("/officeDocument")
+        )
+        workbook = ET.fromstring(pacote.read(alvo.lstrip("/")))
+    return sum(1 for _ in workbook.iter(_MAIN + "sheet"))
+
+
+def _normalizar_nome(nome):
+    return nome.replace("\\", "/").lstrip("/")
+
+
+def _alvos_relacoes(membros):
+    """Partes referenciadas pelas relações e pelos Overrides do [Content_Types].xml."""
+    alvos = set()
+    for nome, conteudo in membros.items():
+        if not nome.endswith(".rels"):
+            continue
+        pasta = posixpath.dirname(posixpath.dirname(nome))
+        try:
+            raiz = ET.fromstring(conteudo)
+        except ET.ParseError:
+            continue
+        for relacao in raiz.iter(_PR + "Relationship"):
+            if relacao.get("TargetMode") == "External":
+                continue
+            alvo = relacao.get("Target", "").replace("\\", "/")
+            alvos.add(alvo.lstrip("/") if alvo.startswith("/") else posixpath.normpath(posixpath.join(pasta, alvo)))
+
+    if _MEMBRO_TIPOS_CONTEUDO in membros:
+        try:
+            for override in ET.fromstring(membros[_MEMBRO_TIPOS_CONTEUDO]).iter(_CT + "Override"):
+                alvos.add(override.get("PartName", "").lstrip("/"))
+        except ET.ParseError:
+            pass
+    return alvos
+
+
+def _reparar_tipos_conteudo(conteudo):
+    """Inclui no [Content_Types].xml os tipos padrão de .rels e .xml, se ausentes."""
+    ET.register_namespace("", _CT[1:-1])
+    raiz = ET.fromstring(conteudo)
+    existentes = {padrao.get("Extension", "").lower() for padrao in raiz.iter(_CT + "Default")}
+    faltantes = [extensao for extensao in _TIPOS_PADRAO if extensao not in existentes]
+    for extensao in faltantes:
+        raiz.insert(0, ET.Element(_CT + "Default", {"Extension": extensao, "ContentType": _TIPOS_PADRAO[extensao]}))
+    if not faltantes:
+        return conteudo, False
+    return ET.tostring(raiz, xml_declaration=True, encoding="UTF-8"), True
+
+
+def _propriedades_validas(conteudo):
+    try:
+        DocumentProperties.from_tree(ET.fromstring(conteudo))
+        return True
+    except Exception:
+        return False
+
+
+def reparar_pacote_xlsx(caminho_arquivo, caminho_saida):
+    """
+    Corrige no zip/XML os defeitos de pacote que impedem o openpyxl de abrir a planilha.
+
+    - nomes de membros com barra invertida ou barra inicial;
+    - membros duplicados (mantém o último, como o Excel);
+    - diferença de maiúsculas/minúsculas entre o nome do membro e a relação que o referencia;
+    - tipos padrão de .rels e .xml ausentes no [Content_Types].xml;
+    - docProps/core.xml com datas ou XML inválidos (substituído por propriedades vazias).
+
+    Args:
+        caminho_arquivo (str): Planilha original (não é alterada).
+        caminho_saida (str): Planilha reparada.
+
+    Returns:
+        list: Descrição dos reparos aplicados (vazia se nenhum foi necessário).
+    """
+    reparos = []
+    membros = {}
+    with zipfile.ZipFile(caminho_arquivo) as pacote:
+        for info in pacote.infolist():
+            if info.is_dir():
+                continue
+            nome = _normalizar_nome(info.filename)
+            if nome != info.filename:
+                reparos.append(f"nome normalizado: {info.filename}")
+            if nome in membros:
+                reparos.append(f"membro duplicado: {nome}")
+            membros[nome] = pacote.read(info)
+
+    por_nome_minusculo = {nome.lower(): nome for nome in membros}
+    for alvo in _alvos_relacoes(membros):
+        existente = por_nome_minusculo.get(alvo.lower())
+        if alvo not in membros and existente is not None:
+            membros[alvo] = membros.pop(existente)
+            por_nome_minusculo[alvo.lower()] = alvo
+            reparos.append(f"membro renomeado: {existente} -> {alvo}")
+
+    if _MEMBRO_TIPOS_CONTEUDO in membros:
+        membros[_MEMBRO_TIPOS_CONTEUDO], alterado = _reparar_tipos_conteudo(membros[_MEMBRO_TIPOS_CONTEUDO])
+        if alterado:
+            reparos.append("tipos padrão incluídos no [Content_Types].xml")
+
+    if _MEMBRO_PROPRIEDADES in membros and not _propriedades_validas(membros[_MEMBRO_PROPRIEDADES]):
+        membros[_MEMBRO_PROPRIEDADES] = _PROPRIEDADES_MINIMAS
+        reparos.append("docProps/core.xml substituído")
+
+    # O [Content_Types].xml é gravado primeiro, como nos pacotes gerados pelo Office
+    ordem = sorted(membros, key=lambda nome: nome != _MEMBRO_TIPOS_CONTEUDO)
+    with zipfile.ZipFile(caminho_saida, "w", zipfile.ZIP_DEFLATED) as destino:
+        for nome in ordem:
+            destino.writestr(nome, membros[nome])
+    return reparos
+
+
+def _tempo_medio_conversao():
+    if _estatisticas["convertidos"]:
+        return _estatisticas["tempo_conversoes"] / _estatisticas["convertidos"]
+    return TEMPO_CONVERSAO_ESTIMADO
+
+
+def _registrar(situacao, caminho_arquivo, detalhe=""):
+    _estatisticas[situacao] += 1
+    evitadas = _estatisticas["validos"] + _estatisticas["reparados"]
+    get_logger().info(
+        f"Excel {os.path.basename(caminho_arquivo)}: {detalhe} | "
+        f"{evitadas} de {_estatisticas['verificados']} arquivo(s) sem conversão pelo Excel, "
+        f"~{evitadas * _tempo_medio_conversao():.1f} s economizados",
+        ProcessType.EXCEL,
+    )
+
+
+def preparar_xlsx(caminho_arquivo, converter):
+    """
+    Garante que a planilha possa ser lida pelo openpyxl/pandas sem abrir o Excel
+    quando possível.
+
+    Planilhas legíveis são usadas como estão; as que falham são reparadas no zip/XML
+    (ver reparar_pacote_xlsx) e só as que continuam ilegíveis passam pela conversão
+    do Excel via COM.
+
+    Args:
+        caminho_arquivo (str): Caminho da planilha .xlsx.
+        converter (callable): Conversão pelo Excel (ex.: convert_to_xlsx), recebe e retorna o caminho.
+
+    Returns:
+        str: Caminho da planilha pronta para leitura.
+    """
+    _estatisticas["verificados"] += 1
+    inicio = time.perf_counter()
+    if xlsx_legivel(caminho_arquivo):
+        _registrar("validos", caminho_arquivo, f"planilha válida ({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+        return caminho_arquivo
+
+    # O openpyxl só abre arquivos com extensão de planilha
+    raiz, extensao = os.path.splitext(caminho_arquivo)
+    caminho_reparado = f"{raiz}.reparo{extensao}"
+    try:
+        reparos = reparar_pacote_xlsx(caminho_arquivo, caminho_reparado)
+        if reparos and xlsx_legivel(caminho_reparado):
+            os.replace(caminho_reparado, caminho_arquivo)
+            _registrar("reparados", caminho_arquivo, f"pacote reparado ({'; '.join(reparos)})")
+            return caminho_arquivo
+    except (OSError, zipfile.BadZipFile, ET.ParseError) as e:
+        get_logger().warning(f"Não foi possível reparar {os.path.basename(caminho_arquivo)}: {e}", ProcessType.EXCEL)
+    finally:
+        if os.path.exists(caminho_reparado):
+            os.remove(caminho_reparado)
+
+    inicio = time.perf_counter()
+    caminho_convertido = converter(caminho_arquivo)
+    _estatisticas["tempo_conversoes"] += time.perf_counter() - inicio
+    _registrar("convertidos", caminho_arquivo, "convertida pelo Excel")
+    return caminho_convertido
+
+
+def estatisticas_reparo():
+    """
+    Returns:
+        dict: {'verificados', 'validos', 'reparados', 'convertidos', 'tempo_conversoes'} da execução.
+    """
+    return dict(_estatisticas)